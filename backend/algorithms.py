@@ -1,4 +1,12 @@
+import functools
+
 import numpy as np
+
+import rules
+
+# Signal codes used by the vectorized engine in place of the per-day order strings.
+HOLD, BUY, SELL = 0, 1, 2
+
 def buy_after_3_consecutive_down_days(i:int, prices: list[float]):
     if i >= 3:
         price = prices[i]
@@ -60,3 +68,83 @@ def reversal_after_a_decline(current_day:int, prices: list[float], downtrend_len
     return "hold",
 
 
+def batch_of(algorithm, warmup=lambda: 0):
+    """
+    Registers the decorated function as the batch form of a per-day `algorithm`.
+
+    A batch form takes prices shaped (..., days), optionally followed by the keyword parameters of the per-day
+    function, and returns the signal codes the per-day function would give for every day along the last axis.
+    `warmup` takes the same keyword parameters and returns how many leading days depend on where the series starts;
+    from that day on, the signals of a window equal the signals of the full series at the same dates.
+    """
+    def register(signals):
+        signals.warmup = warmup
+        algorithm.batch = signals
+        return signals
+    return register
+
+def with_params(algorithm, **params):
+    """
+    Binds keyword parameters to a strategy so the simulator can call it as `algorithm(i, prices)`.
+
+    The batch form, if the strategy has one, is bound to the same parameters.
+    """
+    bound = functools.partial(algorithm, **params)
+    bound.__name__ = algorithm.__name__
+    batch = getattr(algorithm, "batch", None)
+    if batch is not None:
+        bound.batch = functools.partial(batch, **params)
+        bound.batch.warmup = functools.partial(batch.warmup, **params)
+        if hasattr(batch, "rule"):
+            bound.batch.rule = functools.partial(batch.rule, **params)
+    return bound
+
+def rule_of(algorithm, warmup=lambda: 0):
+    """
+    Registers the decorated rule builder as the declarative form of a per-day `algorithm`.
+
+    The builder takes the keyword parameters of the per-day function and returns a `rules.Expr` that holds on the
+    days the per-day function buys. Evaluating it is registered as the batch form (see `batch_of`), and the builder
+    as `algorithm.batch.rule`, so that several strategies can be compiled into one `rules.Program`.
+    """
+    def register(rule):
+        def signals(prices: np.ndarray, **params):
+            return _signals(rules.evaluate(rule(**params), prices))
+        signals.__name__ = f"{algorithm.__name__}_signals"
+        signals.rule = rule
+        batch_of(algorithm, warmup)(signals)
+        return rule
+    return register
+
+def _signals(condition: np.ndarray) -> np.ndarray:
+    return np.where(condition, BUY, HOLD).astype(np.int8)
+
+@rule_of(buy_after_3_consecutive_down_days, warmup=lambda: 3)
+def buy_after_3_consecutive_down_days_rule():
+    return (rules.day() >= 3) & rules.consecutive_declines(3)
+
+@rule_of(buy_everyday)
+def buy_everyday_rule():
+    return rules.const(True)
+
+@rule_of(buy_and_hold, warmup=lambda: 1)
+def buy_and_hold_rule():
+    return rules.day() == 0
+
+@rule_of(buy_the_dip, warmup=lambda dip_threshold=0.05, lookback_window=10: lookback_window)
+def buy_the_dip_rule(dip_threshold:float=0.05, lookback_window:int=10):
+    return (rules.day() >= 1) & rules.below_recent_high(dip_threshold, lookback_window)
+
+@rule_of(moving_average_crossover, warmup=lambda lookback_windows=(20, 5): max(lookback_windows) + 1)
+def moving_average_crossover_rule(lookback_windows: tuple[int, int] = (20, 5)):
+    longer_avg = rules.moving_average(rules.price(), max(lookback_windows))
+    shorter_avg = rules.moving_average(rules.price(), min(lookback_windows))
+    # on the first eligible day the per-day form averages an empty slice for the previous day, so it never buys
+    return (rules.day() > max(lookback_windows)) & rules.crosses_above(shorter_avg, longer_avg)
+
+@rule_of(reversal_after_a_decline, warmup=lambda downtrend_length=5: downtrend_length)
+def reversal_after_a_decline_rule(downtrend_length:int = 5):
+    # the downtrend_length days before current_day fall on every step, then the price turns up
+    downtrend = rules.shift(rules.consecutive_declines(downtrend_length - 1), 1)
+    rebound = rules.price() > rules.shift(rules.price(), 1)
+    return (rules.day() >= downtrend_length) & downtrend & rebound
@@ -1,11 +1,105 @@
-import yfinance as yf
 import pandas as pd
-from datetime import datetime, timedelta
-import csv
+import os
+from concurrent.futures import ThreadPoolExecutor
+from bar_store import BarStore
+from upstream import INTRADAY_INTERVALS, ChartProvider, TokenBucket, limited
 
-def get_api_data(function_index: int, symbol: str, interval_index: int = 4):
+# Where the bar store keeps the series it has downloaded
+BAR_STORE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "bar_store")
+
+# A provider speaking the Yahoo Finance chart API (e.g. a local stub) to use instead of yfinance
+UPSTREAM_URL = os.getenv("UPSTREAM_URL")
+# Upstream requests per second on average, the burst allowed above it, and attempts per fetch
+UPSTREAM_RATE = float(os.getenv("UPSTREAM_RATE", "5"))
+UPSTREAM_BURST = float(os.getenv("UPSTREAM_BURST", "10"))
+UPSTREAM_ATTEMPTS = int(os.getenv("UPSTREAM_ATTEMPTS", "3"))
+
+def history_params(function_index: int, interval_index: int = 4) -> tuple[str, str]:
+    """
+    Map the function/interval indexes used by get_api_data to a yfinance (interval, period) pair
+    """
+    if function_index == 0:
+        # Intraday data - last 7 days with hourly intervals
+        interval_map = {
+            0: "1m",
+            1: "5m",
+            2: "15m",
+            3: "30m",
+            4: "1h"
+        }
+        interval = interval_map.get(interval_index, "1h")
+        period = "7d" if interval in ["1m", "5m", "15m", "30m"] else "60d"
+        return interval, period
+    elif function_index == 2:
+        # Weekly data - last 5 years
+        return "1wk", "5y"
+    elif function_index == 3:
+        # Monthly data - last 10 years
+        return "1mo", "10y"
+    # Daily data - last 2 years (also the default)
+    return "1d", "2y"
+
+def fetch_bars(symbol: str, interval: str, period: str | None = None, start: pd.Timestamp | None = None) -> pd.DataFrame | None:
+    """
+    Download bars from Yahoo Finance, either the look-back `period` or every bar from `start` on
+    
+    Returns a DataFrame with timestamp (naive exchange-local datetime, date only for
+    daily/weekly/monthly), open, high, low, close and volume columns, or None when there is no data.
+    """
+    # yfinance is slow to import and only needed once something is actually downloaded
+    import yfinance as yf
+    
+    ticker = yf.Ticker(symbol)
+    if start is None:
+        data = ticker.history(period=period, interval=interval)
+    else:
+        data = ticker.history(start=start.strftime("%Y-%m-%d"), interval=interval)
+    
+    if data.empty:
+        return None
+    
+    # Reset index to make datetime a column
+    data.reset_index(inplace=True)
+    
+    # Rename columns to match Alpha Vantage format
+    if 'Date' in data.columns:
+        data.rename(columns={'Date': 'timestamp'}, inplace=True)
+    elif 'Datetime' in data.columns:
+        data.rename(columns={'Datetime': 'timestamp'}, inplace=True)
+    
+    # Keep the exchange's wall-clock time, dropping the timezone
+    timestamps = data['timestamp']
+    if timestamps.dt.tz is not None:
+        timestamps = timestamps.dt.tz_localize(None)
+    if interval not in INTRADAY_INTERVALS:
+        # Date only for daily/weekly/monthly
+        timestamps = timestamps.dt.normalize()
+    data['timestamp'] = timestamps
+    
+    # Rename columns to match expected format
+    data.rename(columns={
+        'Open': 'open',
+        'High': 'high',
+        'Low': 'low',
+        'Close': 'close',
+        'Volume': 'volume'
+    }, inplace=True)
+    
+    # Select only needed columns
+    return data[['timestamp', 'open', 'high', 'low', 'close', 'volume']].copy()
+
+# Every upstream request, whoever makes it, takes a token from here
+upstream_bucket = TokenBucket(UPSTREAM_RATE, UPSTREAM_BURST)
+
+# yfinance keeps one session of its own; the chart API provider sends its requests on a pooled session
+provider = ChartProvider(UPSTREAM_URL) if UPSTREAM_URL else fetch_bars
+
+# Series are fetched in full once, then only their missing tail
+bars = BarStore(limited(provider, upstream_bucket, attempts=UPSTREAM_ATTEMPTS), directory=BAR_STORE_DIR)
+
+def get_api_data(function_index: int, symbol: str, interval_index: int = 4, path: str | None = None) -> pd.DataFrame | None:
     """
-    Fetch stock data using yfinance (Yahoo Finance API)
+    Fetch stock data using yfinance (Yahoo Finance API), through the local bar store
     
     function_index:
         0 = Intraday data (1 hour intervals)
@@ -19,84 +113,73 @@ def get_api_data(function_index: int, symbol: str, interval_index: int = 4):
         2 = 15 minutes
         3 = 30 minutes
         4 = 60 minutes (1 hour)
+    
+    path:
+        Optional CSV file to also write the data to (e.g. "stock_data.csv")
+    
+    Returns a DataFrame with timestamp (naive exchange-local datetime, date only for
+    daily/weekly/monthly), open, high, low, close and volume columns, or None on failure.
     """
     
     try:
-        ticker = yf.Ticker(symbol)
+        interval, period = history_params(function_index, interval_index)
+        # the server's market-data TTL decides when to refetch, which also updates a partial last bar
+        stock_data = bars.read(symbol, interval, period, max_age=pd.Timedelta(0))
         
-        if function_index == 0:
-            # Intraday data - last 7 days with hourly intervals
-            interval_map = {
-                0: "1m",
-                1: "5m",
-                2: "15m",
-                3: "30m",
-                4: "1h"
-            }
-            interval = interval_map.get(interval_index, "1h")
-            period = "7d" if interval in ["1m", "5m", "15m", "30m"] else "60d"
-            data = ticker.history(period=period, interval=interval)
-            
-        elif function_index == 1:
-            # Daily data - last 2 years
-            data = ticker.history(period="2y", interval="1d")
-            
-        elif function_index == 2:
-            # Weekly data - last 5 years
-            data = ticker.history(period="5y", interval="1wk")
-            
-        elif function_index == 3:
-            # Monthly data - last 10 years
-            data = ticker.history(period="10y", interval="1mo")
-            
-        else:
-            # Default to daily
-            data = ticker.history(period="2y", interval="1d")
-        
-        if data.empty:
+        if stock_data is None:
             print(f"No data found for symbol: {symbol}")
             return None
         
-        # Reset index to make datetime a column
-        data.reset_index(inplace=True)
-        
-        # Rename columns to match Alpha Vantage format
-        if 'Date' in data.columns:
-            data.rename(columns={'Date': 'timestamp'}, inplace=True)
-        elif 'Datetime' in data.columns:
-            data.rename(columns={'Datetime': 'timestamp'}, inplace=True)
+        stock_data.attrs["intraday"] = function_index == 0
         
-        # Format timestamp based on whether it's intraday or not
-        if function_index == 0:
-            # Keep full datetime for intraday
-            data['timestamp'] = data['timestamp'].dt.strftime('%Y-%m-%d %H:%M:%S')
-        else:
-            # Date only for daily/weekly/monthly
-            data['timestamp'] = data['timestamp'].dt.strftime('%Y-%m-%d')
+        if path is not None:
+            write_stock_csv(stock_data, path)
         
-        # Rename columns to match expected format
-        data.rename(columns={
-            'Open': 'open',
-            'High': 'high',
-            'Low': 'low',
-            'Close': 'close',
-            'Volume': 'volume'
-        }, inplace=True)
-        
-        # Select only needed columns
-        csv_data = data[['timestamp', 'open', 'high', 'low', 'close', 'volume']]
-        
-        # Write to CSV file
-        with open("stock_data.csv", "w", newline='') as f:
-            csv_data.to_csv(f, index=False)
-        
-        print(f"Successfully fetched {len(csv_data)} data points for {symbol}")
-        return True
+        print(f"Successfully fetched {len(stock_data)} data points for {symbol}")
+        return stock_data
         
     except Exception as e:
         print(f"Error fetching data for {symbol}: {e}")
         return None
 
+def get_price_matrix(symbols: list[str], function_index: int = 1, interval_index: int = 4, column: str = "close", workers: int = 8) -> pd.DataFrame | None:
+    """
+    Fetch many symbols at once and align them into one date x symbol price matrix
+    
+    The symbols are loaded through get_api_data by a pool of `workers` threads. Symbols that fail
+    are left out. Rows cover every timestamp any symbol traded on, gaps are filled with the previous
+    price, and the matrix starts once every symbol has a price.
+    
+    Returns a DataFrame indexed by timestamp with one `column` series per symbol, or None when no
+    symbol could be fetched.
+    """
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        frames = list(executor.map(lambda symbol: get_api_data(function_index, symbol, interval_index), symbols))
+    
+    series = {}
+    for symbol, frame in zip(symbols, frames):
+        if frame is None:
+            print(f"Leaving {symbol} out of the price matrix")
+            continue
+        series[symbol] = frame.set_index("timestamp")[column]
+    if not series:
+        return None
+    
+    matrix = pd.DataFrame(series).sort_index().ffill().dropna()
+    matrix.index.name = "timestamp"
+    return matrix
+
+def write_stock_csv(stock_data: pd.DataFrame, path: str = "stock_data.csv"):
+    """
+    Write a frame returned by get_api_data as CSV (timestamp,open,high,low,close,volume)
+    """
+    csv_data = stock_data.copy()
+    csv_data['timestamp'] = csv_data['timestamp'].dt.strftime(
+        '%Y-%m-%d %H:%M:%S' if stock_data.attrs.get("intraday") else '%Y-%m-%d'
+    )
+    with open(path, "w", newline='') as f:
+        csv_data.to_csv(f, index=False)
+
 # Test the function
 if __name__ == "__main__":
-    get_api_data(1, "^GSPC")  # S&P 500 index
+    get_api_data(1, "^GSPC", path="stock_data.csv")  # S&P 500 index
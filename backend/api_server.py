@@ -1,13 +1,36 @@
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Request, Response
+from fastapi.responses import StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
 from datetime import datetime, timedelta
-from api_data import get_api_data
-from csv_data import get_csv_data
+from api_data import get_api_data, history_params
+import asyncio
+import contextlib
+import functools
+import hashlib
+import json
 import os
-from typing import List, Dict, Any
-import algorithms
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Optional
+import pandas as pd
+from market_cache import MarketDataCache
+from plots import IMAGE_FORMATS, render_algorithm_plot, render_stock_plot, rendered_images
+from prefetch import PrefetchScheduler
+from metrics import CallbackCounter, Histogram, RequestTiming, SamplingProfiler, render
+from chart_data import CHART_TYPES, chart_columns, columnar_response_json, downsample_columns, format_dates, stock_response_json, stream_ndjson, stream_stock_response
+from strategy_runner import STRATEGIES, STRATEGY_WORKERS, CPUBudgetExceeded, run_profits_limited, run_strategies_limited
 
-app = FastAPI()
+@contextlib.asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Keep the most requested series warm while the server runs"""
+    prefetcher.start()
+    try:
+        yield
+    finally:
+        await asyncio.to_thread(prefetcher.stop)
+
+app = FastAPI(lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -20,6 +43,205 @@ app.add_middleware(
 # Default to S&P 500 Index
 SYMBOL = "^GSPC"
 
+# Response bodies /api/stock-data can produce: row objects, one row object per line, or parallel arrays
+RESPONSE_FORMATS = ("json", "ndjson", "columns")
+
+# Charts /api/plots renders: the price history, or a strategy's average profit per simulated window length
+PLOT_CHARTS = ("stock", "simulation")
+
+# Seconds a fetched series stays fresh, per requested range
+MARKET_DATA_TTL = {
+    "1d": 60,
+    "1w": 15 * 60,
+    "1m": 30 * 60,
+    "1y": 60 * 60,
+}
+
+market_data = MarketDataCache(max_entries=256)
+
+# Serialized /api/strategies responses, keyed by (symbol, data version, start_cash, monthly_cash).
+# The data version changes whenever the prices do, so entries only age out to bound memory.
+strategy_results = MarketDataCache(max_entries=1024, default_ttl=24 * 60 * 60)
+
+# Average profit per window length behind /api/plots/simulation, keyed by (symbol, data version, strategy, start_cash,
+# monthly_cash); the images themselves are cached by content in plots.rendered_images
+simulated_profits = MarketDataCache(max_entries=256, default_ttl=24 * 60 * 60)
+
+# Chart columns reduced to max_points bars, keyed by (symbol, range, chart type, max_points, data version)
+downsampled_columns = MarketDataCache(max_entries=512, default_ttl=60 * 60)
+
+# Blocking upstream fetches run in this pool so the event loop keeps serving other requests
+FETCH_WORKERS = int(os.getenv("FETCH_WORKERS", "32"))
+# Parsing and filtering run in a separate pool, so requests for cached data never queue behind fetches
+PARSE_WORKERS = int(os.getenv("PARSE_WORKERS", str(os.cpu_count() or 4)))
+# Backtests wait for the CPU-limited strategy_runner processes in their own pool, so they never hold up fetches or parsing
+BACKTEST_WORKERS = int(os.getenv("BACKTEST_WORKERS", str(STRATEGY_WORKERS)))
+# At most this many yfinance calls are in flight at once
+UPSTREAM_CONCURRENCY = int(os.getenv("UPSTREAM_CONCURRENCY", "4"))
+# Seconds a request waits for each stage before giving up with 504
+FETCH_TIMEOUT = float(os.getenv("FETCH_TIMEOUT", "30"))
+
+# The PREFETCH_TOP most requested series are refreshed in the background PREFETCH_LEAD seconds before they expire,
+# checking every PREFETCH_INTERVAL seconds; PREFETCH_TOP=0 turns prefetching off
+PREFETCH_TOP = int(os.getenv("PREFETCH_TOP", "20"))
+PREFETCH_LEAD = float(os.getenv("PREFETCH_LEAD", "10"))
+PREFETCH_INTERVAL = float(os.getenv("PREFETCH_INTERVAL", "1"))
+
+# Sampling profiles are taken only when this is set, and then only for requests with ?profile=1
+PROFILING_ENABLED = os.getenv("PROFILING_ENABLED", "").lower() in ("1", "true", "yes")
+PROFILE_DIR = os.getenv("PROFILE_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "profiles"))
+
+stage_seconds = Histogram("api_stage_seconds", "Wall time of each stage of an API request", ("endpoint", "stage"))
+upstream_seconds = Histogram("upstream_fetch_seconds", "Time of one upstream get_api_data call", ("interval",))
+cache_hits = CallbackCounter("cache_hits_total", "Lookups answered from a cache", ("cache",),
+                             lambda: [(("market_data",), market_data.hits), (("strategy_results",), strategy_results.hits), (("downsampled_columns",), downsampled_columns.hits),
+                                      (("simulated_profits",), simulated_profits.hits), (("rendered_images",), rendered_images.hits)])
+cache_misses = CallbackCounter("cache_misses_total", "Lookups that had to load the value", ("cache",),
+                               lambda: [(("market_data",), market_data.misses), (("strategy_results",), strategy_results.misses), (("downsampled_columns",), downsampled_columns.misses),
+                                        (("simulated_profits",), simulated_profits.misses), (("rendered_images",), rendered_images.misses)])
+
+prefetcher = PrefetchScheduler(lambda request: refresh_api_frame(*request), market_data.expires_in, top=PREFETCH_TOP, lead=PREFETCH_LEAD, interval=PREFETCH_INTERVAL)
+prefetches = CallbackCounter("prefetch_refreshes_total", "Background refreshes of frequently requested series", ("outcome",),
+                             lambda: [(("refreshed",), prefetcher.refreshed), (("failed",), prefetcher.failed)])
+
+fetch_executor = ThreadPoolExecutor(max_workers=FETCH_WORKERS, thread_name_prefix="fetch")
+parse_executor = ThreadPoolExecutor(max_workers=PARSE_WORKERS, thread_name_prefix="parse")
+backtest_executor = ThreadPoolExecutor(max_workers=BACKTEST_WORKERS, thread_name_prefix="backtest")
+upstream_slots = threading.BoundedSemaphore(UPSTREAM_CONCURRENCY)
+
+@app.middleware("http")
+async def time_request(request: Request, call_next):
+    """Record the stages of every request as histograms and a Server-Timing header, profiling it when asked"""
+    timing = request.state.timing = RequestTiming()
+    profiler = None
+    if PROFILING_ENABLED and request.query_params.get("profile") == "1":
+        profiler = SamplingProfiler().start()
+    try:
+        with timing.stage("total"):
+            response = await call_next(request)
+    finally:
+        if profiler is not None:
+            profiler.stop()
+    # only matched routes are recorded, so unknown paths cannot create new series
+    route = request.scope.get("route")
+    if route is not None and route.path != "/metrics":
+        timing.observe(stage_seconds, route.path)
+    response.headers["Server-Timing"] = timing.server_timing()
+    if profiler is not None:
+        name = route.path.strip("/").replace("/", "-") if route is not None else "unmatched"
+        response.headers["X-Profile"] = await asyncio.to_thread(profiler.save, PROFILE_DIR, name)
+    return response
+
+def request_timing(request: Request) -> RequestTiming:
+    """The timing the middleware attached to `request`, or a throwaway one outside of it"""
+    return getattr(getattr(request, "state", None), "timing", None) or RequestTiming()
+
+def _upstream_fetch(symbol: str, function_index: int, interval_index: int, interval: str) -> Callable[[], Optional[pd.DataFrame]]:
+    def fetch():
+        with upstream_slots:
+            started = time.perf_counter()
+            try:
+                return get_api_data(function_index, symbol, interval_index)
+            finally:
+                upstream_seconds.observe(time.perf_counter() - started, interval)
+    return fetch
+
+def load_api_frame(symbol: str, function_index: int, interval_index: int = 4, range_type: str = "1d") -> Optional[pd.DataFrame]:
+    """Fetch a symbol's price frame through the market data cache (None when the fetch fails)"""
+    interval, period = history_params(function_index, interval_index)
+    fetch = _upstream_fetch(symbol, function_index, interval_index, interval)
+    return market_data.get((symbol, interval, period), fetch, ttl=MARKET_DATA_TTL.get(range_type))
+
+def refresh_api_frame(symbol: str, function_index: int, interval_index: int = 4, range_type: str = "1d") -> Optional[pd.DataFrame]:
+    """Fetch a symbol's price frame again and store it in the market data cache, even if the cached one is fresh"""
+    interval, period = history_params(function_index, interval_index)
+    fetch = _upstream_fetch(symbol, function_index, interval_index, interval)
+    return market_data.refresh((symbol, interval, period), fetch, ttl=MARKET_DATA_TTL.get(range_type))
+
+async def _wait_for_disconnect(request: Request, poll_interval: float = 0.1):
+    while not await request.is_disconnected():
+        await asyncio.sleep(poll_interval)
+
+async def run_off_loop(request: Request, executor: ThreadPoolExecutor, func: Callable[..., Any], *args, timeout: float = None) -> Any:
+    """
+    Run blocking work in an executor without stalling the event loop.
+    
+    Raises 504 after `timeout` seconds (FETCH_TIMEOUT by default) and 499 when the client
+    disconnects first. The worker thread itself cannot be interrupted; it finishes in the
+    background and a fetched frame still lands in the market data cache.
+    """
+    loop = asyncio.get_running_loop()
+    work = loop.run_in_executor(executor, functools.partial(func, *args))
+    disconnect = asyncio.ensure_future(_wait_for_disconnect(request))
+    try:
+        done, _ = await asyncio.wait(
+            {work, disconnect},
+            timeout=FETCH_TIMEOUT if timeout is None else timeout,
+            return_when=asyncio.FIRST_COMPLETED,
+        )
+    finally:
+        disconnect.cancel()
+    if work in done:
+        return work.result()
+    work.cancel()
+    if disconnect in done:
+        raise HTTPException(status_code=499, detail="Client disconnected")
+    raise HTTPException(status_code=504, detail="Timed out fetching data")
+
+async def fetch_frame(request: Request, symbol: str, function_index: int, interval_index: int = 4, range_type: str = "1d") -> Optional[pd.DataFrame]:
+    """Serve a fresh cached frame directly, otherwise fetch it in fetch_executor"""
+    interval, period = history_params(function_index, interval_index)
+    prefetcher.record((symbol, interval, period), (symbol, function_index, interval_index, range_type))
+    frame = market_data.peek((symbol, interval, period))
+    if frame is not None:
+        return frame
+    return await run_off_loop(request, fetch_executor, load_api_frame, symbol, function_index, interval_index, range_type)
+
+def data_version(frame: pd.DataFrame) -> str:
+    """Hash of a frame's timestamps and closing prices, remembered in frame.attrs"""
+    version = frame.attrs.get("version")
+    if version is None:
+        hashed = pd.util.hash_pandas_object(frame[["timestamp", "close"]], index=False).to_numpy()
+        version = frame.attrs["version"] = hashlib.sha1(hashed.tobytes()).hexdigest()
+    return version
+
+def load_strategy_results(symbol: str, frame: pd.DataFrame, start_cash: float, monthly_cash: float) -> bytes:
+    """Backtest the dashboard strategies on a daily frame, memoized per data version and parameters"""
+    def backtest():
+        columns = chart_columns(frame, "1y")
+        if len(columns["timestamp"]) < 10:
+            raise HTTPException(status_code=404, detail="Not enough data for simulation")
+        dates = format_dates(columns["timestamp"], include_time=False)
+        result = run_strategies_limited(symbol, dates, columns["close"], start_cash, monthly_cash)
+        return json.dumps(result, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+    return strategy_results.get((symbol, data_version(frame), start_cash, monthly_cash), backtest)
+
+def load_downsampled(symbol: str, range: str, chart: str, max_points: int, frame: pd.DataFrame, columns: dict) -> dict:
+    """Downsample the chart columns parsed from `frame`, memoized per data version"""
+    key = (symbol, range, chart, max_points, data_version(frame))
+    return downsampled_columns.get(key, lambda: downsample_columns(columns, max_points, chart))
+
+def load_simulated_profits(symbol: str, frame: pd.DataFrame, strategy: str, start_cash: float, monthly_cash: float) -> dict[int, float]:
+    """Simulate a dashboard strategy on a daily frame in the CPU-limited strategy_runner, memoized per data version and parameters"""
+    def backtest():
+        # every valid daily bar, not just the last year
+        prices = chart_columns(frame, "all")["close"]
+        if len(prices) < 20:
+            raise HTTPException(status_code=404, detail="Not enough data for simulation")
+        return run_profits_limited(prices, strategy, start_cash, monthly_cash)
+
+    return simulated_profits.get((symbol, data_version(frame), strategy, start_cash, monthly_cash), backtest)
+
+def render_plot(chart: str, frame: pd.DataFrame, symbol: str, range: str, format: str, strategy: str, results: Optional[dict[int, float]] = None) -> bytes:
+    """Render a price chart from `frame` or a strategy's simulation `results`; identical charts come from rendered_images"""
+    if chart == "stock":
+        columns = chart_columns(frame, range)
+        if not len(columns["timestamp"]):
+            raise HTTPException(status_code=404, detail="No data found after parsing")
+        return render_stock_plot(columns["close"], columns["timestamp"].astype("datetime64[ns]"), format, title=f"{symbol} ({range})")
+    return render_algorithm_plot(results, format, title=f"{STRATEGIES[strategy][2]} ({symbol})")
+
 def calculate_date_range(range_type: str) -> tuple:
     """Calculate start and end dates - get enough data to filter later"""
     end_date = datetime.now()
@@ -49,199 +271,183 @@ def get_function_index_for_range(range_type: str) -> int:
     else:
         return 1  # Default to DAILY
 
-def parse_stock_data(csv_data: List[List[str]], include_time: bool = False) -> List[Dict[str, Any]]:
-    """Parse CSV data into JSON format for frontend"""
-    result = []
-    
-    for row in csv_data:
-        if len(row) < 6:
-            continue
-        
-        try:
-            date_str = row[0].strip()
-            
-            # Skip header row
-            if date_str.lower() in ['timestamp', 'date']:
-                continue
-            
-            # parse the date
-            date_obj = None
-            has_time = False
-            for fmt in ["%Y-%m-%d %H:%M:%S", "%Y-%m-%d", "%m/%d/%Y", "%Y-%d-%m"]:
-                try:
-                    date_obj = datetime.strptime(date_str, fmt)
-                    if fmt == "%Y-%m-%d %H:%M:%S":
-                        has_time = True
-                    break
-                except ValueError:
-                    continue
-            
-            if date_obj is None:
-                print(f"Could not parse date: {date_str}")
-                continue
-            
-            # Format date with time if include_time is True and time exists
-            if include_time and has_time:
-                formatted_date = date_obj.strftime("%Y-%m-%d %H:%M:%S")
-            else:
-                formatted_date = date_obj.strftime("%Y-%m-%d")
-            
-            # Alpha Vantage format: timestamp,open,high,low,close,volume
-            # row[1]=open, row[4]=close
-            open_price = float(row[1])
-            high_price = float(row[2]) if len(row) > 2 else open_price
-            low_price = float(row[3]) if len(row) > 3 else open_price
-            close_price = float(row[4])
-            
-            # Skip rows with invalid/zero prices
-            if open_price <= 0 or high_price <= 0 or low_price <= 0 or close_price <= 0:
-                print(f"Skipping row with invalid prices: {row}")
-                continue
-            
-            if open_price > 0:
-                change = ((close_price - open_price) / open_price) * 100
-                change_str = f"{change:+.2f}%"
-            else:
-                change_str = "0.00%"
-            
-            result.append({
-                "date": formatted_date,
-                "price": close_price,
-                "open": open_price,
-                "high": high_price,
-                "low": low_price,
-                "volume": row[5] if len(row) > 5 else "0",
-                "change": change_str,
-                "file_name": "api"
-            })
-        except (ValueError, IndexError) as e:
-            print(f"Error parsing row {row}: {e}")
-            continue
-    
-    return result
-
 @app.get("/api/stock-data")
-async def get_stock_data(range: str = "1d", symbol: str = "^GSPC"):
+async def get_stock_data(request: Request, range: str = "1d", symbol: str = "^GSPC", format: str = "json", stream: bool = False, max_points: Optional[int] = None, chart: str = "candlestick"):
     """
     Fetch stock data for the specified time range
     
     Parameters:
     - range: Time range (1d, 1w, 1m, 1y)
     - symbol: Stock symbol (default: ^GSPC for S&P 500)
+    - format: json (object per row), ndjson (streamed, one row object per line) or columns (parallel arrays)
+    - stream: Send the json body in chunks while it is being serialized
+    - max_points: Return at most this many bars (at least 3), downsampled for the chart type
+    - chart: candlestick (bars merged into OHLC buckets) or line (most significant bars kept, LTTB)
     """
+    if format not in RESPONSE_FORMATS:
+        raise HTTPException(status_code=400, detail=f"Unknown format: {format}")
+    if chart not in CHART_TYPES:
+        raise HTTPException(status_code=400, detail=f"Unknown chart type: {chart}")
+    if max_points is not None and max_points < 3:
+        raise HTTPException(status_code=400, detail="max_points must be at least 3")
+    timing = request_timing(request)
     try:
         # Get the appropriate function index based on range
         function_index = get_function_index_for_range(range)
         
         # Fetch data from API (use higher-resolution intraday for 1d)
         print(f"Fetching data for {symbol} with range {range}")
-        if range == "1d":
-            # Try 1-minute granularity first; some symbols (indexes) may not support it
-            get_api_data(function_index, symbol, interval_index=0)
-        else:
-            get_api_data(function_index, symbol)
+        with timing.stage("fetch"):
+            if range == "1d":
+                # Try 1-minute granularity first; some symbols (indexes) may not support it
+                frame = await fetch_frame(request, symbol, function_index, interval_index=0, range_type=range)
+            else:
+                frame = await fetch_frame(request, symbol, function_index, range_type=range)
         
-        # Check if the data file was created
-        if not os.path.exists("stock_data.csv"):
+        if frame is None:
             raise HTTPException(status_code=500, detail="Failed to fetch data from API")
         
-        # Read the CSV file directly
-        import csv
-        csv_data = []
-        with open("stock_data.csv", "r") as f:
-            reader = csv.reader(f)
-            for row in reader:
-                csv_data.append(row)
-        
-        if len(csv_data) <= 1:  # Only header or empty
+        if frame.empty:
             raise HTTPException(status_code=404, detail="No data found in API response")
         
-        # Parse the data into JSON format (include time for intraday)
-        include_time = (range == "1d")
-        stock_data = parse_stock_data(csv_data, include_time)
+        with timing.stage("parse"):
+            columns = await run_off_loop(request, parse_executor, chart_columns, frame, range)
         
-        if not stock_data:
+        if not len(columns["timestamp"]):
             raise HTTPException(status_code=404, detail="No data found after parsing")
         
-        # Sort data by date (newest first)
-        stock_data.sort(key=lambda x: datetime.strptime(
-            x["date"], 
-            "%Y-%m-%d %H:%M:%S" if " " in x["date"] else "%Y-%m-%d"
-        ), reverse=True)
+        # If too few intraday points (e.g., only hourly), fallback to 5m and refetch
+        if range == "1d" and len(columns["timestamp"]) < 30:
+            with timing.stage("fetch"):
+                fallback_frame = await fetch_frame(request, symbol, function_index, interval_index=1, range_type=range)
+            with timing.stage("parse"):
+                fallback = await run_off_loop(request, parse_executor, chart_columns, fallback_frame, range)
+            if len(fallback["timestamp"]):
+                frame, columns = fallback_frame, fallback
+        
+        if max_points is not None and len(columns["timestamp"]) > max_points:
+            with timing.stage("downsample"):
+                columns = await run_off_loop(request, parse_executor, load_downsampled, symbol, range, chart, max_points, frame, columns)
+        
+        # Streamed bodies are serialized chunk by chunk as the client reads them
+        if format == "ndjson":
+            return StreamingResponse(stream_ndjson(columns, range), media_type="application/x-ndjson")
+        if stream and format == "json":
+            return StreamingResponse(stream_stock_response(columns, range, symbol), media_type="application/json")
+        with timing.stage("serialize"):
+            build = columnar_response_json if format == "columns" else stock_response_json
+            body = await run_off_loop(request, parse_executor, build, columns, range, symbol)
+        return Response(content=body, media_type="application/json")
+    except HTTPException:
+        raise
+    except Exception as e:
+        print(f"Error fetching stock data: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.get("/api/strategies")
+async def get_strategies(request: Request, symbol: str = "^GSPC", start_cash: float = 10000, monthly_cash: float = 1000):
+    """
+    Backtest the dashboard strategies on the last year of daily prices
+    
+    Parameters:
+    - symbol: Stock symbol (default: ^GSPC for S&P 500)
+    - start_cash: Cash available on the first day
+    - monthly_cash: Cash added every 21 trading days
+    """
+    timing = request_timing(request)
+    try:
+        with timing.stage("fetch"):
+            frame = await fetch_frame(request, symbol, 1, range_type="1y")
         
-        # For daily data, we need to get unique dates first, then take last N days
-        if not include_time and range in ["1w", "1m", "1y"]:
-            # Group by unique dates
-            unique_dates = []
-            dates_seen = set()
-            
-            for item in stock_data:
-                date_only = item["date"].split()[0] if " " in item["date"] else item["date"]
-                if date_only not in dates_seen:
-                    unique_dates.append(date_only)
-                    dates_seen.add(date_only)
-            
-            # Determine how many unique days we need
-            days_needed = {
-                "1w": 7,
-                "1m": 22,
-                "1y": 252
-            }.get(range, 7)
-            
-            # Take only the first N unique dates (most recent)
-            selected_dates = set(unique_dates[:days_needed])
-            
-            # Filter data to only include these dates
-            filtered_data = [
-                item for item in stock_data 
-                if (item["date"].split()[0] if " " in item["date"] else item["date"]) in selected_dates
-            ]
-        elif include_time:
-            # For intraday (1d), get all data from the most recent trading day
-            if stock_data:
-                most_recent_date = stock_data[0]["date"].split()[0]
-                filtered_data = [item for item in stock_data if item["date"].startswith(most_recent_date)]
+        if frame is None:
+            raise HTTPException(status_code=500, detail="Failed to fetch data from API")
+        
+        if frame.empty:
+            raise HTTPException(status_code=404, detail="No data found in API response")
+        
+        # Repeated loads of the same data and parameters are answered from the cache
+        with timing.stage("backtest"):
+            version = frame.attrs.get("version") or await run_off_loop(request, parse_executor, data_version, frame)
+            body = strategy_results.peek((symbol, version, start_cash, monthly_cash))
+            if body is None:
+                body = await run_off_loop(request, backtest_executor, load_strategy_results, symbol, frame, start_cash, monthly_cash)
+        return Response(content=body, media_type="application/json")
+    except HTTPException:
+        raise
+    except CPUBudgetExceeded as e:
+        print(f"Strategy backtest for {symbol} stopped: {e}")
+        raise HTTPException(status_code=503, detail=str(e))
+    except Exception as e:
+        print(f"Error running strategies: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.get("/api/plots/{chart}")
+async def get_plot(request: Request, chart: str, symbol: str = "^GSPC", range: str = "1y", format: str = "png", strategy: str = "buy_and_hold", start_cash: float = 10000, monthly_cash: float = 1000):
+    """
+    Render a chart as an image, for report pages and emails
+    
+    Parameters:
+    - chart: stock (closing prices over the range) or simulation (a strategy's average profit per window length,
+      simulated on the daily history)
+    - symbol: Stock symbol (default: ^GSPC for S&P 500)
+    - range: Time range of the stock chart (1d, 1w, 1m, 1y)
+    - format: png or svg
+    - strategy: Dashboard strategy simulated (buy_and_hold, buy_everyday, buy_after_3_down, buy_the_dip)
+    - start_cash: Cash available on the first day of every simulated window
+    - monthly_cash: Cash added every 21 trading days
+    """
+    if chart not in PLOT_CHARTS:
+        raise HTTPException(status_code=400, detail=f"Unknown chart: {chart}")
+    if format not in IMAGE_FORMATS:
+        raise HTTPException(status_code=400, detail=f"Unknown format: {format}")
+    if chart == "simulation" and strategy not in STRATEGIES:
+        raise HTTPException(status_code=400, detail=f"Unknown strategy: {strategy}")
+    timing = request_timing(request)
+    try:
+        with timing.stage("fetch"):
+            if chart == "stock" and range == "1d":
+                frame = await fetch_frame(request, symbol, 0, interval_index=0, range_type=range)
+            elif chart == "stock":
+                frame = await fetch_frame(request, symbol, get_function_index_for_range(range), range_type=range)
             else:
-                filtered_data = []
-            # If too few points (e.g., only hourly), fallback to 5m and refetch
-            if len(filtered_data) < 30:
-                get_api_data(function_index, symbol, interval_index=1)
-                # reload csv and reparse
-                import csv
-                csv_data = []
-                with open("stock_data.csv", "r") as f:
-                    reader = csv.reader(f)
-                    for row in reader:
-                        csv_data.append(row)
-                stock_data = parse_stock_data(csv_data, include_time)
-                if stock_data:
-                    stock_data.sort(key=lambda x: datetime.strptime(
-                        x["date"], 
-                        "%Y-%m-%d %H:%M:%S" if " " in x["date"] else "%Y-%m-%d"
-                    ), reverse=True)
-                    most_recent_date = stock_data[0]["date"].split()[0]
-                    filtered_data = [item for item in stock_data if item["date"].startswith(most_recent_date)]
-        else:
-            filtered_data = stock_data
+                frame = await fetch_frame(request, symbol, 1, range_type="1y")
         
-        # Sort back to chronological order (oldest first for chart display)
-        filtered_data.sort(key=lambda x: datetime.strptime(
-            x["date"], 
-            "%Y-%m-%d %H:%M:%S" if " " in x["date"] else "%Y-%m-%d"
-        ))
+        if frame is None:
+            raise HTTPException(status_code=500, detail="Failed to fetch data from API")
         
-        return {
-            "success": True,
-            "data": filtered_data,
-            "range": range,
-            "symbol": symbol
-        }
+        if frame.empty:
+            raise HTTPException(status_code=404, detail="No data found in API response")
+        
+        results = None
+        if chart == "simulation":
+            with timing.stage("backtest"):
+                version = frame.attrs.get("version") or await run_off_loop(request, parse_executor, data_version, frame)
+                results = simulated_profits.peek((symbol, version, strategy, start_cash, monthly_cash))
+                if results is None:
+                    results = await run_off_loop(request, backtest_executor, load_simulated_profits, symbol, frame, strategy, start_cash, monthly_cash)
+
+        with timing.stage("render"):
+            image = await run_off_loop(request, parse_executor, render_plot, chart, frame, symbol, range, format, strategy, results)
         
+        # the same chart renders to the same bytes, so clients revalidating an image they hold get it without a body
+        etag = f'"{hashlib.sha1(image).hexdigest()}"'
+        if request.headers.get("if-none-match") == etag:
+            return Response(status_code=304, headers={"ETag": etag})
+        return Response(content=image, media_type=IMAGE_FORMATS[format], headers={"ETag": etag})
+    except HTTPException:
+        raise
+    except CPUBudgetExceeded as e:
+        print(f"Simulation for {symbol} stopped: {e}")
+        raise HTTPException(status_code=503, detail=str(e))
     except Exception as e:
-        print(f"Error fetching stock data: {e}")
+        print(f"Error rendering plot: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
-# Strategy simulation moved to frontend - this endpoint is no longer needed
+@app.get("/metrics")
+async def get_metrics():
+    """Stage timings, upstream fetch times and cache counters in the Prometheus text format"""
+    body = render([stage_seconds, upstream_seconds, cache_hits, cache_misses, prefetches])
+    return Response(content=body, media_type="text/plain; version=0.0.4")
 
 if __name__ == "__main__":
     import uvicorn
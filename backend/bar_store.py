@@ -0,0 +1,164 @@
+import os
+import re
+import threading
+from collections import OrderedDict
+from typing import Callable, Hashable
+from urllib.parse import quote
+
+import numpy as np
+import pandas as pd
+
+COLUMNS = ["timestamp", "open", "high", "low", "close", "volume"]
+
+PERIOD_UNITS = {"d": "days", "wk": "weeks", "mo": "months", "y": "years"}
+
+INTERVAL_UNITS = {"m": "minutes", "h": "hours", "d": "days", "wk": "weeks", "mo": "months"}
+
+def period_offset(period: str | None) -> pd.DateOffset | None:
+    """Length of a yfinance look-back period such as "7d", "5y" or "10y", None for "max" or no period"""
+    match = re.fullmatch(r"(\d+)(d|wk|mo|y)", period or "")
+    if match is None:
+        return None
+    return pd.DateOffset(**{PERIOD_UNITS[match.group(2)]: int(match.group(1))})
+
+def interval_offset(interval: str) -> pd.DateOffset | None:
+    """Length of a yfinance bar interval such as "5m", "1h", "1d" or "1wk", None for an unknown interval"""
+    match = re.fullmatch(r"(\d+)(m|h|d|wk|mo)", interval)
+    if match is None:
+        return None
+    return pd.DateOffset(**{INTERVAL_UNITS[match.group(2)]: int(match.group(1))})
+
+class BarStore:
+    """
+    Local store of price bars per (symbol, interval) that is refreshed by fetching only the missing tail.
+
+    The first read of a series fetches its whole look-back period. Later reads fetch from the start of the day of
+    the last stored bar, drop the stored bars the fetched tail covers (which replaces a partial last bar with its
+    final values) and append the rest, unless the last stored bar is newer than one interval, so no later bar can
+    exist yet. A series whose last bar is older than the period is fetched in full again.
+    At most `max_series` series are kept in memory; the least recently used ones are reloaded from their files.
+    """
+
+    def __init__(self, fetcher: Callable[..., pd.DataFrame | None], directory: str | None = None, clock: Callable[[], pd.Timestamp] = pd.Timestamp.now, max_series: int = 64):
+        """
+        Args:
+            fetcher (Callable[..., pd.DataFrame | None]): Called as `fetcher(symbol, interval, period=..., start=...)`
+                with either a look-back period or a start timestamp, returns a frame with `COLUMNS` (naive timestamps,
+                oldest first) or None when there is nothing. Replace it with a stub to use the store offline.
+            directory (str | None, optional): Directory the series are persisted to, one .npz file each. Defaults to
+                keeping them in memory only.
+            clock (Callable[[], pd.Timestamp], optional): Current time, replaceable in tests. Defaults to `pd.Timestamp.now`.
+            max_series (int, optional): Series kept in memory. Without a directory an evicted series is fetched in
+                full again. Defaults to 64.
+        """
+        self.fetcher = fetcher
+        self.directory = directory
+        self.clock = clock
+        self.max_series = max_series
+        self._series: OrderedDict[Hashable, pd.DataFrame] = OrderedDict()
+        self._locks: dict[Hashable, threading.Lock] = {}
+        self._lock = threading.Lock()
+        self.full_fetches = 0
+        self.tail_fetches = 0
+
+    def read(self, symbol: str, interval: str, period: str | None = None, refresh: bool = True, max_age: pd.Timedelta | None = None) -> pd.DataFrame | None:
+        """
+        Returns the stored bars of a series within `period` of its last bar, refreshing the series first.
+
+        Args:
+            symbol (str): Ticker symbol, e.g. "^GSPC".
+            interval (str): Bar interval, e.g. "1d" or "5m".
+            period (str | None, optional): Look-back period, e.g. "2y"; also what a full fetch asks for. Defaults to
+                every stored bar.
+            refresh (bool, optional): Fetch the missing tail before reading. Defaults to True.
+            max_age (pd.Timedelta | None, optional): Age of the last stored bar below which the tail is not fetched;
+                zero always fetches it, updating a partial last bar. Defaults to one interval.
+
+        Returns:
+            pd.DataFrame | None: A copy of the bars, oldest first, or None when the series has none.
+        """
+        key = (symbol, interval)
+        with self._key_lock(key):
+            bars = self._refresh(key, period, max_age) if refresh else self._load(key)
+        if bars is None or bars.empty:
+            return None
+        offset = period_offset(period)
+        if offset is not None:
+            bars = bars[bars["timestamp"] >= bars["timestamp"].iloc[-1] - offset]
+        return bars.reset_index(drop=True)
+
+    def last_bar(self, symbol: str, interval: str) -> pd.Timestamp | None:
+        """
+        Returns the timestamp of the last stored bar of a series, or None when nothing is stored.
+        """
+        bars = self._load((symbol, interval))
+        return None if bars is None or bars.empty else bars["timestamp"].iloc[-1]
+
+    def _key_lock(self, key: Hashable) -> threading.Lock:
+        with self._lock:
+            return self._locks.setdefault(key, threading.Lock())
+
+    def _refresh(self, key: Hashable, period: str | None, max_age: pd.Timedelta | None) -> pd.DataFrame | None:
+        symbol, interval = key
+        stored = self._load(key)
+        offset = period_offset(period)
+        age = interval_offset(interval) if max_age is None else max_age
+        if stored is not None and not stored.empty and age is not None and self.clock() < stored["timestamp"].iloc[-1] + age:
+            return stored
+        try:
+            if stored is None or stored.empty or (offset is not None and stored["timestamp"].iloc[-1] < self.clock() - offset):
+                self.full_fetches += 1
+                bars = self.fetcher(symbol, interval, period=period, start=None)
+                if bars is None or bars.empty:
+                    return stored
+                return self._save(key, _clean(bars))
+
+            self.tail_fetches += 1
+            tail = self.fetcher(symbol, interval, period=None, start=stored["timestamp"].iloc[-1].normalize())
+        except Exception as e:
+            if stored is None or stored.empty:
+                raise
+            print(f"Error refreshing {symbol} {interval}, serving stored bars: {e}")
+            return stored
+        if tail is None or tail.empty:
+            return stored
+        tail = _clean(tail)
+        merged = pd.concat([stored[stored["timestamp"] < tail["timestamp"].iloc[0]], tail], ignore_index=True)
+        return self._save(key, merged)
+
+    def _path(self, key: Hashable) -> str:
+        symbol, interval = key
+        return os.path.join(self.directory, f"{quote(symbol, safe='')}_{interval}.npz")
+
+    def _load(self, key: Hashable) -> pd.DataFrame | None:
+        with self._lock:
+            bars = self._series.get(key)
+            if bars is not None:
+                self._series.move_to_end(key)
+        if bars is None and self.directory is not None and os.path.exists(self._path(key)):
+            with np.load(self._path(key)) as arrays:
+                bars = pd.DataFrame({name: arrays[name] for name in COLUMNS})
+            self._remember(key, bars)
+        return bars
+
+    def _remember(self, key: Hashable, bars: pd.DataFrame):
+        with self._lock:
+            self._series[key] = bars
+            self._series.move_to_end(key)
+            while len(self._series) > self.max_series:
+                self._series.popitem(last=False)
+
+    def _save(self, key: Hashable, bars: pd.DataFrame) -> pd.DataFrame:
+        self._remember(key, bars)
+        if self.directory is not None:
+            os.makedirs(self.directory, exist_ok=True)
+            path = self._path(key)
+            temporary = path + ".tmp.npz"
+            np.savez(temporary, **{name: bars[name].to_numpy() for name in COLUMNS})
+            os.replace(temporary, path)
+        return bars
+
+def _clean(bars: pd.DataFrame) -> pd.DataFrame:
+    """Sort by time and keep the last of duplicate timestamps"""
+    bars = bars[COLUMNS].sort_values("timestamp", kind="stable")
+    return bars.drop_duplicates("timestamp", keep="last").reset_index(drop=True)
@@ -0,0 +1,70 @@
+"""
+Concurrency benchmark for /api/stock-data with a stubbed slow upstream.
+
+Starts the API on a local port with get_api_data replaced by a fetcher that sleeps for
+--latency seconds, then fires --requests concurrent chart requests for distinct symbols while
+timing a request for an already cached symbol. With the fetch off the event loop, the cached
+request returns in milliseconds instead of waiting behind the slow ones.
+
+Run from the backend directory: python -m benchmarks.concurrent_requests
+"""
+import argparse
+import socket
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+import uvicorn
+
+import api_server
+from benchmarks.synthetic import synthetic_ohlcv
+
+def stub_fetcher(latency: float):
+    def get_api_data(function_index: int, symbol: str, interval_index: int = 4, path: str | None = None):
+        time.sleep(latency)
+        return synthetic_ohlcv(600, intraday=function_index == 0, seed=len(symbol))
+    return get_api_data
+
+def serve() -> tuple[uvicorn.Server, str]:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        port = s.getsockname()[1]
+    server = uvicorn.Server(uvicorn.Config(api_server.app, host="127.0.0.1", port=port, log_level="warning"))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.01)
+    return server, f"http://127.0.0.1:{port}"
+
+def timed_get(url: str) -> float:
+    started = time.perf_counter()
+    requests.get(url, timeout=120).raise_for_status()
+    return time.perf_counter() - started
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=32, help="concurrent slow requests")
+    parser.add_argument("--latency", type=float, default=0.5, help="seconds the stub upstream takes per fetch")
+    args = parser.parse_args()
+
+    api_server.get_api_data = stub_fetcher(args.latency)
+    server, base = serve()
+    timed_get(f"{base}/api/stock-data?range=1y&symbol=WARM")
+
+    urls = [f"{base}/api/stock-data?range=1y&symbol=SYM{i}" for i in range(args.requests)]
+    with ThreadPoolExecutor(max_workers=args.requests + 1) as pool:
+        started = time.perf_counter()
+        slow = [pool.submit(timed_get, url) for url in urls]
+        time.sleep(args.latency / 10)
+        cached = timed_get(f"{base}/api/stock-data?range=1y&symbol=WARM")
+        latencies = sorted(future.result() for future in slow)
+        wall = time.perf_counter() - started
+
+    print(f"{args.requests} uncached requests, upstream latency {args.latency:.2f}s, "
+          f"upstream concurrency {api_server.UPSTREAM_CONCURRENCY}")
+    print(f"  wall time      {wall:.2f}s")
+    print(f"  latency p50    {statistics.median(latencies):.2f}s")
+    print(f"  latency max    {latencies[-1]:.2f}s")
+    print(f"  cached request {cached * 1000:.1f}ms while the others were in flight")
+    server.should_exit = True
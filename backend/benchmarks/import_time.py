@@ -0,0 +1,62 @@
+"""
+Startup check: how long importing each backend module takes, and that it does no work.
+
+Every module is imported in a fresh interpreter. The check fails (exit status 1) when an import
+pulls in matplotlib, prints anything, or when importing the simulator takes longer than --budget
+milliseconds.
+
+Run from the backend directory: python -m benchmarks.import_time
+"""
+import argparse
+import json
+import subprocess
+import sys
+
+MODULES = ["rules", "algorithms", "csv_data", "result_cache", "plots", "simulator", "sweep", "strategy_runner", "bar_store", "upstream", "prefetch", "api_data", "chart_data", "metrics", "api_server", "main"]
+
+PROBE = """
+import io, json, sys, time
+captured = io.StringIO()
+stdout, sys.stdout = sys.stdout, captured
+started = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - started
+sys.stdout = stdout
+print(json.dumps({{"ms": elapsed * 1000, "output": captured.getvalue(), "matplotlib": "matplotlib" in sys.modules, "yfinance": "yfinance" in sys.modules}}))
+"""
+
+def import_cost(module: str, repeat: int = 3) -> dict:
+    """Best import time of `module` over `repeat` fresh interpreters, with what the import loaded and printed"""
+    runs = []
+    for _ in range(repeat):
+        completed = subprocess.run([sys.executable, "-c", PROBE.format(module=module)], capture_output=True, text=True)
+        if completed.returncode:
+            return {"error": completed.stderr.strip().splitlines()[-1]}
+        runs.append(json.loads(completed.stdout.splitlines()[-1]))
+    return min(runs, key=lambda run: run["ms"])
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--budget", type=float, default=250, help="milliseconds importing the simulator may take")
+    parser.add_argument("--repeat", type=int, default=3, help="fresh interpreters per module; the best time is kept")
+    args = parser.parse_args()
+
+    failures = []
+    for module in MODULES:
+        cost = import_cost(module, args.repeat)
+        if "error" in cost:
+            print(f"{module:<16}{'failed':>11}   {cost['error']}")
+            failures.append(f"importing {module} raises {cost['error']}")
+            continue
+        loaded = ", ".join(name for name in ("matplotlib", "yfinance") if cost[name]) or "-"
+        print(f"{module:<16}{cost['ms']:>9.1f}ms   loads: {loaded}")
+        if cost["matplotlib"]:
+            failures.append(f"importing {module} loads matplotlib")
+        if cost["output"]:
+            failures.append(f"importing {module} prints {cost['output'][:60]!r}")
+        if module == "simulator" and cost["ms"] > args.budget:
+            failures.append(f"importing simulator takes {cost['ms']:.0f}ms, over the {args.budget:g}ms budget")
+
+    for failure in failures:
+        print("FAIL:", failure)
+    sys.exit(1 if failures else 0)
@@ -0,0 +1,89 @@
+"""
+Prefetch benchmark: chart request latency with and without the background refresher, against the stub provider.
+
+Starts benchmarks.stub_provider with --latency seconds per response (failing every --fail-every-th
+request), points the API's bar store at it through the rate-limited chart API fetcher, shortens the
+cache lifetime to --ttl seconds and requests a few hot symbols every --pace seconds for --seconds.
+With prefetching on, the entries are refreshed before they expire and every request after the
+first is served warm; with it off, each expiry makes one request wait for the upstream again.
+
+The check fails (exit status 1) when the stub saw more requests in one second than the token bucket
+allows, or when a warm request with prefetching took as long as an upstream fetch.
+
+Run from the backend directory: python -m benchmarks.prefetch
+"""
+import argparse
+import statistics
+import sys
+import time
+
+import requests
+
+import api_data
+import api_server
+from bar_store import BarStore
+from benchmarks.concurrent_requests import serve
+from benchmarks.stub_provider import StubProvider
+from upstream import ChartProvider, TokenBucket, limited
+
+def hammer(base: str, symbols: list[str], seconds: float, pace: float) -> list[float]:
+    """Request every symbol each `pace` seconds for `seconds`, returning the latencies after the first round"""
+    session = requests.Session()
+    latencies = []
+    first = True
+    deadline = time.monotonic() + seconds
+    while time.monotonic() < deadline:
+        for symbol in symbols:
+            started = time.perf_counter()
+            session.get(f"{base}/api/stock-data?range=1y&symbol={symbol}&format=columns", timeout=60).raise_for_status()
+            if not first:
+                latencies.append(time.perf_counter() - started)
+        first = False
+        time.sleep(pace)
+    return latencies
+
+def report(name: str, latencies: list[float]):
+    print(f"{name:<18} p50 {statistics.median(latencies) * 1000:8.1f}ms   max {max(latencies) * 1000:8.1f}ms   "
+          f"over 100ms: {sum(latency > 0.1 for latency in latencies)}/{len(latencies)}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--latency", type=float, default=0.3, help="seconds the stub takes per response")
+    parser.add_argument("--fail-every", type=int, default=5, help="the stub answers every n-th request with 503")
+    parser.add_argument("--symbols", type=int, default=4, help="hot symbols requested")
+    parser.add_argument("--ttl", type=float, default=3, help="seconds a fetched frame stays fresh")
+    parser.add_argument("--seconds", type=float, default=10, help="length of each run")
+    parser.add_argument("--pace", type=float, default=0.25, help="seconds between rounds of requests")
+    parser.add_argument("--rate", type=float, default=5, help="upstream requests per second allowed")
+    parser.add_argument("--burst", type=float, default=5, help="upstream burst allowed")
+    args = parser.parse_args()
+
+    stub = StubProvider(args.latency, args.fail_every).start()
+    bucket = TokenBucket(args.rate, args.burst)
+    # in memory, so the run leaves the real bar store alone
+    api_data.bars = BarStore(limited(ChartProvider(stub.url), bucket, base_delay=0.05), directory=None)
+    api_server.MARKET_DATA_TTL["1y"] = args.ttl
+    api_server.prefetcher.lead = args.ttl / 2
+    api_server.prefetcher.interval = 0.1
+    server, base = serve()
+
+    failures = []
+    warm = hammer(base, [f"HOT{i}" for i in range(args.symbols)], args.seconds, args.pace)
+    api_server.prefetcher.stop()
+    cold = hammer(base, [f"COLD{i}" for i in range(args.symbols)], args.seconds, args.pace)
+    server.should_exit = True
+
+    print(f"{args.symbols} symbols every {args.pace}s, cache ttl {args.ttl}s, upstream latency {args.latency}s, "
+          f"every {args.fail_every}th upstream request fails")
+    report("prefetching", warm)
+    report("on demand", cold)
+    print(f"upstream requests {len(stub.request_times)}, most in one second {stub.max_rate()} "
+          f"(bucket: {args.rate:g}/s, burst {args.burst:g}), waited for tokens {bucket.waited:.2f}s, "
+          f"prefetches {api_server.prefetcher.refreshed} ok / {api_server.prefetcher.failed} failed")
+    if stub.max_rate() > args.burst + args.rate:
+        failures.append(f"the stub saw {stub.max_rate()} requests in one second")
+    if max(warm) >= args.latency:
+        failures.append(f"a request with prefetching took {max(warm):.2f}s, as long as an upstream fetch")
+    for failure in failures:
+        print("FAIL:", failure)
+    sys.exit(1 if failures else 0)
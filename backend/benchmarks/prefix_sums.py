@@ -0,0 +1,69 @@
+"""
+Check of the prefix-sum fast path of simulate against the window-by-window engine.
+
+Simulates buy_and_hold and buy_everyday on a synthetic history with both paths for a grid of
+exposure and cash settings, and reports the time of each path. The check fails (exit status 1)
+when an averaged result differs, or when a single window's rounded profit differs by more than
+one cent of a percent (the fast path sums in a different order, so a profit that lies on a
+rounding boundary may round the other way).
+
+Run from the backend directory: python -m benchmarks.prefix_sums
+"""
+import argparse
+import itertools
+import sys
+import time
+
+import numpy as np
+
+import algorithms
+from benchmarks.synthetic import synthetic_ohlcv
+from simulator import prefix_sum_pattern, prefix_sum_profits, window_lengths, window_profits
+
+SETTINGS = [
+    {"exposure_type": exposure_type, "exposure_value": exposure_value, "start_cash": start_cash, "monthly_cash": monthly_cash}
+    for (exposure_type, exposure_value), start_cash, monthly_cash in itertools.product(
+        [("fixed_fraction", 0.1), ("fixed_fraction", 1), ("fixed_quantity", 1), ("fixed_quantity", 0.01), ("fixed_quantity", 3)],
+        [100000, 1000],
+        [0, 1000],
+    )
+]
+
+def compare(prices: np.ndarray, algorithm, settings: dict) -> tuple[float, float, list[str]]:
+    """Seconds taken by the fast path and the engine over every window length, with the differences found"""
+    pattern = prefix_sum_pattern(algorithm, settings["exposure_type"])
+    fast_seconds = engine_seconds = 0.0
+    failures = []
+    for length in window_lengths(len(prices)):
+        started = time.perf_counter()
+        fast = prefix_sum_profits(prices, length, pattern, **settings)
+        fast_seconds += time.perf_counter() - started
+        started = time.perf_counter()
+        engine = window_profits(prices, algorithm.batch(prices), length, algorithm=algorithm, **settings)
+        engine_seconds += time.perf_counter() - started
+        largest = float(np.abs(np.subtract(fast, engine)).max())
+        if largest > 0.011:
+            failures.append(f"{algorithm.__name__} {settings} length {length}: a window differs by {largest:.4f}")
+        if round(sum(fast) / len(fast), 2) != round(sum(engine) / len(engine), 2):
+            failures.append(f"{algorithm.__name__} {settings} length {length}: the average differs")
+    return fast_seconds, engine_seconds, failures
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--bars", type=int, default=2000, help="days in the synthetic history")
+    args = parser.parse_args()
+
+    prices = synthetic_ohlcv(args.bars)["close"].to_numpy()
+    failures = []
+    for algorithm in (algorithms.buy_and_hold, algorithms.buy_everyday):
+        for settings in SETTINGS:
+            if prefix_sum_pattern(algorithm, settings["exposure_type"]) is None:
+                continue
+            fast_seconds, engine_seconds, found = compare(prices, algorithm, settings)
+            failures.extend(found)
+            described = " ".join(f"{value}" for value in settings.values())
+            print(f"{algorithm.__name__:<14}{described:<36}{fast_seconds * 1000:>10.1f}ms {engine_seconds * 1000:>10.1f}ms")
+
+    for failure in failures:
+        print("FAIL:", failure)
+    sys.exit(1 if failures else 0)
@@ -0,0 +1,42 @@
+"""
+Micro-benchmark for the /api/stock-data response builder.
+
+Times chart_columns + stock_response_json, i.e. everything the endpoint does after the frame
+is fetched, for a 1y request (two years of daily bars) and a 1d request (a week of one-minute
+bars), and prints the per-request latency.
+
+Run from the backend directory: python -m benchmarks.response_builder
+"""
+import argparse
+import statistics
+import time
+
+from benchmarks.synthetic import synthetic_ohlcv
+from chart_data import chart_columns, stock_response_json
+
+PAYLOADS = {
+    "1y": lambda: synthetic_ohlcv(504),
+    "1d": lambda: synthetic_ohlcv(7 * 390, intraday=True),
+}
+
+def time_request(frame, range_type: str, repeat: int) -> list[float]:
+    latencies = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        stock_response_json(chart_columns(frame, range_type), range_type, "^GSPC")
+        latencies.append(time.perf_counter() - started)
+    return latencies
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=200, help="requests per payload")
+    args = parser.parse_args()
+
+    for range_type, make_frame in PAYLOADS.items():
+        frame = make_frame()
+        latencies = sorted(time_request(frame, range_type, args.repeat))
+        rows = len(chart_columns(frame, range_type)["timestamp"])
+        body = stock_response_json(chart_columns(frame, range_type), range_type, "^GSPC")
+        print(f"{range_type}: {len(frame)} bars in, {rows} rows / {len(body) / 1024:.0f} KiB out, "
+              f"median {statistics.median(latencies) * 1000:.2f}ms, "
+              f"p95 {latencies[int(len(latencies) * 0.95)] * 1000:.2f}ms")
@@ -0,0 +1,64 @@
+"""
+Time-to-first-byte, total time, payload size and peak memory of /api/stock-data per response format.
+
+Serves a stubbed history of --bars one-minute bars (range=all returns every row) and downloads it as
+one JSON body, as a streamed JSON body, as NDJSON and as the columnar payload. Peak memory is the
+tracemalloc peak of the whole process during a second, separate download (tracing slows it down),
+so it includes the client side.
+
+Run from the backend directory: python -m benchmarks.streaming_response
+"""
+import argparse
+import time
+import tracemalloc
+
+import requests
+
+import api_server
+from benchmarks.concurrent_requests import serve
+from benchmarks.synthetic import synthetic_ohlcv
+
+VARIANTS = {
+    "json": "",
+    "json, stream=true": "&stream=true",
+    "ndjson": "&format=ndjson",
+    "columns": "&format=columns",
+}
+
+def download(url: str) -> tuple[float, float, int]:
+    started = time.perf_counter()
+    with requests.get(url, stream=True, timeout=600) as response:
+        response.raise_for_status()
+        chunks = response.iter_content(chunk_size=None)
+        size = len(next(chunks))
+        first_byte = time.perf_counter() - started
+        for chunk in chunks:
+            size += len(chunk)
+    return first_byte, time.perf_counter() - started, size
+
+def peak_memory(url: str) -> int:
+    tracemalloc.start()
+    try:
+        download(url)
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--bars", type=int, default=500_000, help="rows in the served history")
+    args = parser.parse_args()
+
+    frame = synthetic_ohlcv(args.bars, intraday=True)
+    api_server.get_api_data = lambda function_index, symbol, interval_index=4, path=None: frame
+    server, base = serve()
+    url = f"{base}/api/stock-data?range=all&symbol=BENCH"
+    requests.get(url + "&format=columns", timeout=600).raise_for_status()
+
+    print(f"{args.bars} bars")
+    print(f"  {'format':<20}{'first byte':>12}{'total':>10}{'size':>12}{'peak memory':>14}")
+    for name, query in VARIANTS.items():
+        first_byte, total, size = download(url + query)
+        peak = peak_memory(url + query)
+        print(f"  {name:<20}{first_byte * 1000:>10.0f}ms{total:>9.2f}s{size / 2**20:>10.1f}MB{peak / 2**20:>12.1f}MB")
+    server.should_exit = True
@@ -0,0 +1,127 @@
+"""
+Local stand-in for the Yahoo Finance chart API, serving deterministic synthetic bars.
+
+Answers GET /v8/finance/chart/{symbol}?interval=...&range=... (or period1/period2) like the real
+endpoint, after an optional delay, and can fail every n-th request with 503 to exercise retries.
+Every request is timestamped, so callers can check the rate they were served at.
+
+Run it on its own and point the API server at it:
+    python -m benchmarks.stub_provider --port 8900
+    UPSTREAM_URL=http://127.0.0.1:8900 python api_server.py
+"""
+import argparse
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, unquote, urlparse
+
+import pandas as pd
+
+from bar_store import period_offset
+from benchmarks.synthetic import synthetic_ohlcv
+from upstream import INTRADAY_INTERVALS
+
+TIMEZONE = "America/New_York"
+
+def stub_bars(symbol: str, interval: str) -> pd.DataFrame:
+    """Synthetic bars for `symbol` ending today: five years of days, or a week of minutes for intraday intervals"""
+    intraday = interval in INTRADAY_INTERVALS
+    bars = 5 * 390 if intraday else 5 * 252
+    days = bars // 390 + 1 if intraday else bars
+    start = pd.bdate_range(end=pd.Timestamp.now().normalize(), periods=days)[0]
+    return synthetic_ohlcv(bars, intraday=intraday, seed=sum(map(ord, symbol)), start=str(start.date()))
+
+def chart_payload(frame: pd.DataFrame) -> dict:
+    """The chart API response carrying `frame`"""
+    # whole seconds whatever the resolution the timestamps are stored at
+    epochs = (frame["timestamp"].dt.tz_localize(TIMEZONE) - pd.Timestamp(0, tz="UTC")) // pd.Timedelta(seconds=1)
+    return {"chart": {"result": [{
+        "meta": {"exchangeTimezoneName": TIMEZONE},
+        "timestamp": epochs.tolist(),
+        "indicators": {"quote": [{name: frame[name].tolist() for name in ("open", "high", "low", "close", "volume")}]},
+    }], "error": None}}
+
+class StubProvider:
+    """A chart API server on a local port, running in a background thread"""
+
+    def __init__(self, latency: float = 0, fail_every: int = 0, port: int = 0):
+        """
+        Args:
+            latency (float, optional): Seconds each response is delayed. Defaults to 0.
+            fail_every (int, optional): Answer every n-th request with 503; 0 never fails. Defaults to 0.
+            port (int, optional): Port to listen on; 0 picks a free one. Defaults to 0.
+        """
+        self.latency = latency
+        self.fail_every = fail_every
+        self.request_times: list[float] = []
+        self._lock = threading.Lock()
+        provider = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                provider._handle(self)
+
+            def log_message(self, format, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", port), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}"
+
+    def start(self) -> "StubProvider":
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+
+    def max_rate(self, window: float = 1) -> int:
+        """The most requests received within any `window` seconds"""
+        with self._lock:
+            times = sorted(self.request_times)
+        most, first = 0, 0
+        for last, received in enumerate(times):
+            while received - times[first] > window:
+                first += 1
+            most = max(most, last - first + 1)
+        return most
+
+    def _handle(self, handler: BaseHTTPRequestHandler):
+        with self._lock:
+            self.request_times.append(time.monotonic())
+            count = len(self.request_times)
+        time.sleep(self.latency)
+        url = urlparse(handler.path)
+        prefix = "/v8/finance/chart/"
+        if not url.path.startswith(prefix):
+            handler.send_error(404)
+            return
+        if self.fail_every and count % self.fail_every == 0:
+            handler.send_error(503, "Stub outage")
+            return
+        query = {name: values[0] for name, values in parse_qs(url.query).items()}
+        frame = stub_bars(unquote(url.path[len(prefix):]), query.get("interval", "1d"))
+        if "period1" in query:
+            local = frame["timestamp"].dt.tz_localize(TIMEZONE)
+            frame = frame[local >= pd.Timestamp(int(query["period1"]), unit="s", tz="UTC")]
+        else:
+            offset = period_offset(query.get("range"))
+            if offset is not None:
+                frame = frame[frame["timestamp"] >= frame["timestamp"].iloc[-1] - offset]
+        body = json.dumps(chart_payload(frame)).encode()
+        handler.send_response(200)
+        handler.send_header("Content-Type", "application/json")
+        handler.send_header("Content-Length", str(len(body)))
+        handler.end_headers()
+        handler.wfile.write(body)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--port", type=int, default=8900, help="port to listen on")
+    parser.add_argument("--latency", type=float, default=0.2, help="seconds each response is delayed")
+    parser.add_argument("--fail-every", type=int, default=0, help="answer every n-th request with 503")
+    args = parser.parse_args()
+
+    stub = StubProvider(args.latency, args.fail_every, args.port)
+    print(f"Serving the chart API stub on {stub.url}")
+    stub.server.serve_forever()
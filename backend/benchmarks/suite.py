@@ -0,0 +1,217 @@
+"""
+Benchmark suite for the loaders, the simulator, every strategy and /api/stock-data.
+
+Each benchmark runs on deterministic synthetic histories of several sizes. For each one the suite
+records the best wall time, the throughput in bars per second and the tracemalloc peak of one
+extra run. Results can be saved as a JSON baseline and compared with a later run. The comparison
+flags every benchmark that got slower or used more memory than the tolerance allows, and the
+process then exits with status 1.
+
+The price CSVs are written once to benchmarks/data and reused by later runs. /api/stock-data is
+served by uvicorn on a local port, with get_api_data replaced by a stub that returns a synthetic
+one-minute history.
+
+Run from the backend directory:
+    python -m benchmarks.suite --save baseline.json
+    python -m benchmarks.suite --compare baseline.json
+    python -m benchmarks.suite --sizes 1000,10000 --only signals
+"""
+import argparse
+import contextlib
+import functools
+import io
+import json
+import os
+import platform
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+from typing import Callable
+
+import numpy as np
+import requests
+
+import algorithms
+import api_server
+from benchmarks.concurrent_requests import serve
+from benchmarks.synthetic import synthetic_ohlcv, write_price_csv
+from csv_data import BATCH_ROWS, get_csv_columns, get_csv_data, iter_csv_batches
+from simulator import algorithm_wrapper, fused_signals, simulate, simulate_stream, strategy_signals
+
+DEFAULT_SIZES = [1_000, 5_000, 10_000, 100_000, 1_000_000]
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data")
+
+# Loads whole synthetic files; 1M business days run far past the loaders' default period
+FULL_PERIOD = ("01/01/1900", "12/31/9999")
+
+STRATEGIES = [
+    algorithms.buy_after_3_consecutive_down_days,
+    algorithms.buy_everyday,
+    algorithms.buy_and_hold,
+    algorithms.buy_the_dip,
+    algorithms.moving_average_crossover,
+    algorithms.reversal_after_a_decline,
+]
+
+_server = {}
+
+def price_csv(bars: int) -> str:
+    """Path of the synthetic price CSV with `bars` rows, written on first use"""
+    path = os.path.join(DATA_DIR, f"prices_{bars}.csv")
+    if not os.path.exists(path):
+        os.makedirs(DATA_DIR, exist_ok=True)
+        write_price_csv(path + ".tmp", bars)
+        os.replace(path + ".tmp", path)
+    return path
+
+def prices(bars: int) -> np.ndarray:
+    """Chronological closing prices of the synthetic CSV with `bars` rows"""
+    _, columns = get_csv_columns(price_csv(bars), FULL_PERIOD)
+    return np.array(columns[::-1, 0])
+
+def _load_csv_columns(bars: int) -> Callable[[], object]:
+    path = price_csv(bars)
+    get_csv_columns(path, FULL_PERIOD)  # the first load builds the binary cache
+    return functools.partial(get_csv_columns, path, FULL_PERIOD)
+
+def _price_batches(bars: int) -> list[tuple[np.ndarray, np.ndarray]]:
+    values = prices(bars)[:, None]
+    return [(np.arange(start, min(start + BATCH_ROWS, bars)), values[start:start + BATCH_ROWS]) for start in range(0, bars, BATCH_ROWS)]
+
+def _stock_data(bars: int, range_type: str) -> Callable[[], object]:
+    if not _server:
+        frames = _server["frames"] = {}
+        api_server.get_api_data = lambda function_index, symbol, interval_index=4, path=None: frames[symbol]
+        _server["server"], _server["base"] = serve()
+    symbol = f"BENCH{bars}"
+    _server["frames"].setdefault(symbol, synthetic_ohlcv(bars, intraday=True))
+    url = f"{_server['base']}/api/stock-data?range={range_type}&symbol={symbol}"
+
+    def get():
+        # keep the endpoint's per-request log line out of the results table
+        with contextlib.redirect_stdout(io.StringIO()):
+            requests.get(url, timeout=600).raise_for_status()
+
+    get()  # the fetched frame is cached from here on
+    return get
+
+def benchmarks() -> dict[str, tuple[int, Callable[[int], Callable[[], object]]]]:
+    """
+    Every benchmark by name, with the largest size it runs at and a setup function.
+
+    The setup function takes a size in bars, prepares inputs outside the timed region and returns
+    the call to time.
+    """
+    cases = {
+        "get_csv_data": (1_000_000, lambda bars: functools.partial(get_csv_data, price_csv(bars), FULL_PERIOD)),
+        "get_csv_columns": (1_000_000, _load_csv_columns),
+        "iter_csv_batches": (1_000_000, lambda bars: lambda: sum(len(times) for times, _ in iter_csv_batches(price_csv(bars), FULL_PERIOD))),
+    }
+    for algorithm in STRATEGIES:
+        name = algorithm.__name__
+        cases[f"signals[{name}]"] = (1_000_000, lambda bars, a=algorithm: functools.partial(strategy_signals, prices(bars), a))
+        cases[f"algorithm_wrapper[{name}]"] = (100_000, lambda bars, a=algorithm: functools.partial(algorithm_wrapper, prices(bars).tolist(), 100000, 1000, a))
+        # simulate loads the default period (2000-01-01 - 2025-09-17), about 6500 business days of the files
+        cases[f"simulate_stream[{name}]"] = (1_000_000, lambda bars, a=algorithm: functools.partial(simulate_stream, _price_batches(bars), a))
+        cases[f"simulate[{name}]"] = (5_000, lambda bars, a=algorithm: functools.partial(simulate, a, stock=price_csv(bars), cache=False))
+    cases["signals[all strategies, fused]"] = (1_000_000, lambda bars: functools.partial(fused_signals, prices(bars), STRATEGIES))
+    cases["api stock-data range=1d"] = (100_000, lambda bars: _stock_data(bars, "1d"))
+    cases["api stock-data range=all"] = (100_000, lambda bars: _stock_data(bars, "all"))
+    return cases
+
+def measure(call: Callable[[], object], repeat: int, memory: bool = True) -> tuple[float, int | None]:
+    """
+    Best wall time of up to `repeat` calls (fewer once a second has been spent) and the tracemalloc
+    peak of one more call.
+    """
+    times = []
+    spent = 0.0
+    while len(times) < repeat and (not times or spent < 1.0):
+        started = time.perf_counter()
+        call()
+        times.append(time.perf_counter() - started)
+        spent += times[-1]
+    peak = None
+    if memory:
+        tracemalloc.start()
+        try:
+            call()
+            peak = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+    return min(times), peak
+
+def run(sizes: list[int], only: str | None = None, repeat: int = 5, memory: bool = True) -> dict:
+    """Runs the benchmarks whose name contains `only` at every size they support, printing each result"""
+    results = {}
+    for name, (max_bars, setup) in benchmarks().items():
+        if only and only not in name:
+            continue
+        for bars in sizes:
+            if bars > max_bars:
+                continue
+            seconds, peak = measure(setup(bars), repeat, memory)
+            results[f"{name}@{bars}"] = {"seconds": seconds, "bars_per_second": bars / seconds, "peak_bytes": peak}
+            peak_text = "" if peak is None else f"{peak / 2**20:>10.1f}MB"
+            print(f"{name:<50}{bars:>9}{seconds * 1000:>12.2f}ms{bars / seconds:>17,.0f} bars/s{peak_text}", flush=True)
+    return results
+
+# Changes smaller than these are timer and allocator noise, whatever the ratio
+NOISE_SECONDS = 0.001
+NOISE_BYTES = 64 * 1024
+
+def compare(results: dict, baseline: dict, tolerance: float) -> int:
+    """Prints how each benchmark changed against a baseline and returns the number of regressions"""
+    regressions = 0
+    for key, result in results.items():
+        before = baseline.get(key)
+        if before is None:
+            continue
+        time_ratio = result["seconds"] / before["seconds"]
+        flags = []
+        if time_ratio > 1 + tolerance and result["seconds"] - before["seconds"] > NOISE_SECONDS:
+            flags.append("SLOWER")
+        memory_text = ""
+        if result["peak_bytes"] and before.get("peak_bytes"):
+            memory_ratio = result["peak_bytes"] / before["peak_bytes"]
+            memory_text = f"  memory x{memory_ratio:.2f}"
+            if memory_ratio > 1 + tolerance and result["peak_bytes"] - before["peak_bytes"] > NOISE_BYTES:
+                flags.append("MORE MEMORY")
+        regressions += bool(flags)
+        print(f"{key:<60} time x{time_ratio:.2f}{memory_text}  {' '.join(flags)}")
+    return regressions
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default=",".join(map(str, DEFAULT_SIZES)), help="comma separated history lengths in bars")
+    parser.add_argument("--only", help="run only benchmarks whose name contains this text")
+    parser.add_argument("--repeat", type=int, default=5, help="calls per benchmark; the best time is kept")
+    parser.add_argument("--no-memory", action="store_true", help="skip the tracemalloc run")
+    parser.add_argument("--save", metavar="PATH", help="write the results as a JSON baseline")
+    parser.add_argument("--compare", metavar="PATH", help="compare with a saved baseline")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed relative slowdown or memory growth")
+    args = parser.parse_args()
+
+    sizes = [int(size) for size in args.sizes.split(",")]
+    results = run(sizes, args.only, args.repeat, not args.no_memory)
+
+    if _server:
+        _server["server"].should_exit = True
+    regressions = 0
+    if args.compare:
+        with open(args.compare) as file:
+            baseline = json.load(file)["results"]
+        regressions = compare(results, baseline, args.tolerance)
+        print(f"{regressions} regression(s) beyond {args.tolerance:.0%}")
+    if args.save:
+        with open(args.save, "w") as file:
+            json.dump({
+                "created": datetime.now().isoformat(timespec="seconds"),
+                "python": platform.python_version(),
+                "numpy": np.__version__,
+                "machine": platform.platform(),
+                "results": results,
+            }, file, indent=2)
+    sys.exit(1 if regressions else 0)
@@ -0,0 +1,68 @@
+import numpy as np
+import pandas as pd
+
+def synthetic_ohlcv(bars: int, intraday: bool = False, seed: int = 0, start: str = "2000-01-03") -> pd.DataFrame:
+    """
+    Generate a deterministic random-walk price frame shaped like the one get_api_data returns.
+
+    Args:
+        bars (int): Number of rows.
+        intraday (bool, optional): One-minute bars during 09:30-16:00 instead of business days. Defaults to False.
+        seed (int, optional): Random seed; the same arguments always give the same frame. Defaults to 0.
+        start (str, optional): First trading day. Defaults to "2000-01-03".
+
+    Returns:
+        pd.DataFrame: timestamp, open, high, low, close and volume columns, oldest row first.
+    """
+    rng = np.random.default_rng(seed)
+    if intraday:
+        days = pd.bdate_range(start, periods=bars // 390 + 1)
+        minutes = pd.to_timedelta(np.arange(390), unit="min") + pd.Timedelta(hours=9, minutes=30)
+        timestamps = (days.values[:, None] + minutes.values[None, :]).ravel()[:bars]
+    else:
+        timestamps = pd.bdate_range(start, periods=bars).values
+    close = 100 * np.exp(np.cumsum(rng.normal(0.0002, 0.01, bars)))
+    open_ = close * (1 + rng.normal(0, 0.002, bars))
+    frame = pd.DataFrame({
+        "timestamp": pd.to_datetime(timestamps),
+        "open": open_,
+        "high": np.maximum(open_, close) * (1 + rng.uniform(0, 0.004, bars)),
+        "low": np.minimum(open_, close) * (1 - rng.uniform(0, 0.004, bars)),
+        "close": close,
+        "volume": rng.integers(10**5, 10**7, bars),
+    })
+    frame.attrs["intraday"] = intraday
+    return frame
+
+def write_price_csv(path: str, bars: int, seed: int = 0, start: str = "2000-01-03"):
+    """
+    Write a deterministic random-walk daily history in the Investing.com layout get_csv_data reads.
+
+    Rows are newest first with Date (MM/DD/YYYY), Price, Open, High, Low, Vol. and Change % columns.
+    Business days are counted with numpy day precision, so 1M bars (far past the year 2262 that
+    nanosecond timestamps reach) are fine.
+
+    Args:
+        path (str): File to write.
+        bars (int): Number of rows.
+        seed (int, optional): Random seed; the same arguments always give the same file. Defaults to 0.
+        start (str, optional): First trading day. Defaults to "2000-01-03".
+    """
+    rng = np.random.default_rng(seed)
+    days = np.datetime_as_string(np.busday_offset(np.datetime64(start, "D"), np.arange(bars), roll="forward"))
+    # YYYY-MM-DD -> MM/DD/YYYY, one character per column
+    chars = days.astype("U10").view("U1").reshape(-1, 10)[:, [5, 6, 4, 8, 9, 7, 0, 1, 2, 3]].copy()
+    chars[:, [2, 5]] = "/"
+    dates = chars.view("U10").ravel()
+    # a random walk over the last ten years of returns, so the level stays plausible at any length
+    returns = np.cumsum(rng.normal(0.0003, 0.012, bars + 2520))
+    close = 1400 * np.exp(returns[2520:] - returns[:-2520])
+    open_ = close * (1 + rng.normal(0, 0.003, bars))
+    high = np.maximum(open_, close) * (1 + rng.uniform(0, 0.004, bars))
+    low = np.minimum(open_, close) * (1 - rng.uniform(0, 0.004, bars))
+    volume = rng.integers(10**8, 5 * 10**8, bars)
+    change = np.r_[0, close[1:] / close[:-1] - 1] * 100
+    with open(path, "w", newline="") as file:
+        file.write("Date,Price,Open,High,Low,Vol.,Change %\n")
+        for row in zip(dates[::-1].tolist(), close[::-1].tolist(), open_[::-1].tolist(), high[::-1].tolist(), low[::-1].tolist(), volume[::-1].tolist(), change[::-1].tolist()):
+            file.write('%s,%.2f,%.2f,%.2f,%.2f,%d,%.2f%%\n' % row)
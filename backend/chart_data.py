@@ -0,0 +1,223 @@
+import json
+from datetime import datetime
+from typing import Dict, Iterator, Optional
+
+import numpy as np
+import pandas as pd
+
+# Formats a textual timestamp column may use; the first one that parses the first row is used for the whole column
+DATE_FORMATS = ["%Y-%m-%d %H:%M:%S", "%Y-%m-%d", "%m/%d/%Y", "%Y-%d-%m"]
+
+# Trading days shown per daily range; intraday (1d) shows the most recent trading day
+DAYS_NEEDED = {
+    "1w": 7,
+    "1m": 22,
+    "1y": 252,
+}
+
+NS_PER_DAY = 86_400 * 10**9
+
+# Rows formatted per chunk when streaming, bounding the memory one response holds at a time
+CHUNK_ROWS = 2000
+
+ROW_TEMPLATE = '{"date":"%s","price":%r,"open":%r,"high":%r,"low":%r,"volume":"%s","change":"%+.2f%%","file_name":"api"}'
+
+def detect_date_format(sample: str) -> Optional[str]:
+    """Return the first of DATE_FORMATS that parses `sample`, or None"""
+    for fmt in DATE_FORMATS:
+        try:
+            datetime.strptime(sample.strip(), fmt)
+            return fmt
+        except ValueError:
+            continue
+    return None
+
+def _timestamps(frame: pd.DataFrame) -> tuple[np.ndarray, bool]:
+    """Timestamps as int64 nanoseconds, and whether they carry a time of day"""
+    column = frame["timestamp"]
+    intraday = bool(frame.attrs.get("intraday", False))
+    if not pd.api.types.is_datetime64_any_dtype(column):
+        sample = str(column.iloc[0])
+        fmt = detect_date_format(sample)
+        if fmt is None:
+            raise ValueError(f"Could not parse date: {sample}")
+        intraday = intraday or "%H" in fmt
+        column = pd.to_datetime(column.str.strip(), format=fmt)
+    return column.to_numpy(dtype="datetime64[ns]").view("int64"), intraday
+
+def chart_columns(frame: Optional[pd.DataFrame], range: str = "1d") -> Dict[str, np.ndarray]:
+    """
+    Select the bars the chart shows for a range as numeric columns, oldest first.
+
+    Rows with missing or non-positive prices are dropped. For 1w/1m/1y the last N trading days
+    are kept, for 1d the most recent trading day, for anything else every row.
+
+    Returns a dict with timestamp (int64 ns), open, high, low, close and volume arrays plus an
+    "intraday" flag; the arrays are empty when nothing is left.
+    """
+    if frame is None or frame.empty:
+        return {"timestamp": np.empty(0, dtype="int64"), "open": np.empty(0), "high": np.empty(0),
+                "low": np.empty(0), "close": np.empty(0), "volume": np.empty(0, dtype="int64"), "intraday": False}
+
+    timestamps, intraday = _timestamps(frame)
+    prices = frame[["open", "high", "low", "close"]].to_numpy(dtype=float)
+    volume = frame["volume"].to_numpy()
+
+    valid = np.isfinite(prices).all(axis=1) & (prices > 0).all(axis=1)
+    if not valid.all():
+        timestamps, prices, volume = timestamps[valid], prices[valid], volume[valid]
+
+    # upstream data is already chronological; only sort when it is not
+    if len(timestamps) > 1 and (timestamps[1:] < timestamps[:-1]).any():
+        order = np.argsort(timestamps, kind="stable")
+        timestamps, prices, volume = timestamps[order], prices[order], volume[order]
+
+    days_needed = 1 if range == "1d" else DAYS_NEEDED.get(range)
+    if days_needed and len(timestamps):
+        days = timestamps // NS_PER_DAY
+        # first row of each trading day, then start at the N-th day from the end
+        day_starts = np.flatnonzero(days[1:] != days[:-1]) + 1
+        start = day_starts[-days_needed] if len(day_starts) >= days_needed else 0
+        timestamps, prices, volume = timestamps[start:], prices[start:], volume[start:]
+
+    return {
+        "timestamp": timestamps,
+        "open": prices[:, 0],
+        "high": prices[:, 1],
+        "low": prices[:, 2],
+        "close": prices[:, 3],
+        "volume": volume,
+        "intraday": intraday,
+    }
+
+# Chart types `downsample_columns` knows: line charts keep the most significant bars, candlesticks merge bars
+CHART_TYPES = ("candlestick", "line")
+
+def lttb_indices(x: np.ndarray, y: np.ndarray, threshold: int) -> np.ndarray:
+    """
+    Pick `threshold` points of a line with Largest-Triangle-Three-Buckets.
+
+    The first and last points are kept; the points between them are split into threshold - 2 buckets of about equal
+    size, and from each bucket the point forming the largest triangle with the previously kept point and the average
+    of the next bucket is kept. Peaks and troughs survive, unlike with every-n-th-point sampling.
+
+    Returns the indices of the kept points in increasing order, every index when there are no more than `threshold`.
+    """
+    n = len(x)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    # bucket k holds points edges[k] .. edges[k + 1] - 1; the last "bucket" is the final point alone
+    edges = np.append((np.arange(threshold - 1) * (n - 2) // (threshold - 2)) + 1, n)
+    x_means = np.add.reduceat(x, edges[:-1]) / np.diff(edges)
+    y_means = np.add.reduceat(y, edges[:-1]) / np.diff(edges)
+
+    kept = np.empty(threshold, dtype=np.int64)
+    kept[0], kept[-1] = 0, n - 1
+    previous = 0
+    for bucket in range(threshold - 2):
+        start, end = edges[bucket], edges[bucket + 1]
+        next_x, next_y = x_means[bucket + 1], y_means[bucket + 1]
+        # twice the triangle area, which ranks the candidates the same
+        areas = np.abs((x[previous] - next_x) * (y[start:end] - y[previous]) - (x[previous] - x[start:end]) * (next_y - y[previous]))
+        previous = start + int(np.argmax(areas))
+        kept[bucket + 1] = previous
+    return kept
+
+def ohlc_buckets(columns: Dict[str, np.ndarray], max_points: int) -> Dict[str, np.ndarray]:
+    """
+    Merge runs of consecutive bars into at most `max_points` bars of about equal size.
+
+    Each merged bar takes the time and open of its first bar, the highest high, the lowest low, the close of its
+    last bar and the summed volume.
+    """
+    n = len(columns["timestamp"])
+    if n <= max_points:
+        return columns
+    starts = np.arange(max_points) * n // max_points
+    ends = np.append(starts[1:], n) - 1
+    return {
+        "timestamp": columns["timestamp"][starts],
+        "open": columns["open"][starts],
+        "high": np.maximum.reduceat(columns["high"], starts),
+        "low": np.minimum.reduceat(columns["low"], starts),
+        "close": columns["close"][ends],
+        "volume": np.add.reduceat(columns["volume"], starts),
+        "intraday": columns["intraday"],
+    }
+
+def downsample_columns(columns: Dict[str, np.ndarray], max_points: int, chart: str = "candlestick") -> Dict[str, np.ndarray]:
+    """
+    Reduce chart columns to at most `max_points` bars for the given chart type.
+
+    Candlesticks are re-bucketed with `ohlc_buckets`; line charts keep the bars `lttb_indices` picks from the close
+    prices, unchanged. Columns with no more than `max_points` bars are returned as they are.
+    """
+    if chart == "line":
+        kept = lttb_indices(columns["timestamp"], columns["close"], max_points)
+        if len(kept) == len(columns["timestamp"]):
+            return columns
+        return {name: values if name == "intraday" else values[kept] for name, values in columns.items()}
+    return ohlc_buckets(columns, max_points)
+
+def format_dates(timestamps: np.ndarray, include_time: bool) -> list[str]:
+    """Format int64 ns timestamps as "%Y-%m-%d %H:%M:%S" or "%Y-%m-%d" strings"""
+    values = timestamps.view("datetime64[ns]")
+    if include_time:
+        return np.char.replace(np.datetime_as_string(values, unit="s"), "T", " ").tolist()
+    return np.datetime_as_string(values, unit="D").tolist()
+
+def row_chunks(columns: Dict[str, np.ndarray], include_time: bool, chunk_rows: int = CHUNK_ROWS, separator: str = ",") -> Iterator[str]:
+    """Yield the JSON row objects the frontend expects, `chunk_rows` at a time joined by `separator`"""
+    include_time = include_time and columns["intraday"]
+    for start in range(0, len(columns["timestamp"]), chunk_rows):
+        chunk = slice(start, start + chunk_rows)
+        close, open_ = columns["close"][chunk], columns["open"][chunk]
+        change = (close - open_) / open_ * 100
+        rows = zip(
+            format_dates(columns["timestamp"][chunk], include_time),
+            close.tolist(), open_.tolist(), columns["high"][chunk].tolist(), columns["low"][chunk].tolist(),
+            columns["volume"][chunk].tolist(), change.tolist(),
+        )
+        yield separator.join([ROW_TEMPLATE % row for row in rows])
+
+def rows_json(columns: Dict[str, np.ndarray], include_time: bool) -> str:
+    """Serialize chart columns as the JSON array of row objects the frontend expects"""
+    return "[" + ",".join(row_chunks(columns, include_time, chunk_rows=max(len(columns["timestamp"]), 1))) + "]"
+
+def _response_tail(range: str, symbol: str) -> str:
+    return ',"range":%s,"symbol":%s}' % (json.dumps(range, ensure_ascii=False), json.dumps(symbol, ensure_ascii=False))
+
+def stock_response_json(columns: Dict[str, np.ndarray], range: str, symbol: str) -> bytes:
+    """Serialize the whole /api/stock-data response body"""
+    return ('{"success":true,"data":%s' % rows_json(columns, range == "1d") + _response_tail(range, symbol)).encode("utf-8")
+
+def stream_stock_response(columns: Dict[str, np.ndarray], range: str, symbol: str, chunk_rows: int = CHUNK_ROWS) -> Iterator[bytes]:
+    """Yield the /api/stock-data response body chunk by chunk; joined, the chunks equal stock_response_json"""
+    yield b'{"success":true,"data":['
+    for index, chunk in enumerate(row_chunks(columns, range == "1d", chunk_rows)):
+        yield (chunk if index == 0 else "," + chunk).encode("utf-8")
+    yield ("]" + _response_tail(range, symbol)).encode("utf-8")
+
+def stream_ndjson(columns: Dict[str, np.ndarray], range: str, chunk_rows: int = CHUNK_ROWS) -> Iterator[bytes]:
+    """Yield the rows of a /api/stock-data response as newline-delimited JSON, one row object per line"""
+    for chunk in row_chunks(columns, range == "1d", chunk_rows, separator="\n"):
+        yield (chunk + "\n").encode("utf-8")
+
+def columnar_response_json(columns: Dict[str, np.ndarray], range: str, symbol: str) -> bytes:
+    """
+    Serialize chart columns as parallel arrays instead of one object per row.
+
+    "timestamp" holds seconds since 1970-01-01 of the exchange-local time, the other arrays the
+    prices and volume of the same bars.
+    """
+    body = '{"success":true,"columns":{"timestamp":%s,"open":%s,"high":%s,"low":%s,"close":%s,"volume":%s}' % (
+        json.dumps((columns["timestamp"] // 10**9).tolist()),
+        json.dumps(columns["open"].tolist()),
+        json.dumps(columns["high"].tolist()),
+        json.dumps(columns["low"].tolist()),
+        json.dumps(columns["close"].tolist()),
+        json.dumps(columns["volume"].tolist()),
+    )
+    return (body + _response_tail(range, symbol)).encode("utf-8")
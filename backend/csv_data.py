@@ -1,5 +1,11 @@
 import csv
-from datetime import datetime
+import hashlib
+import os
+import threading
+from datetime import date, datetime
+from typing import Iterator
+
+import numpy as np
 
 def get_csv_data(path: str, period=('01/01/2000', '09/17/2025')):
     start_date = datetime.strptime(period[0], "%m/%d/%Y")
@@ -23,4 +29,212 @@ def get_csv_data(path: str, period=('01/01/2000', '09/17/2025')):
 
     #different date formats.TODO: optimize
 
-    return result
\ No newline at end of file
+    return result
+
+# Columnar copies of CSV files, one pair of .npy files per (path, mtime)
+CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "price_cache")
+EPOCH = datetime(1970, 1, 1)
+EPOCH_ORDINAL = EPOCH.toordinal()
+
+def _parse_date(text: str) -> datetime | None:
+    for fmt in ("%m/%d/%Y", "%Y-%d-%m"):
+        try:
+            return datetime.strptime(text, fmt)
+        except ValueError:
+            continue
+    return None
+
+def _parse_float(text: str) -> float:
+    try:
+        return float(text)
+    except ValueError:
+        return np.nan
+
+def _cache_paths(path: str) -> tuple[str, str, str]:
+    stat = os.stat(path)
+    prefix = hashlib.sha1(os.path.abspath(path).encode()).hexdigest()[:16]
+    stem = os.path.join(CACHE_DIR, f"{prefix}-{stat.st_mtime_ns}-{stat.st_size}")
+    return prefix, stem + ".dates.npy", stem + ".values.npy"
+
+def _build_cache(path: str, dates_path: str, values_path: str, prefix: str):
+    dates, rows = [], []
+    with open(path, newline='') as file:
+        for row in csv.reader(file):
+            row_date = _parse_date(row[0]) if row else None
+            if row_date is None:
+                continue
+            dates.append((row_date - EPOCH).days)
+            rows.append([_parse_float(cell) for cell in row[1:]])
+    width = max((len(row) for row in rows), default=0)
+    values = np.full((len(rows), width), np.nan)
+    for i, row in enumerate(rows):
+        values[i, :len(row)] = row
+
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    # only the files of other versions of this CSV are stale; files of this version may be another process's
+    # finished cache or its write in progress
+    current = os.path.basename(dates_path)[:-len(".dates.npy")]
+    for name in os.listdir(CACHE_DIR):
+        if name.startswith(prefix + "-") and not name.startswith(current + "."):
+            try:
+                os.remove(os.path.join(CACHE_DIR, name))
+            except FileNotFoundError:
+                # removed by a concurrent rebuild
+                pass
+    for target, array in ((dates_path, np.array(dates, dtype=np.int32)), (values_path, values)):
+        temporary = f"{target}.{os.getpid()}-{threading.get_ident()}.tmp"
+        with open(temporary, "wb") as file:
+            np.save(file, array)
+        os.replace(temporary, target)
+
+def get_csv_columns(path: str, period=('01/01/2000', '09/17/2025')) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Loads a price CSV as memory-mapped columns, restricted to `period`.
+
+    The first load converts the file into a binary cache in `CACHE_DIR` keyed by the file's path, mtime and size;
+    later loads only memory-map that cache and pick the period by binary search on the date column.
+
+    Args:
+        path (str): Path to the CSV file, with a date in the first column ("%m/%d/%Y" or "%Y-%d-%m").
+        period (tuple[str, str], optional): First and last date to keep, as "%m/%d/%Y". Defaults to 2000-01-01 - 2025-09-17.
+
+    Returns:
+        tuple[np.ndarray, np.ndarray]: Dates as days since 1970-01-01, and a (rows, columns) float array with the
+        remaining CSV columns (NaN where a cell is not a number), both in file order.
+    """
+    for attempt in range(2):
+        prefix, dates_path, values_path = _cache_paths(path)
+        if not (os.path.exists(dates_path) and os.path.exists(values_path)):
+            _build_cache(path, dates_path, values_path, prefix)
+        try:
+            dates = np.load(dates_path, mmap_mode="r")
+            values = np.load(values_path, mmap_mode="r")
+            break
+        except FileNotFoundError:
+            # the CSV changed and a concurrent load removed this version's cache; look again once
+            if attempt:
+                raise
+
+    start = (datetime.strptime(period[0], "%m/%d/%Y") - EPOCH).days
+    end = (datetime.strptime(period[1], "%m/%d/%Y") - EPOCH).days
+    steps = np.diff(dates)
+    if (steps >= 0).all():
+        selected = slice(np.searchsorted(dates, start, "left"), np.searchsorted(dates, end, "right"))
+    elif (steps <= 0).all():
+        # newest first, as exported by most data providers
+        selected = slice(len(dates) - np.searchsorted(dates[::-1], end, "right"), len(dates) - np.searchsorted(dates[::-1], start, "left"))
+    else:
+        selected = np.flatnonzero((dates >= start) & (dates <= end))
+    return dates[selected], values[selected]
+
+# Rows per batch of `iter_csv_batches`; about 3.5MB with the six value columns of a price file
+BATCH_ROWS = 65536
+
+# Field positions (separator, year, month, day) of the date formats: "%m/%d/%Y" and "%Y-%d-%m" as in get_csv_data,
+# and "%Y-%m-%d" or "%m/%d/%Y" before a time of day, e.g. "2024-03-01 09:30:00" in minute-bar exports
+DATE_LAYOUTS = (("/", 2, 0, 1), ("-", 0, 2, 1))
+DATETIME_LAYOUTS = (("-", 0, 1, 2), ("/", 2, 0, 1))
+
+def _day_number(text: str, layouts: tuple[tuple[str, int, int, int], ...]) -> int | None:
+    # splitting the fields is several times cheaper than strptime
+    for separator, year, month, day in layouts:
+        fields = text.split(separator)
+        if len(fields) != 3:
+            continue
+        try:
+            return date(int(fields[year]), int(fields[month]), int(fields[day])).toordinal() - EPOCH_ORDINAL
+        except ValueError:
+            continue
+    return None
+
+def _timestamp_parser():
+    """Parser of date or date-time cells to seconds since 1970-01-01 that remembers the day of the previous row"""
+    last = [None, None]
+
+    def parse(text: str) -> int | None:
+        day, separator, clock = text.replace("T", " ").partition(" ")
+        key = (day, bool(separator))
+        if key == last[0]:
+            number = last[1]
+        else:
+            number = _day_number(day, DATETIME_LAYOUTS if separator else DATE_LAYOUTS)
+            last[:] = key, number
+        if number is None:
+            return None
+        seconds = number * 86400
+        if clock:
+            try:
+                parts = [int(part) for part in clock.split(":")]
+            except ValueError:
+                return None
+            seconds += parts[0] * 3600 + (parts[1] if len(parts) > 1 else 0) * 60 + (parts[2] if len(parts) > 2 else 0)
+        return seconds
+    return parse
+
+def _value_column(cells) -> np.ndarray:
+    try:
+        return np.array(cells, dtype=float)
+    except ValueError:
+        return np.array([_parse_float(cell) for cell in cells])
+
+def _value_batch(cells: list[list[str]], columns: list[int] | None) -> np.ndarray:
+    width = max((len(row) for row in cells), default=0)
+    if any(len(row) != width for row in cells):
+        cells = [row + [""] * (width - len(row)) for row in cells]
+    # numeric columns convert in one call; only columns with other cells (e.g. "1.2%") go cell by cell
+    by_column = list(zip(*cells)) if width else []
+    if columns is not None:
+        by_column = [by_column[column] if column < width else [""] * len(cells) for column in columns]
+    values = np.empty((len(cells), len(by_column)))
+    for index, column in enumerate(by_column):
+        values[:, index] = _value_column(column)
+    return values
+
+def iter_csv_batches(path: str, period=('01/01/2000', '09/17/2025'), columns: list[int] | None = None, batch_rows: int = BATCH_ROWS, presorted: bool = True) -> Iterator[tuple[np.ndarray, np.ndarray]]:
+    """
+    Reads a price CSV as a stream of fixed-size column batches, restricted to `period`.
+
+    Only one batch is held in memory at a time, so files far larger than RAM (minute or tick histories) can be
+    processed. In a file sorted by time, in either direction, reading stops at the first row past the far end of
+    the period instead of scanning the rest of the file.
+
+    Args:
+        path (str): Path to the CSV file, with a date in the first column ("%m/%d/%Y" or "%Y-%d-%m"), optionally
+            followed by a time of day ("2024-03-01 09:30:00"; the date is then "%Y-%m-%d" or "%m/%d/%Y").
+        period (tuple[str, str], optional): First and last date to keep, as "%m/%d/%Y". Defaults to 2000-01-01 - 2025-09-17.
+        columns (list[int] | None, optional): Which value columns to keep, counted from the column after the date.
+            Defaults to all of them.
+        batch_rows (int, optional): Rows per batch; the last batch may be shorter. Defaults to `BATCH_ROWS`.
+        presorted (bool, optional): Whether the rows are sorted by time, which allows the early stop. The direction
+            is taken from the first two rows with different times. Defaults to True.
+
+    Returns:
+        Iterator[tuple[np.ndarray, np.ndarray]]: Batches of times as int64 seconds since 1970-01-01, and a
+        (rows, columns) float array of the value columns (NaN where a cell is not a number), in file order.
+    """
+    start = (datetime.strptime(period[0], "%m/%d/%Y") - EPOCH).days * 86400
+    # the last day is included up to its last second
+    end = ((datetime.strptime(period[1], "%m/%d/%Y") - EPOCH).days + 1) * 86400
+    parse = _timestamp_parser()
+    direction = 0
+    previous = None
+    times, cells = [], []
+
+    with open(path, newline='') as file:
+        for row in csv.reader(file):
+            time = parse(row[0]) if row else None
+            if time is None:
+                continue
+            if presorted and not direction and previous is not None and time != previous:
+                direction = 1 if time > previous else -1
+            previous = time
+            if start <= time < end:
+                times.append(time)
+                cells.append(row[1:])
+                if len(times) == batch_rows:
+                    yield np.array(times, dtype=np.int64), _value_batch(cells, columns)
+                    times, cells = [], []
+            elif (direction > 0 and time >= end) or (direction < 0 and time < start):
+                break
+    if times:
+        yield np.array(times, dtype=np.int64), _value_batch(cells, columns)
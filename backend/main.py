@@ -9,15 +9,19 @@ path:str = 'full_s&p500.csv' #toogle this
 
 def get_data(src:str = "api"):
     if src == "api":
-        get_api_data(1, SYMBOL)
         path = "stock_data.csv"
+        get_api_data(1, SYMBOL, path=path)
     return get_csv_data(path)
 
 
-# data = get_data("csv")
-data = get_data("api")
+def main():
+    # data = get_data("csv")
+    data = get_data("api")
 
-if data is not None:
-    print(data)
-else:
-    print("Failed to retrieve data.")
+    if data is not None:
+        print(data)
+    else:
+        print("Failed to retrieve data.")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import Any, Callable, Hashable
+
+class MarketDataCache:
+    """
+    In-process cache for upstream market data with per-entry TTL, LRU eviction and single-flight fetching.
+
+    Concurrent `get` calls for a key that is missing or expired share one call of `fetch`: the first caller runs it
+    and the others wait for its result. Errors and `None` results are handed to every waiting caller but not stored.
+    """
+
+    def __init__(self, max_entries: int = 256, default_ttl: float = 60, clock: Callable[[], float] = time.monotonic):
+        """
+        Args:
+            max_entries (int, optional): Number of entries kept before the least recently used one is evicted. Defaults to 256.
+            default_ttl (float, optional): Seconds an entry stays fresh when `get` is not given a ttl. Defaults to 60.
+            clock (Callable[[], float], optional): Time source in seconds, replaceable in tests. Defaults to `time.monotonic`.
+        """
+        self.max_entries = max_entries
+        self.default_ttl = default_ttl
+        self.clock = clock
+        self._entries: OrderedDict[Hashable, tuple[float, Any]] = OrderedDict()
+        self._in_flight: dict[Hashable, Future] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable, fetch: Callable[[], Any], ttl: float | None = None) -> Any:
+        """
+        Returns the cached value for `key`, calling `fetch` at most once across concurrent callers when it is stale.
+
+        Args:
+            key (Hashable): Cache key, e.g. (symbol, interval, period).
+            fetch (Callable[[], Any]): Loads the value from upstream.
+            ttl (float | None, optional): Seconds the fetched value stays fresh. Defaults to `default_ttl`.
+
+        Returns:
+            Any: The cached or freshly fetched value.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > self.clock():
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+            future, leader = self._join(key)
+        return self._load(key, future, leader, fetch, ttl)
+
+    def refresh(self, key: Hashable, fetch: Callable[[], Any], ttl: float | None = None) -> Any:
+        """
+        Fetches the value for `key` again even if it is fresh, sharing the call with concurrent `get` and `refresh`
+        calls, and stores the result like `get` does.
+        """
+        with self._lock:
+            future, leader = self._join(key)
+        return self._load(key, future, leader, fetch, ttl)
+
+    def _join(self, key: Hashable) -> tuple[Future, bool]:
+        # the in-flight fetch of `key`, or a new one this caller leads; called with the lock held
+        future = self._in_flight.get(key)
+        if future is not None:
+            return future, False
+        future = self._in_flight[key] = Future()
+        return future, True
+
+    def _load(self, key: Hashable, future: Future, leader: bool, fetch: Callable[[], Any], ttl: float | None) -> Any:
+        if not leader:
+            return future.result()
+
+        try:
+            value = fetch()
+        except BaseException as error:
+            future.set_exception(error)
+            raise
+        else:
+            future.set_result(value)
+            if value is not None:
+                self.put(key, value, ttl)
+            return value
+        finally:
+            with self._lock:
+                self._in_flight.pop(key, None)
+
+    def peek(self, key: Hashable) -> Any:
+        """
+        Returns the value for `key` if it is cached and fresh, otherwise None, without fetching or waiting.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] <= self.clock():
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def expires_in(self, key: Hashable) -> float | None:
+        """
+        Returns the seconds until the entry for `key` goes stale (zero or less once it has), or None when there is none.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            return None if entry is None else entry[0] - self.clock()
+
+    def put(self, key: Hashable, value: Any, ttl: float | None = None):
+        """
+        Stores `value` under `key`, evicting the least recently used entries beyond `max_entries`.
+        """
+        expires = self.clock() + (self.default_ttl if ttl is None else ttl)
+        with self._lock:
+            self._entries[key] = (expires, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, key: Hashable | None = None):
+        """
+        Drops one entry, or every entry when `key` is None.
+        """
+        with self._lock:
+            if key is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(key, None)
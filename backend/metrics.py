@@ -0,0 +1,185 @@
+import json
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from typing import Callable, Iterable
+
+# Innermost (file, function) of threads that are waiting for work; their samples are left out of profiles
+IDLE_FRAMES = {("threading.py", "wait"), ("selectors.py", "select"), ("thread.py", "_worker"), ("queue.py", "get")}
+
+# Upper bounds in seconds of the histogram buckets, from cache hits to slow upstream fetches
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+
+def _labels(names: tuple[str, ...], values: tuple, extra: str = "") -> str:
+    pairs = [f'{name}="{value}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+class Histogram:
+    """
+    Prometheus-style histogram: cumulative bucket counts, sum and count per combination of label values.
+    """
+
+    def __init__(self, name: str, help: str, labels: tuple[str, ...] = (), buckets: tuple[float, ...] = DEFAULT_BUCKETS):
+        """
+        Args:
+            name (str): Metric name, e.g. "api_stage_seconds".
+            help (str): One-line description shown in the exposition.
+            labels (tuple[str, ...], optional): Label names; `observe` takes one value per name. Defaults to none.
+            buckets (tuple[float, ...], optional): Increasing bucket upper bounds. Defaults to `DEFAULT_BUCKETS`.
+        """
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self.buckets = buckets
+        self._series: dict[tuple, list] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *label_values):
+        """
+        Records one observation for the given label values.
+        """
+        with self._lock:
+            series = self._series.get(label_values)
+            if series is None:
+                series = self._series[label_values] = [[0] * len(self.buckets), 0.0, 0]
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def render(self) -> str:
+        """
+        Returns the metric in the Prometheus text exposition format.
+        """
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            series = sorted((values, (list(counts), total, count)) for values, (counts, total, count) in self._series.items())
+        for values, (counts, total, count) in series:
+            for bound, bucket_count in zip(self.buckets, counts):
+                lines.append(f"{self.name}_bucket{_labels(self.labels, values, 'le=%s' % json.dumps(format(bound, 'g')))} {bucket_count}")
+            lines.append(f"{self.name}_bucket{_labels(self.labels, values, 'le=%s' % json.dumps('+Inf'))} {count}")
+            lines.append(f"{self.name}_sum{_labels(self.labels, values)} {total:.6f}")
+            lines.append(f"{self.name}_count{_labels(self.labels, values)} {count}")
+        return "\n".join(lines)
+
+class CallbackCounter:
+    """
+    Counter whose values are read from the objects that keep them (e.g. cache hit counts) at exposition time.
+    """
+
+    def __init__(self, name: str, help: str, labels: tuple[str, ...], collect: Callable[[], Iterable[tuple[tuple, float]]]):
+        """
+        Args:
+            name (str): Metric name, e.g. "cache_hits_total".
+            help (str): One-line description shown in the exposition.
+            labels (tuple[str, ...]): Label names.
+            collect (Callable[[], Iterable[tuple[tuple, float]]]): Returns (label values, current value) pairs.
+        """
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self.collect = collect
+
+    def render(self) -> str:
+        """
+        Returns the metric in the Prometheus text exposition format.
+        """
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        for values, value in self.collect():
+            lines.append(f"{self.name}{_labels(self.labels, values)} {value}")
+        return "\n".join(lines)
+
+def render(metrics: Iterable) -> str:
+    """Expose several metrics as one Prometheus text payload"""
+    return "\n".join(metric.render() for metric in metrics) + "\n"
+
+class RequestTiming:
+    """Wall time of the named stages of one request, in the order they finished"""
+
+    def __init__(self):
+        self.stages: dict[str, float] = {}
+
+    @contextmanager
+    def stage(self, name: str):
+        """Time the enclosed block (it may await) and add it to `name`"""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.stages[name] = self.stages.get(name, 0.0) + time.perf_counter() - started
+
+    def observe(self, histogram: Histogram, *label_values):
+        """Record every stage in `histogram`, labelled with `label_values` followed by the stage name"""
+        for name, seconds in self.stages.items():
+            histogram.observe(seconds, *label_values, name)
+
+    def server_timing(self) -> str:
+        """The stages as a Server-Timing header value, durations in milliseconds"""
+        return ", ".join(f"{name};dur={seconds * 1000:.1f}" for name, seconds in self.stages.items())
+
+class SamplingProfiler:
+    """
+    Statistical profiler that samples the Python stacks of every thread at a fixed interval while it runs.
+
+    Work for one request is spread over the event loop and executor threads, so all threads are sampled; stacks of
+    requests served at the same time show up as well. The result is in the collapsed ("folded") stack format that
+    flame graph tools read: one `frame;frame;frame count` line per distinct stack, outermost frame first.
+    """
+
+    def __init__(self, interval: float = 0.002):
+        """
+        Args:
+            interval (float, optional): Seconds between samples. Defaults to 0.002.
+        """
+        self.interval = interval
+        self.samples: Counter[str] = Counter()
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def start(self) -> "SamplingProfiler":
+        """Start sampling in a daemon thread"""
+        self._thread = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> "SamplingProfiler":
+        """Stop sampling and wait for the sampler thread"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        return self
+
+    def _run(self):
+        own = threading.get_ident()
+        names = {thread.ident: thread.name for thread in threading.enumerate()}
+        while not self._stop.wait(self.interval):
+            for ident, frame in sys._current_frames().items():
+                if ident == own or (os.path.basename(frame.f_code.co_filename), frame.f_code.co_name) in IDLE_FRAMES:
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})")
+                    frame = frame.f_back
+                if ident not in names:
+                    names = {thread.ident: thread.name for thread in threading.enumerate()}
+                stack.append(names.get(ident, str(ident)))
+                self.samples[";".join(reversed(stack))] += 1
+
+    def collapsed(self) -> str:
+        """The samples in collapsed stack format, most frequent stack first"""
+        return "".join(f"{stack} {count}\n" for stack, count in self.samples.most_common())
+
+    def save(self, directory: str, name: str) -> str:
+        """Write `collapsed()` to `<directory>/<time>-<name>.folded` and return the path"""
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, f"{time.strftime('%Y%m%d-%H%M%S')}-{int(time.time() * 1000) % 1000:03d}-{name}.folded")
+        with open(path, "w") as file:
+            file.write(self.collapsed())
+        return path
@@ -1,7 +1,98 @@
-import matplotlib.pyplot as plt
+import hashlib
+import io
+import os
+import threading
+
 import numpy as np
 
-def stock_plot(prices, dates):
+from market_cache import MarketDataCache
+
+# matplotlib is imported on the first plot, so importing this module (and the simulator) stays cheap
+
+# Formats the headless renderers produce, with their media types
+IMAGE_FORMATS = {"png": "image/png", "svg": "image/svg+xml"}
+
+# Rendered images keyed by a digest of everything drawn, so an identical chart is rendered once. The digest covers
+# the data itself, so entries never go stale and only age out to bound memory.
+rendered_images = MarketDataCache(max_entries=256, default_ttl=24 * 60 * 60)
+
+# One figure per chart kind and size, redrawn for every render; matplotlib is not thread-safe, so renders take turns
+_canvases = {}
+_render_lock = threading.Lock()
+
+class _Canvas:
+    """A figure with a single line, drawn without pyplot on the Agg canvas, whose data is replaced on each render"""
+
+    def __init__(self, xlabel: str, ylabel: str, size: tuple[float, float], dpi: int, dates: bool):
+        from matplotlib.backends.backend_agg import FigureCanvasAgg
+        from matplotlib.figure import Figure
+
+        self.figure = Figure(figsize=size, dpi=dpi)
+        FigureCanvasAgg(self.figure)
+        self.axes = self.figure.add_subplot()
+        (self.line,) = self.axes.plot([], [])
+        self.axes.set_xlabel(xlabel)
+        self.axes.set_ylabel(ylabel)
+        if dates:
+            self.axes.xaxis_date()
+            self.axes.tick_params(axis="x", labelrotation=45)
+        # fixed margins instead of a tight layout, which would measure every label on each render
+        self.figure.subplots_adjust(left=0.12, right=0.97, bottom=0.25 if dates else 0.12, top=0.9)
+
+    def render(self, x: np.ndarray, y: np.ndarray, title: str, format: str) -> bytes:
+        self.line.set_data(x, y)
+        self.axes.relim()
+        self.axes.autoscale_view()
+        self.axes.set_title(title)
+        buffer = io.BytesIO()
+        self.figure.savefig(buffer, format=format)
+        return buffer.getvalue()
+
+def _render(kind: str, x: np.ndarray, y: np.ndarray, title: str, format: str, size: tuple[float, float], dpi: int) -> bytes:
+    if format not in IMAGE_FORMATS:
+        raise ValueError(f"Unknown image format: {format}")
+    digest = hashlib.sha1(x.tobytes())
+    digest.update(y.tobytes())
+    key = (kind, format, tuple(size), dpi, title, digest.hexdigest())
+
+    def draw():
+        with _render_lock:
+            canvas = _canvases.get((kind, tuple(size), dpi))
+            if canvas is None:
+                labels = ("Date", "Price") if kind == "stock" else ("Duration[days]", "Profit[%]")
+                canvas = _canvases[(kind, tuple(size), dpi)] = _Canvas(*labels, size, dpi, dates=kind == "stock")
+            if kind == "stock":
+                from matplotlib.dates import date2num
+                return canvas.render(date2num(x), y, title, format)
+            return canvas.render(x, y, title, format)
+
+    return rendered_images.get(key, draw)
+
+def render_stock_plot(prices, dates, format: str = "png", title: str = "Stock Prices Over Time", size: tuple[float, float] = (8, 4.5), dpi: int = 100) -> bytes:
+    """Render a price chart headless to PNG or SVG bytes, reusing the image when the same chart was rendered before"""
+    return _render("stock", np.asarray(dates).astype("datetime64[ms]"), np.asarray(prices, dtype=float), title, format, size, dpi)
+
+def render_algorithm_plot(results: dict[int, float], format: str = "png", title: str = "Algorithm average profit over time", size: tuple[float, float] = (8, 4.5), dpi: int = 100) -> bytes:
+    """Render `simulate` results headless to PNG or SVG bytes, reusing the image when the same chart was rendered before"""
+    x = np.array(list(results.keys()), dtype=float)
+    y = np.array(list(results.values()), dtype=float)
+    return _render("algorithm", x, y, title, format, size, dpi)
+
+def _save(path: str, image: bytes):
+    with open(path, "wb") as file:
+        file.write(image)
+
+def _path_format(path: str) -> str:
+    return os.path.splitext(path)[1].lstrip(".").lower() or "png"
+
+def stock_plot(prices, dates, path: str | None = None):
+    """Show a price chart, or render it headless into the PNG or SVG file at `path`"""
+    if path is not None:
+        _save(path, render_stock_plot(prices, dates, _path_format(path)))
+        return
+
+    import matplotlib.pyplot as plt
+
     ypoints = np.array(prices)
     xpoints = np.array(dates)
     # print(dates)
@@ -16,7 +107,41 @@ def stock_plot(prices, dates):
     plt.subplots_adjust(top=0.9)
     plt.show()
 
-def algorithm_plot(results):
+def stock_plot_batches(batches, column: int = 0, max_points: int = 5000):
+    """Plot a price history that arrives as (times, values) batches, keeping at most `max_points` evenly spaced bars"""
+    times, prices = _decimate(batches, column, max_points)
+    stock_plot(prices, times.astype("datetime64[s]"))
+
+def _decimate(batches, column: int, max_points: int) -> tuple[np.ndarray, np.ndarray]:
+    # keep every `step`-th bar; when that is still too many, double the step and drop every other kept bar
+    step = 1
+    kept_times, kept_prices = [], []
+    seen = 0
+    kept = 0
+    for times, values in batches:
+        first = -seen % step
+        # copies, so the batches themselves are not kept alive
+        kept_times.append(np.array(times[first::step]))
+        kept_prices.append(np.array(values[first::step, column]))
+        seen += len(times)
+        kept += len(kept_times[-1])
+        while kept > max_points:
+            times_so_far, prices_so_far = np.concatenate(kept_times), np.concatenate(kept_prices)
+            kept_times, kept_prices = [times_so_far[::2]], [prices_so_far[::2]]
+            kept = len(kept_times[0])
+            step *= 2
+    if not kept_times:
+        return np.empty(0, dtype=np.int64), np.empty(0)
+    return np.concatenate(kept_times), np.concatenate(kept_prices)
+
+def algorithm_plot(results, path: str | None = None):
+    """Show `simulate` results, or render them headless into the PNG or SVG file at `path`"""
+    if path is not None:
+        _save(path, render_algorithm_plot(results, _path_format(path)))
+        return
+
+    import matplotlib.pyplot as plt
+
     ypoints = np.array(list(results.values()))
     xpoints = np.array(list(results.keys()))
 
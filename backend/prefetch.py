@@ -0,0 +1,152 @@
+import threading
+import time
+from typing import Any, Callable, Hashable
+
+class _Tracked:
+    """What the scheduler remembers about one key"""
+
+    __slots__ = ("score", "scored_at", "request", "failures", "next_attempt")
+
+    def __init__(self, request: Any, now: float):
+        self.score = 0.0
+        self.scored_at = now
+        self.request = request
+        self.failures = 0
+        self.next_attempt = now
+
+class PrefetchScheduler:
+    """
+    Keeps the most requested cache entries warm by refreshing them in a background thread shortly before they expire.
+
+    Every request is `record`ed with its cache key and what is needed to load it again. Each key scores one point per
+    request, halving every `half_life` seconds, and on every tick the `top` keys whose entries expire within `lead`
+    seconds (or are missing) are refreshed one after another. Keys whose score has decayed below `min_score` are no
+    longer requested and are forgotten, so nothing is refreshed for good on the strength of old requests. A key whose
+    refresh fails or finds nothing waits twice as long after each failure, up to `max_backoff`, before it is tried again.
+    """
+
+    def __init__(self, refresh: Callable[[Any], Any], expires_in: Callable[[Hashable], float | None], top: int = 20, lead: float = 10, interval: float = 1, half_life: float = 600, min_score: float = 0.25, max_tracked: int = 1000, max_backoff: float = 300, clock: Callable[[], float] = time.monotonic):
+        """
+        Args:
+            refresh (Callable[[Any], Any]): Loads an entry again and stores it, called with the request recorded for
+                its key; returns None when there was nothing to load.
+            expires_in (Callable[[Hashable], float | None]): Seconds until the entry for a key goes stale, None when
+                there is none (`MarketDataCache.expires_in`).
+            top (int, optional): Number of the most requested keys kept warm; 0 keeps none. Defaults to 20.
+            lead (float, optional): Seconds before expiry an entry is refreshed. Defaults to 10.
+            interval (float, optional): Seconds between ticks of the background thread. Defaults to 1.
+            half_life (float, optional): Seconds after which a request counts half as much. Defaults to 600.
+            min_score (float, optional): Score below which a key is forgotten; the default drops a key requested once
+                after two half-lives without another request. Defaults to 0.25.
+            max_tracked (int, optional): Keys remembered; the least requested are forgotten beyond it. Defaults to 1000.
+            max_backoff (float, optional): Longest pause in seconds before retrying a failing key. Defaults to 300.
+            clock (Callable[[], float], optional): Time source in seconds, replaceable in tests. Defaults to `time.monotonic`.
+        """
+        self.refresh = refresh
+        self.expires_in = expires_in
+        self.top = top
+        self.lead = lead
+        self.interval = interval
+        self.half_life = half_life
+        self.min_score = min_score
+        self.max_tracked = max_tracked
+        self.max_backoff = max_backoff
+        self.clock = clock
+        self._tracked: dict[Hashable, _Tracked] = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self.refreshed = 0
+        self.failed = 0
+
+    def record(self, key: Hashable, request: Any):
+        """
+        Counts one request for `key`, remembering `request` as what `refresh` is called with.
+        """
+        now = self.clock()
+        with self._lock:
+            entry = self._tracked.get(key)
+            if entry is None:
+                entry = self._tracked[key] = _Tracked(request, now)
+            entry.score = self._score(entry, now) + 1
+            entry.scored_at = now
+            entry.request = request
+            if len(self._tracked) > self.max_tracked:
+                coldest = min(self._tracked, key=lambda tracked: self._score(self._tracked[tracked], now))
+                del self._tracked[coldest]
+
+    def _score(self, entry: _Tracked, now: float) -> float:
+        return entry.score * 0.5 ** ((now - entry.scored_at) / self.half_life)
+
+    def hottest(self) -> list[Hashable]:
+        """Returns the `top` keys with the highest scores, highest first, forgetting keys scored below `min_score`"""
+        now = self.clock()
+        with self._lock:
+            scores = {key: self._score(entry, now) for key, entry in self._tracked.items()}
+            for key, score in scores.items():
+                if score < self.min_score:
+                    del self._tracked[key]
+        ranked = sorted((key for key, score in scores.items() if score >= self.min_score), key=scores.get, reverse=True)
+        return ranked[:self.top]
+
+    def due(self) -> list[tuple[Hashable, Any]]:
+        """Returns the keys among the `hottest` to refresh now, with their requests"""
+        now = self.clock()
+        due = []
+        for key in self.hottest():
+            remaining = self.expires_in(key)
+            if remaining is not None and remaining > self.lead:
+                continue
+            with self._lock:
+                entry = self._tracked.get(key)
+                if entry is not None and entry.next_attempt <= now:
+                    due.append((key, entry.request))
+        return due
+
+    def run_once(self) -> int:
+        """
+        Refreshes every key that is due.
+
+        Returns:
+            int: Number of entries refreshed.
+        """
+        refreshed = 0
+        for key, request in self.due():
+            try:
+                ok = self.refresh(request) is not None
+            except Exception as e:
+                print(f"Prefetching {key} failed: {e}")
+                ok = False
+            with self._lock:
+                entry = self._tracked.get(key)
+                if entry is not None:
+                    entry.failures = 0 if ok else entry.failures + 1
+                    entry.next_attempt = self.clock() + (0 if ok else min(self.interval * 2**entry.failures, self.max_backoff))
+            if ok:
+                refreshed += 1
+                self.refreshed += 1
+            else:
+                self.failed += 1
+        return refreshed
+
+    def start(self) -> "PrefetchScheduler":
+        """Starts the background thread, unless `top` is 0 or it is already running"""
+        if self.top > 0 and self._thread is None:
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="prefetch", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self, timeout: float | None = None):
+        """Stops the background thread after the refresh in progress"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.run_once()
+            except Exception as e:
+                print(f"Prefetch tick failed: {e}")
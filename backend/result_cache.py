@@ -0,0 +1,117 @@
+import hashlib
+import json
+import os
+import threading
+from typing import Any
+
+class ResultCache:
+    """
+    On-disk memo of JSON-serializable results, one file per key, evicting the least recently used files by total size.
+
+    Files are written atomically and a hit refreshes the file's modification time, which is the recency eviction goes
+    by, so several processes can share one directory. The directory is only scanned when the size of the files this
+    instance wrote since the last scan takes the running total past `max_bytes`; the scan counts the files of other
+    processes too.
+    """
+
+    def __init__(self, directory: str, max_bytes: int = 64 * 2**20):
+        """
+        Args:
+            directory (str): Directory holding the cached results, created on the first write.
+            max_bytes (int, optional): Total size of the files kept; older ones are removed past it. Defaults to 64MB.
+        """
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        # size of the directory as of the last scan plus what was written since, None before the first put
+        self._size: int | None = None
+
+    @staticmethod
+    def key(*parts) -> str:
+        """Digest of the `repr` of `parts`, which should identify everything the result depends on"""
+        return hashlib.sha1(repr(parts).encode()).hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.json")
+
+    def get(self, key: str) -> Any | None:
+        """
+        Returns the stored result for `key`, or None when there is none.
+        """
+        path = self._path(key)
+        try:
+            with open(path) as file:
+                value = json.load(file)
+        except FileNotFoundError:
+            with self._lock:
+                self.misses += 1
+            return None
+        except (OSError, ValueError) as e:
+            print(f"Dropping unreadable cached result {path}: {e}")
+            self._remove(path)
+            with self._lock:
+                self.misses += 1
+            return None
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        with self._lock:
+            self.hits += 1
+        return value
+
+    def put(self, key: str, value: Any):
+        """
+        Stores `value` for `key` and evicts the least recently used results past `max_bytes`.
+        """
+        os.makedirs(self.directory, exist_ok=True)
+        path = self._path(key)
+        temporary = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(temporary, "w") as file:
+            json.dump(value, file)
+        written = os.path.getsize(temporary)
+        try:
+            written -= os.path.getsize(path)
+        except FileNotFoundError:
+            pass
+        os.replace(temporary, path)
+        with self._lock:
+            if self._size is not None:
+                self._size += written
+            if self._size is None or self._size > self.max_bytes:
+                self._size = self._evict()
+
+    def clear(self):
+        """Removes every stored result"""
+        if os.path.isdir(self.directory):
+            for name in os.listdir(self.directory):
+                if name.endswith(".json"):
+                    self._remove(os.path.join(self.directory, name))
+        with self._lock:
+            self._size = None
+
+    def _evict(self) -> int:
+        entries = []
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith(".json"):
+                try:
+                    stat = entry.stat()
+                except FileNotFoundError:
+                    continue
+                entries.append((stat.st_mtime_ns, stat.st_size, entry.path))
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            self._remove(path)
+            total -= size
+        return total
+
+    @staticmethod
+    def _remove(path: str):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
@@ -0,0 +1,263 @@
+import numpy as np
+
+# Declarative trading rules: a rule is an expression graph over the price series, built from the functions below and
+# ordinary operators, e.g. `(day() >= 1) & (price() < rolling_max(price(), 10) * 0.95)`. Nodes are identified by
+# their operation and inputs, so a program compiled from many rules computes every shared indicator once.
+
+class Expr:
+    """
+    Node of a rule expression graph: an operation, its input nodes and a constant parameter.
+
+    Comparison, arithmetic and logical operators build new nodes instead of evaluating, so `==` compares series;
+    use `key` to tell whether two nodes are the same computation.
+    """
+
+    __slots__ = ("op", "inputs", "param", "key")
+
+    def __init__(self, op: str, inputs: tuple = (), param=None):
+        self.op = op
+        self.inputs = tuple(inputs)
+        self.param = param
+        self.key = (op, param, tuple(node.key for node in self.inputs))
+
+    def __repr__(self) -> str:
+        arguments = [repr(node) for node in self.inputs] + ([repr(self.param)] if self.param is not None else [])
+        return f"{self.op}({', '.join(arguments)})"
+
+    def __lt__(self, other):
+        return Expr("lt", (self, _node(other)))
+
+    def __le__(self, other):
+        return Expr("le", (self, _node(other)))
+
+    def __gt__(self, other):
+        return Expr("gt", (self, _node(other)))
+
+    def __ge__(self, other):
+        return Expr("ge", (self, _node(other)))
+
+    def __eq__(self, other):
+        return Expr("eq", (self, _node(other)))
+
+    def __ne__(self, other):
+        return Expr("ne", (self, _node(other)))
+
+    def __and__(self, other):
+        return Expr("and", (self, _node(other)))
+
+    def __or__(self, other):
+        return Expr("or", (self, _node(other)))
+
+    def __invert__(self):
+        return Expr("not", (self,))
+
+    def __add__(self, other):
+        return Expr("add", (self, _node(other)))
+
+    def __sub__(self, other):
+        return Expr("sub", (self, _node(other)))
+
+    def __rsub__(self, other):
+        return Expr("sub", (_node(other), self))
+
+    def __mul__(self, other):
+        return Expr("mul", (self, _node(other)))
+
+    def __truediv__(self, other):
+        return Expr("div", (self, _node(other)))
+
+    __hash__ = None
+
+def _node(value) -> Expr:
+    return value if isinstance(value, Expr) else const(value)
+
+def price() -> Expr:
+    """The price series"""
+    return Expr("price")
+
+def day() -> Expr:
+    """Index of each day in the series, starting at 0"""
+    return Expr("day")
+
+def const(value) -> Expr:
+    """The same number or flag on every day"""
+    # keyed by type as well, so True and 1 stay separate nodes
+    return Expr("const", param=(type(value).__name__, value))
+
+def shift(series: Expr, days: int) -> Expr:
+    """`series` as it was `days` days earlier; NaN (False for flags) before the series starts"""
+    return series if days == 0 else Expr("shift", (series,), days)
+
+def rolling_max(series: Expr, window: int) -> Expr:
+    """Highest value of the `window` days before each day, today excluded; -inf on the first day"""
+    return Expr("rolling_max", (series,), window)
+
+def rolling_count(flags: Expr, window: int) -> Expr:
+    """Number of set flags among the last `window` days, today included"""
+    return Expr("rolling_count", (flags,), window)
+
+def moving_average(series: Expr, length: int) -> Expr:
+    """Average of the `length` days before each day, today excluded, summed oldest first; NaN before day `length`"""
+    return Expr("moving_average", (series,), length)
+
+def declines() -> Expr:
+    """Days that closed below the day before"""
+    return price() < shift(price(), 1)
+
+def consecutive_declines(count: int) -> Expr:
+    """Days that end a run of at least `count` declines"""
+    return rolling_count(declines(), count) == count
+
+def below_recent_high(fraction: float, window: int) -> Expr:
+    """Days whose price is more than `fraction` below the highest price of the `window` days before"""
+    return price() < rolling_max(price(), window) * (1 - fraction)
+
+def crosses_above(fast: Expr, slow: Expr) -> Expr:
+    """Days on which `fast` moves from below `slow` to above it"""
+    return (shift(fast, 1) < shift(slow, 1)) & (fast > slow)
+
+def _shift(values: np.ndarray, days: int) -> np.ndarray:
+    shifted = np.full(values.shape, False if values.dtype == bool else np.nan, dtype=bool if values.dtype == bool else float)
+    if days < values.shape[-1]:
+        shifted[..., days:] = values[..., :values.shape[-1] - days]
+    return shifted
+
+def _rolling_max(values: np.ndarray, window: int) -> np.ndarray:
+    highs = np.full(values.shape, -np.inf)
+    for days in range(1, min(window, values.shape[-1]) + 1):
+        np.maximum(highs[..., days:], values[..., :-days], out=highs[..., days:])
+    return highs
+
+def _rolling_count(flags: np.ndarray, window: int) -> np.ndarray:
+    counts = np.cumsum(flags, axis=-1)
+    if window <= 0:
+        return np.zeros_like(counts)
+    counts[..., window:] -= counts[..., :-window].copy()
+    return counts
+
+def _moving_average(values: np.ndarray, length: int) -> np.ndarray:
+    # added one day at a time, so the rounding is that of sum() over a slice in the per-day strategies
+    averages = np.full(values.shape, np.nan)
+    days = values.shape[-1]
+    if days > length:
+        total = np.array(values[..., :days - length], dtype=float)
+        for offset in range(1, length):
+            total += values[..., offset:days - length + offset]
+        averages[..., length:] = total / length
+    return averages
+
+OPERATIONS = {
+    "shift": _shift,
+    "rolling_max": _rolling_max,
+    "rolling_count": _rolling_count,
+    "moving_average": _moving_average,
+    "lt": np.less,
+    "le": np.less_equal,
+    "gt": np.greater,
+    "ge": np.greater_equal,
+    "eq": np.equal,
+    "ne": np.not_equal,
+    "and": np.logical_and,
+    "or": np.logical_or,
+    "not": np.logical_not,
+    "add": np.add,
+    "sub": np.subtract,
+    "mul": np.multiply,
+    "div": np.divide,
+}
+
+class Program:
+    """
+    A set of named rules compiled into one ordered list of distinct computations.
+
+    Calling the program evaluates every node once, whichever rules share it, and frees each intermediate array after
+    its last use.
+    """
+
+    def __init__(self, rules: dict[str, Expr]):
+        """
+        Args:
+            rules (dict[str, Expr]): Rules by name.
+        """
+        self.rules = {name: _node(rule) for name, rule in rules.items()}
+        self.steps: list[Expr] = []
+        seen = set()
+        for rule in self.rules.values():
+            self._visit(rule, seen)
+        # the step after which each node is no longer needed
+        self._last_use = {}
+        for index, node in enumerate(self.steps):
+            for child in node.inputs:
+                self._last_use[child.key] = index
+        for rule in self.rules.values():
+            self._last_use[rule.key] = len(self.steps)
+
+    def _visit(self, node: Expr, seen: set):
+        # depth first over explicit stacks, so deep graphs do not hit the recursion limit
+        stack = [(node, False)]
+        while stack:
+            current, expanded = stack.pop()
+            if current.key in seen:
+                continue
+            if expanded:
+                seen.add(current.key)
+                self.steps.append(current)
+                continue
+            stack.append((current, True))
+            stack.extend((child, False) for child in reversed(current.inputs) if child.key not in seen)
+
+    def __call__(self, prices: np.ndarray, days: dict[str, int] | None = None) -> dict[str, np.ndarray]:
+        """
+        Evaluates every rule on `prices`.
+
+        Args:
+            prices (np.ndarray): Prices shaped (..., days).
+            days (dict[str, int] | None, optional): How many leading days to evaluate, per rule. Every node is then
+                computed only as far as the rules using it need, which gives the same values on those days since
+                every operation only looks back. Defaults to every day for every rule.
+
+        Returns:
+            dict[str, np.ndarray]: The value of each rule on every day (or its first `days[name]`), shaped like
+            `prices` along the leading axes.
+        """
+        prices = np.asarray(prices, dtype=float)
+        total = prices.shape[-1]
+        spans = {name: total if days is None else min(days.get(name, total), total) for name in self.rules}
+        # the days each node is needed for: the most any rule or node using it needs
+        needed = {}
+        for name, rule in self.rules.items():
+            needed[rule.key] = max(needed.get(rule.key, 0), spans[name])
+        for node in reversed(self.steps):
+            for child in node.inputs:
+                needed[child.key] = max(needed.get(child.key, 0), needed[node.key])
+        values = {}
+        for index, node in enumerate(self.steps):
+            span = needed[node.key]
+            if node.op == "price":
+                result = prices[..., :span]
+            elif node.op == "day":
+                result = np.arange(span)
+            elif node.op == "const":
+                result = np.asarray(node.param[1])
+            else:
+                arguments = [_leading(values[child.key], span) for child in node.inputs]
+                if node.param is None:
+                    result = OPERATIONS[node.op](*arguments)
+                else:
+                    result = OPERATIONS[node.op](np.broadcast_to(arguments[0], prices.shape[:-1] + (span,)), node.param)
+            values[node.key] = result
+            for child in node.inputs:
+                if self._last_use[child.key] == index:
+                    values.pop(child.key, None)
+        return {
+            name: np.broadcast_to(_leading(values[rule.key], spans[name]), prices.shape[:-1] + (spans[name],))
+            for name, rule in self.rules.items()
+        }
+
+def _leading(value: np.ndarray, days: int) -> np.ndarray:
+    # the first `days` days of a node's value; constants have no time axis
+    return value if np.ndim(value) == 0 else value[..., :days]
+
+def evaluate(rule: Expr, prices: np.ndarray) -> np.ndarray:
+    """Value of one rule on every day of `prices`"""
+    return Program({"rule": rule})(prices)["rule"]
@@ -1,6 +1,18 @@
+import argparse
+import functools
+import hashlib
+import marshal
+import os
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+
 from plots import stock_plot, algorithm_plot
-from csv_data import get_csv_data
+from csv_data import get_csv_columns
+from result_cache import ResultCache
 import algorithms
+import rules
 
 
 def buy(cash: float, owned_quantity: float, price: float, order_quantity: float = 1) -> tuple[float, float]:
@@ -93,7 +105,468 @@ def algorithm_wrapper(prices: list[float], start_cash: float, monthly_cash: floa
                 pass
     return cash, owned_quantity, total_cash
 
-def simulate(algorithm=algorithms.buy_and_hold, start_cash: float = 100000, monthly_cash: float = 0, stock: str = 'full_s&p500.csv', exposure_type:str="fixed_fraction", exposure_value:float=0.1) -> dict[int, float]:
+def algorithm_signals(prices: list[float], algorithm=algorithms.buy_and_hold) -> np.ndarray:
+    """
+    Runs a per-day trading algorithm over a price list and collects its orders as signal codes.
+
+    Args:
+        prices (list[float]): List of stock prices.
+        algorithm (function, optional): The trading algorithm to use. Defaults to `algorithms.buy_and_hold`.
+
+    Returns:
+        np.ndarray: One of `algorithms.BUY`, `algorithms.SELL` or `algorithms.HOLD` per day. Stop loss and take profit
+        orders are recorded as `HOLD` because `algorithm_wrapper` never acts on them.
+    """
+    codes = {"buy": algorithms.BUY, "sell": algorithms.SELL}
+    signals = np.zeros(len(prices), dtype=np.int8)
+    for i in range(len(prices)):
+        order_type, *_ = algorithm(i, prices)
+        signals[i] = codes.get(order_type, algorithms.HOLD)
+    return signals
+
+def strategy_signals(prices: np.ndarray, algorithm=algorithms.buy_and_hold) -> np.ndarray:
+    """
+    Computes the signal codes of a trading algorithm for one or more price series.
+
+    Uses the batch form registered with `algorithms.batch_of` when the algorithm has one, otherwise replays the
+    per-day protocol through `algorithm_signals` for every series.
+
+    Args:
+        prices (np.ndarray): Stock prices, shaped (..., days).
+        algorithm (function, optional): The trading algorithm to use. Defaults to `algorithms.buy_and_hold`.
+
+    Returns:
+        np.ndarray: Signal codes with the shape of `prices`.
+    """
+    prices = np.asarray(prices, dtype=float)
+    batch = getattr(algorithm, "batch", None)
+    if batch is not None:
+        return batch(prices)
+    rows = prices.reshape(-1, prices.shape[-1]).tolist()
+    return np.array([algorithm_signals(row, algorithm) for row in rows], dtype=np.int8).reshape(prices.shape)
+
+def fused_signals(prices: np.ndarray, strategies: list, days: list[int] | None = None) -> list[np.ndarray]:
+    """
+    Computes the signal codes of several trading algorithms on the same prices in one pass.
+
+    The rules of the algorithms with a declarative form (registered with `algorithms.rule_of`) are compiled into a
+    single `rules.Program`, so indicators they share, such as runs of declines, are computed once. Algorithms without
+    one go through `strategy_signals`.
+
+    Args:
+        prices (np.ndarray): Stock prices, shaped (..., days).
+        strategies (list): The trading algorithms, optionally bound with `algorithms.with_params`.
+        days (list[int] | None, optional): How many leading days to compute for each algorithm, e.g. the warmups
+            of windows. Defaults to every day.
+
+    Returns:
+        list[np.ndarray]: Signal codes with the shape of `prices` (or its first `days[i]` days), one array per algorithm.
+    """
+    prices = np.asarray(prices, dtype=float)
+    spans = [prices.shape[-1]] * len(strategies) if days is None else [min(span, prices.shape[-1]) for span in days]
+    strategy_rules = {}
+    for index, algorithm in enumerate(strategies):
+        rule = getattr(getattr(algorithm, "batch", None), "rule", None)
+        if rule is not None:
+            strategy_rules[str(index)] = rule()
+    program_days = {str(index): spans[index] for index in range(len(strategies))}
+    conditions = rules.Program(strategy_rules)(prices, program_days) if strategy_rules else {}
+    return [
+        np.where(conditions[str(index)], algorithms.BUY, algorithms.HOLD).astype(np.int8) if str(index) in conditions else strategy_signals(prices[..., :spans[index]], algorithm)
+        for index, algorithm in enumerate(strategies)
+    ]
+
+# Finished `simulate` results on disk, shared by every process using this backend directory
+SIMULATION_CACHE_DIR = os.getenv("SIMULATION_CACHE_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "simulation_cache"))
+simulation_results = ResultCache(SIMULATION_CACHE_DIR, max_bytes=int(float(os.getenv("SIMULATION_CACHE_MB", "64")) * 2**20))
+
+@functools.cache
+def _engine_digest() -> str:
+    # a change to the simulator, the strategies or the rule engine makes every stored result stale
+    digest = hashlib.sha1()
+    for module in (__file__, algorithms.__file__, rules.__file__):
+        with open(module, "rb") as file:
+            digest.update(file.read())
+    return digest.hexdigest()
+
+def _strategy_identity(algorithm) -> tuple:
+    # everything a strategy's signals depend on: its code, defaults, closure, bound parameters and rule graph
+    rule = getattr(getattr(algorithm, "batch", None), "rule", None)
+    params = []
+    while isinstance(algorithm, functools.partial):
+        params.append((algorithm.args, sorted(algorithm.keywords.items())))
+        algorithm = algorithm.func
+    code = getattr(algorithm, "__code__", None)
+    return (
+        getattr(algorithm, "__module__", None),
+        getattr(algorithm, "__qualname__", repr(algorithm)),
+        hashlib.sha1(marshal.dumps(code)).hexdigest() if code is not None else None,
+        getattr(algorithm, "__defaults__", None),
+        getattr(algorithm, "__kwdefaults__", None),
+        [cell.cell_contents for cell in getattr(algorithm, "__closure__", None) or ()],
+        params,
+        repr(rule()) if rule is not None else None,
+    )
+
+def sliding_windows(values: np.ndarray, length: int) -> np.ndarray:
+    """
+    Returns zero-copy views of the windows `simulate` evaluates for one window length.
+
+    Args:
+        values (np.ndarray): A chronological series (prices or signal codes).
+        length (int): The number of days in each window.
+
+    Returns:
+        np.ndarray: Windows shaped (offsets, length), ordered from the most recent start back to the second oldest,
+        which is the order `simulate` has always averaged them in.
+    """
+    return np.lib.stride_tricks.sliding_window_view(values, length)[:0:-1]
+
+def vectorized_algorithm_wrapper(prices: np.ndarray, signals: np.ndarray, start_cash: float, monthly_cash: float, exposure_type:str="fixed_fraction", exposure_value:float=0.1, history: bool = False) -> tuple:
+    """
+    Array counterpart of `algorithm_wrapper` driven by precomputed signals.
+
+    The last axis of `prices` and `signals` is time; any leading axes are independent simulations (for example every
+    start offset of one window length) that are advanced together. Only days with a contribution or a non-hold signal
+    are visited, and every operation matches `algorithm_wrapper`, so the results are the same numbers.
+
+    Args:
+        prices (np.ndarray): Stock prices, shaped (..., days).
+        signals (np.ndarray): Signal codes (`algorithms.BUY`, `algorithms.SELL`, `algorithms.HOLD`) with the shape of `prices`.
+        start_cash (float): Initial cash available for trading.
+        monthly_cash (float): Cash added to the account every 21 days.
+        exposure_type (str, optional): The type of exposure to use ("fixed_fraction" or "fixed_quantity"). Defaults to "fixed_fraction".
+        exposure_value (float, optional): The value of exposure (fraction or quantity). Defaults to 0.1.
+        history (bool, optional): Also return the state at the end of every day. Defaults to False.
+
+    Returns:
+        tuple: Remaining cash and total quantity of stock owned (shaped like `prices` without the last axis), and
+        total cash invested. With `history`, followed by the cash, quantity owned and cash invested at the end of
+        every day, each shaped like `prices`.
+    """
+    prices = np.asarray(prices, dtype=float)
+    signals = np.asarray(signals)
+    days = prices.shape[-1]
+    cash = np.full(prices.shape[:-1], float(start_cash))
+    owned_quantity = np.zeros(prices.shape[:-1])
+
+    contribution_days = np.arange(21, days, 21)
+    total_cash = float(np.cumsum([start_cash] + [monthly_cash] * len(contribution_days))[-1])
+
+    active = (signals != algorithms.HOLD).reshape(-1, days).any(axis=0)
+    active[contribution_days] = True
+    event_days = np.flatnonzero(active)
+    states = [(cash, owned_quantity)]
+    for i in event_days:
+        price = prices[..., i]
+        if i % 21 == 0 and i > 0:
+            cash = cash + monthly_cash
+
+        match exposure_type:
+            case "fixed_fraction":
+                order_quantity = cash * exposure_value/price
+            case "fixed_quantity":
+                order_quantity = exposure_value
+            case _:
+                order_quantity = 1
+
+        cost = price * order_quantity
+        bought = (signals[..., i] == algorithms.BUY) & (cash >= cost)
+        sold = (signals[..., i] == algorithms.SELL) & (owned_quantity >= order_quantity)
+        cash = np.where(bought, cash - cost, np.where(sold, cash + cost, cash))
+        owned_quantity = np.where(bought, owned_quantity + order_quantity, np.where(sold, owned_quantity - order_quantity, owned_quantity))
+        if history:
+            states.append((cash, owned_quantity))
+    if not history:
+        return cash, owned_quantity, total_cash
+
+    # the state of a day is the one left by its last event day, or the initial state before any event
+    state_of_day = np.searchsorted(event_days, np.arange(days), side="right")
+    cash_history = np.moveaxis(np.stack([state[0] for state in states])[state_of_day], 0, -1)
+    owned_history = np.moveaxis(np.stack([state[1] for state in states])[state_of_day], 0, -1)
+    contributions = np.zeros(days)
+    contributions[0] = start_cash
+    contributions[contribution_days] = monthly_cash
+    return cash, owned_quantity, total_cash, cash_history, owned_history, np.cumsum(contributions)
+
+def window_lengths(days: int) -> list[int]:
+    """
+    Returns the window lengths `simulate` evaluates for a history of `days` trading days.
+
+    Args:
+        days (int): The number of days in the price history.
+
+    Returns:
+        list[int]: Every 10 days up to 100, then every 50 up to 300, every 100 up to 1000 and every 200 beyond,
+        stopping below 90% of the history.
+    """
+    lengths = []
+    for i in range(10, int(round(days * 0.9, 0)), 10):
+        if i > 100 and i % 50 != 0:
+            continue
+        if i > 300 and i % 100 != 0:
+            continue
+        if i > 1000 and i % 200 != 0:
+            continue
+        lengths.append(i)
+    return lengths
+
+def window_signals(prices: np.ndarray, series_signals: np.ndarray | None, length: int, offsets: slice = slice(None), algorithm=algorithms.buy_and_hold) -> np.ndarray:
+    """
+    Computes the signal codes of the windows of one length.
+
+    Args:
+        prices (np.ndarray): The chronological price history.
+        series_signals (np.ndarray | None): The batch signals of the whole history, or None for per-day algorithms.
+        length (int): The number of days in each window.
+        offsets (slice, optional): Which of the `sliding_windows` to compute. Defaults to all of them.
+        algorithm (function, optional): The trading algorithm to use. Defaults to `algorithms.buy_and_hold`.
+
+    Returns:
+        np.ndarray: Signal codes shaped (offsets, length).
+    """
+    windows = sliding_windows(prices, length)[offsets]
+    if series_signals is None:
+        return strategy_signals(windows, algorithm)
+    # past the warmup a window sees the same signals as the full series, only its first days are recomputed
+    batch = algorithm.batch
+    signals = np.array(sliding_windows(series_signals, length)[offsets])
+    warmup = min(batch.warmup(), length)
+    signals[:, :warmup] = batch(windows[:, :warmup])
+    return signals
+
+def window_profits(prices: np.ndarray, series_signals: np.ndarray | None, length: int, offsets: slice = slice(None), algorithm=algorithms.buy_and_hold, start_cash: float = 100000, monthly_cash: float = 0, exposure_type:str="fixed_fraction", exposure_value:float=0.1, signals: np.ndarray | None = None) -> list[float]:
+    """
+    Simulates the windows of one length and returns the rounded profit of each.
+
+    Args:
+        prices (np.ndarray): The chronological price history.
+        series_signals (np.ndarray | None): The batch signals of the whole history, or None for per-day algorithms.
+        length (int): The number of days in each window.
+        offsets (slice, optional): Which of the `sliding_windows` to simulate. Defaults to all of them.
+        algorithm (function, optional): The trading algorithm to simulate. Defaults to `algorithms.buy_and_hold`.
+        start_cash (float, optional): The initial cash available for trading. Defaults to 100000.
+        monthly_cash (float, optional): The cash added to the account every month. Defaults to 0.
+        exposure_type (str, optional): The type of exposure to use ("fixed_fraction" or "fixed_quantity"). Defaults to "fixed_fraction".
+        exposure_value (float, optional): The value of exposure (fraction or quantity). Defaults to 0.1.
+        signals (np.ndarray | None, optional): Precomputed `window_signals` for the same windows, for callers that
+            simulate several exposure settings on one set of signals. Defaults to None.
+
+    Returns:
+        list[float]: Profit percentages rounded to 2 decimals, in window order.
+    """
+    windows = sliding_windows(prices, length)[offsets]
+    if signals is None:
+        signals = window_signals(prices, series_signals, length, offsets, algorithm)
+    cash, quantity, total_cash = vectorized_algorithm_wrapper(windows, signals, start_cash, monthly_cash, exposure_type, exposure_value)
+    stock_value = windows[:, -1] * quantity
+    return [round(profit, 2) for profit in ((stock_value + cash - total_cash) / total_cash * 100).tolist()]
+
+def prefix_sum_pattern(algorithm, exposure_type: str = "fixed_fraction") -> str | None:
+    """
+    Tells whether `prefix_sum_profits` can simulate a strategy.
+
+    Args:
+        algorithm (function): The trading algorithm.
+        exposure_type (str, optional): The type of exposure it would trade with. Defaults to "fixed_fraction".
+
+    Returns:
+        str | None: "first_day" for a rule that buys once on the first day of every window (`buy_and_hold`),
+        "every_day" for one that buys every day (`buy_everyday`) with an order size that does not depend on the cash,
+        None for anything else.
+    """
+    rule = getattr(getattr(algorithm, "batch", None), "rule", None)
+    if rule is None:
+        return None
+    key = rule().key
+    if key == (rules.day() == 0).key:
+        return "first_day"
+    if key == rules.const(True).key and exposure_type != "fixed_fraction":
+        return "every_day"
+    return None
+
+def _sliding_min(values: np.ndarray, window: int) -> np.ndarray:
+    # min(values[i:i + window]) along the first axis for every i, from per-block prefix and suffix minima (van Herk)
+    count = len(values) - window + 1
+    blocks = -(-len(values) // window)
+    padded = np.full((blocks * window,) + values.shape[1:], np.inf)
+    padded[:len(values)] = values
+    shaped = padded.reshape((blocks, window) + values.shape[1:])
+    prefix = np.minimum.accumulate(shaped, axis=1).reshape(padded.shape)
+    suffix = np.minimum.accumulate(shaped[:, ::-1], axis=1)[:, ::-1].reshape(padded.shape)
+    return np.minimum(suffix[:count], prefix[window - 1:window - 1 + count])
+
+def _lowest_cash(spent: np.ndarray, starts: np.ndarray, length: int, start_cash: float, monthly_cash: float) -> np.ndarray:
+    # The least cash each window is left with after a day's order, if every order goes through. Within a month the
+    # cash only falls, so the candidates are the last day before each contribution and the last day of the window:
+    # start_cash + monthly_cash * month - (spent[start + day + 1] - spent[start]).
+    months = length // 21
+    lowest = np.full(len(starts), np.inf)
+    if months:
+        # the end of month `month` of a window starting at `start` is spent[s + 21] with s = start + 21 * month, so
+        # for every start with the same remainder mod 21 these are a sliding minimum over one column of (s // 21, s % 21)
+        ends = monthly_cash * (np.arange(len(spent) - 21) // 21) - spent[21:]
+        columns = np.full((-(-len(ends) // 21) * 21,), np.inf)
+        columns[:len(ends)] = ends
+        minima = _sliding_min(columns.reshape(-1, 21), months)
+        lowest = minima[starts // 21, starts % 21] - monthly_cash * (starts // 21)
+    if length % 21:
+        lowest = np.minimum(lowest, monthly_cash * ((length - 1) // 21) - spent[starts + length])
+    return start_cash + spent[starts] + lowest
+
+# `prefix_sum_profits` replays runs of at least this many neighbouring windows that run short of cash as views, and
+# copies the others, at most this many days of windows at a time
+REPLAY_RUN_WINDOWS = 64
+REPLAY_CHUNK_DAYS = 2**22
+
+def prefix_sum_profits(prices: np.ndarray, length: int, pattern: str, start_cash: float = 100000, monthly_cash: float = 0, exposure_type:str="fixed_fraction", exposure_value:float=0.1) -> list[float]:
+    """
+    `window_profits` for every window of one length of a strategy `prefix_sum_pattern` recognises, without replaying
+    the windows day by day.
+
+    A "first_day" window buys once and then only receives contributions, so its profit follows from its first and
+    last price and the contributions it received. An "every_day" window that can afford every order holds `length`
+    orders at the end and has spent a difference of the cumulative cost of the history; whether it can afford them
+    is a sliding minimum over the same sums. The windows that run out of cash, or come within rounding of it, are
+    replayed with `vectorized_algorithm_wrapper`. Every other window takes O(1) work, so a length costs O(N) for N
+    windows plus the replays. Summing in a different order than the engine can move these profits by a few units in
+    the last place before rounding.
+
+    Args:
+        prices (np.ndarray): The chronological price history.
+        length (int): The number of days in each window.
+        pattern (str): What `prefix_sum_pattern` returned for the strategy.
+        start_cash (float, optional): The initial cash available for trading. Defaults to 100000.
+        monthly_cash (float, optional): The cash added to the account every month. Defaults to 0.
+        exposure_type (str, optional): The type of exposure to use ("fixed_fraction" or "fixed_quantity"). Defaults to "fixed_fraction".
+        exposure_value (float, optional): The value of exposure (fraction or quantity). Defaults to 0.1.
+
+    Returns:
+        list[float]: Profit percentages rounded to 2 decimals, in `sliding_windows` order.
+    """
+    prices = np.asarray(prices, dtype=float)
+    starts = np.arange(len(prices) - length, 0, -1)
+    contributions = len(range(21, length, 21))
+    total_cash = float(np.cumsum([start_cash] + [monthly_cash] * contributions)[-1])
+    order_quantity = exposure_value if exposure_type == "fixed_quantity" else 1
+
+    if pattern == "first_day":
+        first = prices[starts]
+        cash = np.full(len(starts), float(start_cash))
+        if exposure_type == "fixed_fraction":
+            order_quantity = cash * exposure_value/first
+        cost = first * order_quantity
+        bought = cash >= cost
+        cash = np.where(bought, cash - cost, cash)
+        quantity = np.where(bought, 0.0 + order_quantity, 0.0)
+        cash = cash + monthly_cash * contributions
+    elif pattern == "every_day":
+        cost = prices * order_quantity
+        spent = np.concatenate(([0.0], np.cumsum(cost)))
+        # prices that are not positive break the monthly minimum argument, so such histories are all replayed
+        margin = _lowest_cash(spent, starts, length, start_cash, monthly_cash) if (cost >= 0).all() else np.full(len(starts), -np.inf)
+        replayed = np.flatnonzero(margin <= 1e-9 * (abs(start_cash) + spent[-1]))
+        cash = total_cash - (spent[starts + length] - spent[starts])
+        quantity = np.full(len(starts), np.cumsum(np.full(length, float(order_quantity)))[-1])
+        if len(replayed):
+            # only the windows that run short are replayed: long runs of neighbours as views, the rest gathered into
+            # copies of at most REPLAY_CHUNK_DAYS days
+            views = sliding_windows(prices, length)
+            runs = np.split(replayed, np.flatnonzero(np.diff(replayed) != 1) + 1)
+            batches = [slice(run[0], run[-1] + 1) for run in runs if len(run) >= REPLAY_RUN_WINDOWS]
+            scattered = np.concatenate([run for run in runs if len(run) < REPLAY_RUN_WINDOWS] + [np.empty(0, dtype=np.intp)])
+            if len(scattered):
+                batches += np.array_split(scattered, -(-len(scattered) * length // REPLAY_CHUNK_DAYS))
+            for batch in batches:
+                windows = views[batch]
+                signals = np.broadcast_to(np.int8(algorithms.BUY), windows.shape)
+                cash[batch], quantity[batch], _ = vectorized_algorithm_wrapper(windows, signals, start_cash, monthly_cash, exposure_type, exposure_value)
+    else:
+        raise ValueError(f"Unknown prefix sum pattern {pattern!r}")
+
+    stock_value = prices[starts + length - 1] * quantity
+    return [round(profit, 2) for profit in ((stock_value + cash - total_cash) / total_cash * 100).tolist()]
+
+_worker_arrays = {}
+
+def _share(array: np.ndarray) -> tuple[shared_memory.SharedMemory, tuple]:
+    block = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+    np.ndarray(array.shape, array.dtype, buffer=block.buf)[...] = array
+    return block, (block.name, array.dtype.str, array.shape)
+
+def _attach_worker(shared: dict, settings: dict):
+    for key, spec in shared.items():
+        if spec is None:
+            _worker_arrays[key] = None
+            continue
+        name, dtype, shape = spec
+        block = shared_memory.SharedMemory(name=name)
+        _worker_arrays[key + "_block"] = block
+        _worker_arrays[key] = np.ndarray(shape, dtype, buffer=block.buf)
+    _worker_arrays["settings"] = settings
+
+def _worker_profits(task: tuple[int, int, int]) -> tuple[int, list[float]]:
+    length, start, stop = task
+    profits = window_profits(_worker_arrays["prices"], _worker_arrays["signals"], length, slice(start, stop), **_worker_arrays["settings"])
+    return length, profits
+
+def _parallel_profits(prices: np.ndarray, series_signals: np.ndarray | None, lengths: list[int], settings: dict, workers: int, chunk_size: int) -> dict[int, list[float]]:
+    blocks = []
+    shared = {"prices": None, "signals": None}
+    try:
+        for key, array in (("prices", prices), ("signals", series_signals)):
+            if array is not None:
+                block, shared[key] = _share(array)
+                blocks.append(block)
+        tasks = [(length, start, min(start + chunk_size, len(prices) - length)) for length in lengths for start in range(0, len(prices) - length, chunk_size)]
+        profits = {length: [] for length in lengths}
+        with ProcessPoolExecutor(max_workers=workers, initializer=_attach_worker, initargs=(shared, settings)) as executor:
+            # map keeps task order, so every length gets its chunks back in window order
+            for length, chunk in executor.map(_worker_profits, tasks):
+                profits[length].extend(chunk)
+        return profits
+    finally:
+        for block in blocks:
+            block.close()
+            block.unlink()
+
+def average_profits(prices: np.ndarray, algorithm=algorithms.buy_and_hold, start_cash: float = 100000, monthly_cash: float = 0, exposure_type:str="fixed_fraction", exposure_value:float=0.1, workers: int = 1, chunk_size: int = 256, prefix_sums: bool = True) -> dict[int, float]:
+    """
+    Simulates `algorithm` over every window of every `window_lengths` length of a price history, without caching.
+
+    Args:
+        prices (np.ndarray): Prices in chronological order.
+        algorithm (function, optional): The trading algorithm to simulate. Defaults to `algorithms.buy_and_hold`.
+        start_cash (float, optional): The initial cash available for trading. Defaults to 100000.
+        monthly_cash (float, optional): The cash added to the account every month. Defaults to 0.
+        exposure_type (str, optional): The type of exposure to use ("fixed_fraction" or "fixed_quantity"). Defaults to "fixed_fraction".
+        exposure_value (float, optional): The value of exposure (fraction or quantity). Defaults to 0.1.
+        workers (int, optional): Number of worker processes, as for `simulate`. Defaults to 1.
+        chunk_size (int, optional): Number of start offsets per task in parallel mode. Defaults to 256.
+        prefix_sums (bool, optional): Compute strategies `prefix_sum_pattern` recognises with `prefix_sum_profits`.
+            Defaults to True.
+
+    Returns:
+        dict[int, float]: The average profit percentage per window length, rounded to 2 decimals.
+    """
+    lengths = window_lengths(len(prices))
+    settings = dict(algorithm=algorithm, start_cash=start_cash, monthly_cash=monthly_cash, exposure_type=exposure_type, exposure_value=exposure_value)
+    pattern = prefix_sum_pattern(algorithm, exposure_type) if prefix_sums else None
+    batch = getattr(algorithm, "batch", None)
+    series_signals = batch(prices) if batch is not None and pattern is None else None
+    if pattern is not None:
+        profits = {i: prefix_sum_profits(prices, i, pattern, start_cash, monthly_cash, exposure_type, exposure_value) for i in lengths}
+    elif workers > 1:
+        profits = _parallel_profits(prices, series_signals, lengths, settings, workers, chunk_size)
+    else:
+        profits = {i: window_profits(prices, series_signals, i, **settings) for i in lengths}
+
+    results = {}
+    for i, result in profits.items():
+        results[i] = round(sum(result) / len(result), 2)
+    return results
+
+def simulate(algorithm=algorithms.buy_and_hold, start_cash: float = 100000, monthly_cash: float = 0, stock: str = 'full_s&p500.csv', exposure_type:str="fixed_fraction", exposure_value:float=0.1, workers: int = 1, chunk_size: int = 256, plot: bool | str = False, cache: bool = True, prefix_sums: bool = True) -> dict[int, float]:
     """
        Simulates the performance of a given stock trading algorithm over historical data.
 
@@ -104,36 +577,376 @@ def simulate(algorithm=algorithms.buy_and_hold, start_cash: float = 100000, mont
            stock (str, optional): The path to the CSV file containing historical stock data. Defaults to 'full_s&p500.csv'.
            exposure_type (str, optional): The type of exposure to use ("fixed_fraction" or "fixed_quantity"). Defaults to "fixed_fraction".
            exposure_value (float, optional): The value of exposure (fraction or quantity). Defaults to 0.1.
+           workers (int, optional): Number of worker processes; 1 runs serially in this process. With more, the
+               (window length, start offset) grid is split across a process pool that reads the prices from shared
+               memory, so the algorithm must be picklable. Defaults to 1.
+           chunk_size (int, optional): Number of start offsets per task in parallel mode. Defaults to 256.
+           plot (bool | str, optional): Draw the results with `plots.algorithm_plot`; a path renders them headless
+               into that PNG or SVG file instead of showing them. Defaults to False.
+           cache (bool, optional): Reuse and store results in `simulation_results`, keyed by a digest of the prices,
+               the strategy (code, parameters and rule), the engine settings, the window schedule and the simulator
+               source, so a changed file or strategy is simulated again. Strategies that read mutable global state
+               should pass False. Defaults to True.
+           prefix_sums (bool, optional): Compute strategies `prefix_sum_pattern` recognises with
+               `prefix_sum_profits` instead of replaying every window. Defaults to True.
 
        Returns:
            dict[int, float]: A dictionary where the keys are the number of days in the simulation window, and the values are the average profit percentages.
        """
-    data = get_csv_data(stock)
+    _, columns = get_csv_columns(stock)
+    prices = np.array(columns[::-1, 0])
+    lengths = window_lengths(len(prices))
+    pattern = prefix_sum_pattern(algorithm, exposure_type) if prefix_sums else None
+
+    results = None
+    if cache:
+        key = ResultCache.key(
+            "simulate", _engine_digest(), hashlib.sha1(prices.tobytes()).hexdigest(), _strategy_identity(algorithm),
+            start_cash, monthly_cash, exposure_type, exposure_value, lengths, pattern,
+        )
+        stored = simulation_results.get(key)
+        if stored is not None:
+            results = {int(i): profit for i, profit in stored.items()}
+
+    if results is None:
+        results = average_profits(prices, algorithm, start_cash, monthly_cash, exposure_type, exposure_value, workers, chunk_size, prefix_sums)
+        if cache:
+            simulation_results.put(key, results)
+    if plot:
+        algorithm_plot(results, plot if isinstance(plot, str) else None)
+    return results
+
+# Percentiles of the window profits reported by `distribution_statistics`
+PERCENTILES = (5, 25, 50, 75, 95)
+# Trading days per year, for annualizing volatility and the Sharpe ratio
+TRADING_DAYS = 252
+
+def window_risk(windows: np.ndarray, signals: np.ndarray, lengths: list[int], start_cash: float, monthly_cash: float, exposure_type:str="fixed_fraction", exposure_value:float=0.1) -> dict[str, np.ndarray]:
+    """
+    Simulates windows and measures the profit and risk of each as if it ended after each of `lengths` days.
+
+    The engine only looks back, so the first `length` days of a window are the window of that length, and every
+    length is read from the same daily history: drawdowns from running maxima, volatility from cumulative sums of
+    the returns. Risk is measured on daily returns net of contributions, (value - contribution) / previous value - 1,
+    so a deposit is not a gain; the maximum drawdown is the deepest fall of their compounded growth below its
+    running maximum.
+
+    Args:
+        windows (np.ndarray): Prices shaped (windows, days).
+        signals (np.ndarray): Signal codes with the shape of `windows`.
+        lengths (list[int]): Window lengths to measure, from 2 up to the number of days.
+        start_cash (float): The initial cash available for trading.
+        monthly_cash (float): The cash added to the account every month.
+        exposure_type (str, optional): The type of exposure to use ("fixed_fraction" or "fixed_quantity"). Defaults to "fixed_fraction".
+        exposure_value (float, optional): The value of exposure (fraction or quantity). Defaults to 0.1.
+
+    Returns:
+        dict[str, np.ndarray]: Shaped (windows, lengths): the `profit` percentage rounded like `window_profits`,
+        `max_drawdown` in percent, annualized `volatility` in percent and annualized `sharpe` ratio (risk-free rate
+        0, NaN while the value has not changed).
+    """
+    _, _, _, cash_history, owned_history, invested = vectorized_algorithm_wrapper(windows, signals, start_cash, monthly_cash, exposure_type, exposure_value, history=True)
+    # days first: the histories come out of the engine that way, and the running operations then go row by row
+    ends = np.asarray(lengths) - 1
+    prices, cash_history, owned_history = windows.T, cash_history.T, owned_history.T
+    total_cash = invested[ends, None]
+    profit = (prices[ends] * owned_history[ends] + cash_history[ends] - total_cash) / total_cash * 100
+    values = cash_history + owned_history * prices
+    with np.errstate(divide="ignore", invalid="ignore"):
+        returns = (values[1:] - np.diff(invested)[:, None]) / values[:-1] - 1
+        growth = np.cumprod(returns + 1, axis=0)
+        peaks = np.maximum(np.maximum.accumulate(growth, axis=0), 1)
+        drawdown = np.maximum.accumulate((peaks - growth) / peaks, axis=0)[ends - 1]
+        days = ends[:, None]
+        mean = np.cumsum(returns, axis=0)[ends - 1] / days
+        deviation = np.sqrt(np.maximum(np.cumsum(returns * returns, axis=0)[ends - 1] / days - mean * mean, 0))
+        sharpe = np.where(deviation > 0, mean / deviation, np.nan) * np.sqrt(TRADING_DAYS)
+    return {
+        "profit": np.array([round(value, 2) for value in profit.T.ravel().tolist()]).reshape(len(windows), len(ends)),
+        "max_drawdown": np.maximum(drawdown, 0).T * 100,
+        "volatility": deviation.T * np.sqrt(TRADING_DAYS) * 100,
+        "sharpe": sharpe.T,
+    }
+
+def distribution_statistics(windows: dict[str, np.ndarray], counts: np.ndarray) -> dict[str, np.ndarray]:
+    """
+    Summarizes the windows of every length at once.
+
+    Args:
+        windows (dict[str, np.ndarray]): `window_risk` measures shaped (lengths, offsets), padded with NaN past
+            `counts`.
+        counts (np.ndarray): The number of windows of each length.
+
+    Returns:
+        dict[str, np.ndarray]: One value per length: `mean` (the number `simulate` reports), `std`, `min`, a `p<q>`
+        for each of `PERCENTILES`, `max` and `win_rate` (share of windows with a profit) of the profits, the mean and
+        worst `max_drawdown`, and the mean `volatility` and `sharpe`.
+    """
+    profits = windows["profit"]
+    statistics = {
+        # summed in window order like `simulate`, so the means are the same numbers
+        "mean": np.array([round(sum(row[:count].tolist()) / count, 2) for row, count in zip(profits, counts.tolist())]),
+        "std": np.nanstd(profits, axis=1),
+        "min": np.fmin.reduce(profits, axis=1),
+    }
+    for percentile, values in zip(PERCENTILES, np.nanpercentile(profits, PERCENTILES, axis=1)):
+        statistics[f"p{percentile}"] = values
+    statistics["max"] = np.fmax.reduce(profits, axis=1)
+    statistics["win_rate"] = (profits > 0).sum(axis=1) / counts
+    statistics["mean_max_drawdown"] = _finite_mean(windows["max_drawdown"])
+    statistics["worst_max_drawdown"] = np.fmax.reduce(windows["max_drawdown"], axis=1)
+    statistics["volatility"] = _finite_mean(windows["volatility"])
+    statistics["sharpe"] = _finite_mean(windows["sharpe"])
+    return statistics
+
+def _finite_mean(values: np.ndarray) -> np.ndarray:
+    # mean of each row over its finite entries, NaN for a row without any (such as the Sharpe ratios of cash only)
+    finite = np.isfinite(values)
+    counts = finite.sum(axis=1)
+    return np.where(counts > 0, np.where(finite, values, 0).sum(axis=1) / np.maximum(counts, 1), np.nan)
+
+def simulate_distribution(algorithm=algorithms.buy_and_hold, start_cash: float = 100000, monthly_cash: float = 0, stock: str = 'full_s&p500.csv', exposure_type:str="fixed_fraction", exposure_value:float=0.1, batch_days: int = 2**21) -> dict:
+    """
+       Runs the `simulate` sweep and keeps every window instead of only the mean profit of each length.
+
+       Every start offset is simulated once, up to the longest length it has a window for, and `window_risk` reads
+       all of its windows from that history, so the sweep costs one pass over the (start, day) triangle.
+
+       Args:
+           algorithm (function, optional): The trading algorithm to simulate. Defaults to `algorithms.buy_and_hold`.
+           start_cash (float, optional): The initial cash available for trading. Defaults to 100000.
+           monthly_cash (float, optional): The cash added to the account every month. Defaults to 0.
+           stock (str, optional): The path to the CSV file containing historical stock data. Defaults to 'full_s&p500.csv'.
+           exposure_type (str, optional): The type of exposure to use ("fixed_fraction" or "fixed_quantity"). Defaults to "fixed_fraction".
+           exposure_value (float, optional): The value of exposure (fraction or quantity). Defaults to 0.1.
+           batch_days (int, optional): Days of history simulated together, which bounds memory (a few arrays of this
+               many floats). Defaults to 2**21.
+
+       Returns:
+           dict: `lengths` holds the window lengths and `counts` their numbers of windows; `windows` the
+           `window_risk` measures of every window, shaped (lengths, offsets) in `sliding_windows` order and padded
+           with NaN past `counts`; `statistics` the `distribution_statistics` of each length.
+       """
+    _, columns = get_csv_columns(stock)
+    prices = np.array(columns[::-1, 0])
+    lengths = window_lengths(len(prices))
+    counts = np.array([len(prices) - length for length in lengths], dtype=int)
+    measures = ("profit", "max_drawdown", "volatility", "sharpe")
+    windows = {name: np.full((len(lengths), int(counts.max()) if lengths else 0), np.nan) for name in measures}
+
+    if lengths:
+        longest = lengths[-1]
+        # the history is extended with flat, idle days, so every start can be simulated as one block; no window reads them
+        padded = np.concatenate([prices, np.full(longest, prices[-1])])
+        batch = getattr(algorithm, "batch", None)
+        series_signals = np.concatenate([batch(prices), np.full(longest, algorithms.HOLD, dtype=np.int8)]) if batch is not None else None
+        # every start some window has, newest first, so each block's oldest start has the most days
+        starts = np.arange(len(prices) - lengths[0], 0, -1)
+        block = max(batch_days // longest, 1)
+        for first in range(0, len(starts), block):
+            block_starts = starts[first:first + block]
+            days = min(len(prices) - int(block_starts[-1]), longest)
+            block_windows = np.lib.stride_tricks.sliding_window_view(padded, days)[block_starts]
+            if series_signals is None:
+                signals = strategy_signals(block_windows, algorithm)
+            else:
+                # past the warmup a window sees the same signals as the full series, only its first days are recomputed
+                signals = np.array(np.lib.stride_tricks.sliding_window_view(series_signals, days)[block_starts])
+                warmup = min(batch.warmup(), days)
+                signals[:, :warmup] = batch(block_windows[:, :warmup])
+            rows = [row for row, length in enumerate(lengths) if length <= days]
+            results = window_risk(block_windows, signals, [lengths[row] for row in rows], start_cash, monthly_cash, exposure_type, exposure_value)
+            for column, row in enumerate(rows):
+                fits = block_starts + lengths[row] <= len(prices)
+                # `sliding_windows` puts the window starting at `start` at position len(prices) - length - start
+                positions = len(prices) - lengths[row] - block_starts[fits]
+                for name in measures:
+                    windows[name][row, positions] = results[name][fits, column]
+    return {
+        "lengths": np.array(lengths),
+        "counts": counts,
+        "windows": windows,
+        "statistics": distribution_statistics(windows, counts),
+    }
+
+def _portfolio_columns(prices: np.ndarray, algorithm, start_cash: float, monthly_cash: float, exposure_type: str, exposure_value: float) -> tuple:
+    signals = strategy_signals(prices, algorithm)
+    cash, owned_quantity, total_cash, cash_history, owned_history, _ = vectorized_algorithm_wrapper(prices, signals, start_cash, monthly_cash, exposure_type, exposure_value, history=True)
+    return cash, owned_quantity, total_cash, (cash_history + owned_history * prices).sum(axis=0)
+
+def simulate_portfolio(prices, algorithm=algorithms.buy_and_hold, start_cash: float = 100000, monthly_cash: float = 0, exposure_type:str="fixed_fraction", exposure_value:float=0.1, workers: int = 1, chunk_size: int = 64) -> dict:
+    """
+       Simulates a trading algorithm on many symbols at once, with the cash split equally between them.
+
+       Every symbol is its own account that starts with `start_cash / symbols` and receives `monthly_cash / symbols`
+       every 21 days; the accounts are advanced together as the batch axis of `vectorized_algorithm_wrapper`.
+
+       Args:
+           prices (pd.DataFrame | np.ndarray): Chronological prices shaped (days, symbols) without gaps, such as
+               `api_data.get_price_matrix`; the columns of a DataFrame name the symbols.
+           algorithm (function, optional): The trading algorithm to simulate. Defaults to `algorithms.buy_and_hold`.
+           start_cash (float, optional): The initial cash of the whole portfolio. Defaults to 100000.
+           monthly_cash (float, optional): The cash added to the whole portfolio every month. Defaults to 0.
+           exposure_type (str, optional): The type of exposure to use ("fixed_fraction" or "fixed_quantity"). Defaults to "fixed_fraction".
+           exposure_value (float, optional): The value of exposure (fraction or quantity). Defaults to 0.1.
+           workers (int, optional): Number of worker processes; with more than 1, chunks of `chunk_size` symbols are
+               simulated in a process pool, so the algorithm must be picklable. Defaults to 1.
+           chunk_size (int, optional): Number of symbols per task in parallel mode. Defaults to 64.
+
+       Returns:
+           dict: `symbols` maps each symbol to its final value, profit percentage, shares owned and cash remaining;
+           `final_value`, `total_invested` and `profit_percentage` describe the whole portfolio and `value_history`
+           holds its value at the end of every day.
+       """
+    symbols = [str(symbol) for symbol in getattr(prices, "columns", range(np.shape(prices)[1]))]
+    # one contiguous row per symbol, time on the last axis as the engine expects
+    columns = np.ascontiguousarray(np.asarray(prices, dtype=float).T)
+    run = functools.partial(_portfolio_columns, algorithm=algorithm, start_cash=start_cash / len(symbols), monthly_cash=monthly_cash / len(symbols), exposure_type=exposure_type, exposure_value=exposure_value)
+
+    if workers > 1:
+        chunks = [columns[start:start + chunk_size] for start in range(0, len(columns), chunk_size)]
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            parts = list(executor.map(run, chunks))
+        cash = np.concatenate([part[0] for part in parts])
+        owned_quantity = np.concatenate([part[1] for part in parts])
+        total_cash = parts[0][2]
+        value_history = np.sum([part[3] for part in parts], axis=0)
+    else:
+        cash, owned_quantity, total_cash, value_history = run(columns)
+
+    values = cash + owned_quantity * columns[:, -1]
     results = {}
-    for i in range(10, int(round(len(data) * 0.9, 0)), 10):
-        if i > 100 and i % 50 != 0:
-            continue
-        if i > 300 and i % 100 != 0:
+    for symbol, value, quantity, remaining in zip(symbols, values.tolist(), owned_quantity.tolist(), cash.tolist()):
+        results[symbol] = {
+            "final_value": round(value, 2),
+            "profit_percentage": round((value - total_cash) / total_cash * 100, 2),
+            "shares_owned": round(quantity, 4),
+            "cash_remaining": round(remaining, 2),
+        }
+    final_value = float(values.sum())
+    invested = total_cash * len(symbols)
+    return {
+        "symbols": results,
+        "final_value": round(final_value, 2),
+        "total_invested": round(invested, 2),
+        "profit_percentage": round((final_value - invested) / invested * 100, 2),
+        "value_history": value_history,
+    }
+
+def _account_run(prices: np.ndarray, signals: np.ndarray, cash: float, owned_quantity: float, monthly_cash: float, exposure_type: str, exposure_value: float, day_offset: int) -> tuple[float, float]:
+    # `vectorized_algorithm_wrapper` for a single series in plain floats, which is far cheaper per event than
+    # operations on 0-d arrays; the arithmetic is the same, so are the results
+    days = np.arange(day_offset, day_offset + len(prices))
+    event_days = np.flatnonzero((signals != algorithms.HOLD) | ((days % 21 == 0) & (days > 0)))
+    for i, price, signal in zip(event_days.tolist(), prices[event_days].tolist(), signals[event_days].tolist()):
+        if (i + day_offset) % 21 == 0 and i + day_offset > 0:
+            cash = cash + monthly_cash
+
+        match exposure_type:
+            case "fixed_fraction":
+                order_quantity = cash * exposure_value/price
+            case "fixed_quantity":
+                order_quantity = exposure_value
+            case _:
+                order_quantity = 1
+
+        cost = price * order_quantity
+        if signal == algorithms.BUY and cash >= cost:
+            cash = cash - cost
+            owned_quantity = owned_quantity + order_quantity
+        elif signal == algorithms.SELL and owned_quantity >= order_quantity:
+            cash = cash + cost
+            owned_quantity = owned_quantity - order_quantity
+    return cash, owned_quantity
+
+def simulate_stream(batches, algorithm=algorithms.buy_and_hold, start_cash: float = 100000, monthly_cash: float = 0, exposure_type:str="fixed_fraction", exposure_value:float=0.1, column: int = 0) -> dict:
+    """
+       Simulates a trading algorithm over one price history that arrives in batches, without holding all of it.
+
+       This is `algorithm_wrapper` over the whole history, run batch by batch: the cash and quantity owned are carried
+       from one batch to the next, and each batch is preceded by the last `warmup` prices of the history so far, which
+       is all the batch form of the algorithm looks back at. The results are the same numbers as one run over the
+       concatenated prices, while memory stays proportional to one batch.
+
+       Args:
+           batches (Iterable[tuple[np.ndarray, np.ndarray]]): Chronological (times, values) batches, such as
+               `csv_data.iter_csv_batches` over a file sorted oldest first. Investing.com exports (and
+               `benchmarks.synthetic.write_price_csv` files) are newest first and have to be reversed first; a
+               stream whose times do not increase raises ValueError rather than being simulated backwards.
+           algorithm (function, optional): The trading algorithm to simulate; it needs a batch form registered with
+               `algorithms.batch_of`. Defaults to `algorithms.buy_and_hold`.
+           start_cash (float, optional): The initial cash available for trading. Defaults to 100000.
+           monthly_cash (float, optional): The cash added to the account every 21 bars. Defaults to 0.
+           exposure_type (str, optional): The type of exposure to use ("fixed_fraction" or "fixed_quantity"). Defaults to "fixed_fraction".
+           exposure_value (float, optional): The value of exposure (fraction or quantity). Defaults to 0.1.
+           column (int, optional): The value column holding the price. Defaults to 0 (Price in Investing.com files).
+
+       Returns:
+           dict: `final_value`, `total_invested`, `profit_percentage`, `cash`, `shares_owned` and the number of `bars`.
+       """
+    batch = getattr(algorithm, "batch", None)
+    if batch is None:
+        raise ValueError(f"{algorithm.__name__} has no batch form to stream with")
+    warmup = batch.warmup()
+    cash, owned_quantity, invested = float(start_cash), 0.0, float(start_cash)
+    days = 0
+    history = np.empty(0)
+    price = np.nan
+    last_time = None
+    for times, values in batches:
+        prices = np.asarray(values[:, column], dtype=float)
+        if not len(prices):
             continue
-        if i > 1000 and i % 200 != 0:
+        times = np.asarray(times)
+        if (np.diff(times) <= 0).any() or (last_time is not None and times[0] <= last_time):
+            raise ValueError("simulate_stream needs batches in chronological order (oldest first) with increasing times")
+        last_time = times[-1]
+        # the signals of the carried prices were used with the previous batch; only the new days are traded
+        signals = batch(np.concatenate([history, prices]))[len(history):]
+        cash, owned_quantity = _account_run(prices, signals, cash, owned_quantity, monthly_cash, exposure_type, exposure_value, days)
+        day_numbers = np.arange(days, days + len(prices))
+        contributions = np.count_nonzero((day_numbers % 21 == 0) & (day_numbers > 0))
+        invested = float(np.cumsum([invested] + [monthly_cash] * contributions)[-1])
+        days += len(prices)
+        history = np.concatenate([history, prices])[-warmup:] if warmup else history
+        price = prices[-1]
+    value = cash + owned_quantity * price if days else cash
+    return {
+        "final_value": round(value, 2),
+        "total_invested": round(invested, 2),
+        "profit_percentage": round((value - invested) / invested * 100, 2),
+        "cash": round(cash, 2),
+        "shares_owned": round(owned_quantity, 4),
+        "bars": days,
+    }
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Simulate trading algorithms over every window length of a price history.")
+    parser.add_argument("algorithms", nargs="*", default=["buy_after_3_consecutive_down_days", "buy_everyday", "buy_and_hold", "reversal_after_a_decline"], help="names of strategies in algorithms.py")
+    parser.add_argument("--stock", default="full_s&p500.csv", help="CSV file with historical prices")
+    parser.add_argument("--exposure-value", type=float, help="exposure value; buy_and_hold defaults to 1, the others to 0.1")
+    parser.add_argument("--workers", type=int, default=1, help="worker processes")
+    parser.add_argument("--plot", action="store_true", help="plot the results of each algorithm")
+    parser.add_argument("--plot-dir", help="render the plots headless into <algorithm>.png files in this directory instead of showing them")
+    parser.add_argument("--no-cache", action="store_true", help="simulate again instead of reusing stored results")
+    parser.add_argument("--distribution", action="store_true", help="print the profit distribution and risk of every window length")
+    args = parser.parse_args()
+    if args.plot_dir:
+        os.makedirs(args.plot_dir, exist_ok=True)
+
+    for name in args.algorithms:
+        exposure_value = args.exposure_value if args.exposure_value is not None else (1 if name == "buy_and_hold" else 0.1)
+        if args.distribution:
+            distribution = simulate_distribution(getattr(algorithms, name), stock=args.stock, exposure_value=exposure_value)
+            statistics = distribution["statistics"]
+            print(name)
+            widths = [max(len(statistic), 7) + 2 for statistic in statistics]
+            print("days  " + "".join(f"{statistic:>{width}}" for statistic, width in zip(statistics, widths)))
+            for row, length in enumerate(distribution["lengths"].tolist()):
+                print(f"{length:<6}" + "".join(f"{values[row]:>{width}.2f}" for values, width in zip(statistics.values(), widths)))
             continue
-        result = []
-        for j in range((len(data) - i)):
-            start = j
-            prices = [float(e[1]) for e in reversed(data[start: start + i])]
-            cash, quantity, total_cash = algorithm_wrapper(prices, start_cash, monthly_cash, algorithm, exposure_type, exposure_value)
-            stock_value = prices[-1] * quantity
-            profit = round((stock_value + cash - total_cash) / total_cash * 100, 2)
-            result.append(profit)
-        results[i] = round(sum(result) / len(result), 2)
-    algorithm_plot(results)
-    return results
-#tests:
-print(simulate(algorithms.buy_after_3_consecutive_down_days))
-print(simulate(algorithms.buy_everyday))
-print(simulate(exposure_value=1))
-# print(simulate(algorithms.moving_average_crossover))
-print(simulate(algorithms.reversal_after_a_decline))
-
-# data = get_csv_data("full_s&p500.csv")
-# stock_plot([float(e[1]) for i, e in enumerate(reversed(data)) if i % 30 == 0], [e[0] for i, e in enumerate(reversed(data)) if i % 30 == 0])
+        plot = os.path.join(args.plot_dir, f"{name}.png") if args.plot_dir else args.plot
+        print(name, simulate(getattr(algorithms, name), stock=args.stock, exposure_value=exposure_value, workers=args.workers, plot=plot, cache=not args.no_cache))
+
+    # data = get_csv_data("full_s&p500.csv")
+    # stock_plot([float(e[1]) for i, e in enumerate(reversed(data)) if i % 30 == 0], [e[0] for i, e in enumerate(reversed(data)) if i % 30 == 0])
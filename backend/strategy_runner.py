@@ -0,0 +1,148 @@
+import math
+import multiprocessing
+import os
+import signal
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+import numpy as np
+
+from simulator import average_profits, fused_signals, vectorized_algorithm_wrapper
+import algorithms
+
+try:
+    import resource
+except ImportError:  # not available on Windows; backtests then run without a CPU limit
+    resource = None
+
+# Strategies compared on the dashboard: id -> (algorithm, fraction of cash per order, name, description)
+STRATEGIES = {
+    "buy_and_hold": (algorithms.buy_and_hold, 1.0, "Kup i Trzymaj", "Jednorazowy zakup na początku i długoterminowe trzymanie"),
+    "buy_everyday": (algorithms.buy_everyday, 0.1, "DCA - Dollar Cost Averaging", "Regularne zakupy w stałych odstępach czasu"),
+    "buy_after_3_down": (algorithms.buy_after_3_consecutive_down_days, 0.1, "3 Dni Spadków", "Kupuj po trzech kolejnych dniach spadków"),
+    "buy_the_dip": (algorithms.buy_the_dip, 0.1, "Kup na Spadku", "Kupuj gdy cena spadnie o 5% od ostatniego szczytu"),
+}
+
+# Trading days simulated, the most recent year
+SIMULATION_DAYS = 252
+
+# CPU seconds one backtest request may use in its worker process
+STRATEGY_CPU_SECONDS = float(os.getenv("STRATEGY_CPU_SECONDS", "5"))
+# Worker processes running backtests
+STRATEGY_WORKERS = int(os.getenv("STRATEGY_WORKERS", "2"))
+
+_pool = None
+_pool_lock = threading.Lock()
+
+class CPUBudgetExceeded(Exception):
+    """Raised when a backtest uses up its CPU time budget"""
+
+def run_strategies(symbol: str, dates: list[str], prices: np.ndarray, start_cash: float, monthly_cash: float) -> dict:
+    """
+    Backtest every dashboard strategy over the last SIMULATION_DAYS prices.
+
+    Returns the payload the frontend's strategy comparison expects: per strategy its final value,
+    amount invested, profit, shares and cash left, and the portfolio value at the end of every day.
+    """
+    prices = np.asarray(prices, dtype=float)[-SIMULATION_DAYS:]
+    dates = list(dates)[-SIMULATION_DAYS:]
+
+    strategies = []
+    # the strategies' shared indicators are computed once for all of them
+    all_signals = fused_signals(prices, [algorithm for algorithm, *_ in STRATEGIES.values()])
+    for signals, (strategy_id, (algorithm, exposure_value, name, description)) in zip(all_signals, STRATEGIES.items()):
+        cash, owned, invested, cash_history, owned_history, invested_history = vectorized_algorithm_wrapper(
+            prices, signals, start_cash, monthly_cash, "fixed_fraction", exposure_value, history=True
+        )
+        values = cash_history + owned_history * prices
+        profit = float(values[-1]) - invested
+        history = zip(dates, np.round(values, 2).tolist(), np.round(invested_history, 2).tolist(), np.round(values - invested_history, 2).tolist())
+        strategies.append({
+            "id": strategy_id,
+            "name": name,
+            "description": description,
+            "final_value": round(float(values[-1]), 2),
+            "total_invested": round(invested, 2),
+            "profit": round(profit, 2),
+            "profit_percentage": round(profit / invested * 100, 2) if invested > 0 else 0,
+            "shares_owned": round(float(owned), 4),
+            "cash_remaining": round(float(cash), 2),
+            "portfolio_history": [
+                {"date": date, "value": value, "invested": total, "profit": gain} for date, value, total, gain in history
+            ],
+        })
+
+    return {
+        "success": True,
+        "strategies": strategies,
+        "symbol": symbol,
+        "start_cash": start_cash,
+        "monthly_cash": monthly_cash,
+        "simulation_days": len(prices),
+    }
+
+def run_profits(prices: np.ndarray, strategy_id: str, start_cash: float, monthly_cash: float) -> dict[int, float]:
+    """
+    Average profit per window length of a dashboard strategy over a daily price history, as `simulate` reports it.
+    """
+    algorithm, exposure_value, *_ = STRATEGIES[strategy_id]
+    return average_profits(np.asarray(prices, dtype=float), algorithm, start_cash, monthly_cash, "fixed_fraction", exposure_value)
+
+def _on_cpu_limit(signum, frame):
+    raise CPUBudgetExceeded(f"Backtest exceeded its CPU budget of {STRATEGY_CPU_SECONDS:g}s")
+
+def _init_worker():
+    if resource is not None:
+        signal.signal(signal.SIGXCPU, _on_cpu_limit)
+
+def _run_with_cpu_budget(func, *args):
+    """Call `func` with the process's CPU limit set STRATEGY_CPU_SECONDS past what it has used so far"""
+    if resource is None:
+        return func(*args)
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    soft, hard = resource.getrlimit(resource.RLIMIT_CPU)
+    limit = math.ceil(usage.ru_utime + usage.ru_stime + STRATEGY_CPU_SECONDS)
+    if hard != resource.RLIM_INFINITY:
+        limit = min(limit, hard)
+    resource.setrlimit(resource.RLIMIT_CPU, (limit, hard))
+    try:
+        return func(*args)
+    finally:
+        resource.setrlimit(resource.RLIMIT_CPU, (soft, hard))
+
+def _backtest_pool() -> ProcessPoolExecutor:
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            # spawn, not fork: the API server process has threads running
+            _pool = ProcessPoolExecutor(
+                max_workers=STRATEGY_WORKERS, mp_context=multiprocessing.get_context("spawn"), initializer=_init_worker
+            )
+        return _pool
+
+def run_strategies_limited(symbol: str, dates: list[str], prices: np.ndarray, start_cash: float, monthly_cash: float) -> dict:
+    """
+    Run run_strategies in a worker process, blocking until it finishes.
+
+    Raises CPUBudgetExceeded when the backtest takes more than STRATEGY_CPU_SECONDS of CPU time.
+    """
+    return _run_limited(run_strategies, symbol, dates, prices, start_cash, monthly_cash)
+
+def run_profits_limited(prices: np.ndarray, strategy_id: str, start_cash: float, monthly_cash: float) -> dict[int, float]:
+    """
+    Run run_profits in a worker process under the same CPU budget as run_strategies_limited.
+    """
+    return _run_limited(run_profits, prices, strategy_id, start_cash, monthly_cash)
+
+def _run_limited(func, *args):
+    global _pool
+    pool = _backtest_pool()
+    try:
+        return pool.submit(_run_with_cpu_budget, func, *args).result()
+    except BrokenProcessPool:
+        # a worker was killed (e.g. at the hard CPU limit); start a fresh pool for the next request
+        with _pool_lock:
+            if _pool is pool:
+                _pool = None
+        raise CPUBudgetExceeded("Backtest worker was terminated")
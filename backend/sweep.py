@@ -0,0 +1,215 @@
+import argparse
+import ast
+import itertools
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from csv_data import get_csv_columns
+from simulator import fused_signals, sliding_windows, window_lengths, window_profits, window_signals
+import algorithms
+
+# Grid keys consumed by the engine; every other key is passed to the strategy itself.
+ENGINE_PARAMS = ("start_cash", "monthly_cash", "exposure_type", "exposure_value")
+ENGINE_DEFAULTS = {"start_cash": 100000, "monthly_cash": 0, "exposure_type": "fixed_fraction", "exposure_value": 0.1}
+
+# Finished results, keyed by data file (path, mtime, size), strategy, strategy parameters and engine settings.
+_finished: dict[tuple, dict[int, float]] = {}
+
+_worker_prices = {}
+
+def expand_grid(grid: dict[str, list]) -> list[dict]:
+    """
+    Expands a parameter grid into every combination.
+
+    Args:
+        grid (dict[str, list]): Candidate values per parameter name.
+
+    Returns:
+        list[dict]: One dict of parameter values per combination.
+    """
+    names = list(grid)
+    return [dict(zip(names, values)) for values in itertools.product(*(grid[name] for name in names))]
+
+def _split(combination: dict) -> tuple[dict, dict]:
+    strategy_params = {k: v for k, v in combination.items() if k not in ENGINE_PARAMS}
+    engine_params = {**ENGINE_DEFAULTS, **{k: v for k, v in combination.items() if k in ENGINE_PARAMS}}
+    return strategy_params, engine_params
+
+def _hashable(value):
+    # grids parsed from the CLI hold lists, e.g. lookback_windows=[[20, 5], [50, 10]]
+    if isinstance(value, (list, tuple)):
+        return tuple(_hashable(item) for item in value)
+    if isinstance(value, dict):
+        return tuple(sorted((name, _hashable(item)) for name, item in value.items()))
+    return value
+
+def _cache_key(data_key: tuple, algorithm, strategy_params: dict, engine_params: dict) -> tuple:
+    return data_key, algorithm.__module__, algorithm.__name__, _hashable(strategy_params), _hashable(engine_params)
+
+def _run_groups(prices: np.ndarray, algorithm, groups: list[tuple[dict, list[dict]]]) -> list[list[dict[int, float]]]:
+    """
+    Simulates every engine setting of every set of strategy parameters.
+
+    The rules of all the parameter sets are compiled into one `rules.Program` (`fused_signals`), so indicators that
+    do not depend on a swept parameter, such as the rolling high of buy_the_dip for every dip_threshold or a moving
+    average shared by several lookback_windows pairs, are computed once: over the whole history, and per window
+    length over the first days of the windows, which depend on where a window starts, each indicator only for as
+    many days as the longest warmup using it. The signals of a set of strategy parameters are then reused by every
+    exposure/cash setting of it.
+    """
+    strategies = [algorithms.with_params(algorithm, **strategy_params) for strategy_params, _ in groups]
+    batched = getattr(algorithm, "batch", None) is not None
+    all_series_signals = fused_signals(prices, strategies) if batched else [None] * len(strategies)
+    results = [[{} for _ in engine_settings] for _, engine_settings in groups]
+    for length in window_lengths(len(prices)):
+        if batched:
+            warmups = [min(strategy.batch.warmup(), length) for strategy in strategies]
+            heads = fused_signals(sliding_windows(prices, length)[:, :max(warmups)], strategies, warmups) if max(warmups) else None
+        for index, ((_, engine_settings), strategy, series_signals) in enumerate(zip(groups, strategies, all_series_signals)):
+            if series_signals is None:
+                signals = window_signals(prices, None, length, algorithm=strategy)
+            else:
+                # past the warmup a window sees the same signals as the full series
+                signals = np.array(sliding_windows(series_signals, length))
+                if warmups[index]:
+                    signals[:, :warmups[index]] = heads[index][:, :warmups[index]]
+            for result, settings in zip(results[index], engine_settings):
+                profits = window_profits(prices, series_signals, length, algorithm=strategy, signals=signals, **settings)
+                result[length] = round(sum(profits) / len(profits), 2)
+    return results
+
+def _attach_prices(prices: np.ndarray):
+    _worker_prices["prices"] = prices
+
+def _worker_groups(task: tuple) -> list[list[dict[int, float]]]:
+    algorithm, groups = task
+    return _run_groups(_worker_prices["prices"], algorithm, groups)
+
+def score(results: dict[int, float], rank_by: str | int = "mean") -> float:
+    """
+    Reduces the results of one simulation to the number a sweep is ranked by.
+
+    Args:
+        results (dict[int, float]): Average profit per window length, as returned by `simulate`.
+        rank_by (str | int, optional): "mean" for the mean over all window lengths, "min" for the worst window
+            length, or a window length to rank by its profit alone. Defaults to "mean".
+
+    Returns:
+        float: The score, higher is better.
+    """
+    if rank_by == "mean":
+        return round(sum(results.values()) / len(results), 2)
+    if rank_by == "min":
+        return min(results.values())
+    return results[int(rank_by)]
+
+def sweep(algorithm, grid: dict[str, list], stock: str = 'full_s&p500.csv', rank_by: str | int = "mean", workers: int = 1) -> list[dict]:
+    """
+    Simulates every combination of a parameter grid and ranks the combinations.
+
+    Args:
+        algorithm (function): The trading algorithm to sweep.
+        grid (dict[str, list]): Candidate values per parameter. Keys named like the `simulate` arguments
+            (`start_cash`, `monthly_cash`, `exposure_type`, `exposure_value`) configure the engine, every other key is a
+            keyword parameter of the algorithm (e.g. `dip_threshold`, `lookback_windows`, `downtrend_length`).
+        stock (str, optional): The path to the CSV file containing historical stock data. Defaults to 'full_s&p500.csv'.
+        rank_by (str | int, optional): How to score a combination, see `score`. Defaults to "mean".
+        workers (int, optional): Number of worker processes, each simulating a share of the sets of strategy
+            parameters with their rules compiled together; combinations that share strategy parameters always run
+            in the same process. Defaults to 1.
+
+    Returns:
+        list[dict]: One row per combination, best first, with `rank`, `params`, `score` and `results` (the
+        `simulate` dict for that combination).
+    """
+    stat = os.stat(stock)
+    data_key = (os.path.abspath(stock), stat.st_mtime_ns, stat.st_size)
+    combinations = expand_grid(grid)
+
+    groups: dict[tuple, tuple[dict, list[dict]]] = {}
+    for combination in combinations:
+        strategy_params, engine_params = _split(combination)
+        if _cache_key(data_key, algorithm, strategy_params, engine_params) in _finished:
+            continue
+        group = groups.setdefault(_hashable(strategy_params), (strategy_params, []))
+        if engine_params not in group[1]:
+            group[1].append(engine_params)
+
+    if groups:
+        _, columns = get_csv_columns(stock)
+        prices = np.array(columns[::-1, 0])
+        pending = list(groups.values())
+        if workers > 1:
+            # every worker fuses the rules of its share of the groups
+            shares = [pending[i::workers] for i in range(min(workers, len(pending)))]
+            with ProcessPoolExecutor(max_workers=len(shares), initializer=_attach_prices, initargs=(prices,)) as executor:
+                finished = [results for share_results in executor.map(_worker_groups, [(algorithm, share) for share in shares]) for results in share_results]
+            pending = [group for share in shares for group in share]
+        else:
+            finished = _run_groups(prices, algorithm, pending)
+        for (strategy_params, engine_settings), group_results in zip(pending, finished):
+            for engine_params, results in zip(engine_settings, group_results):
+                _finished[_cache_key(data_key, algorithm, strategy_params, engine_params)] = results
+
+    rows = []
+    for combination in combinations:
+        results = _finished[_cache_key(data_key, algorithm, *_split(combination))]
+        rows.append({"params": combination, "score": score(results, rank_by), "results": results})
+    rows.sort(key=lambda row: row["score"], reverse=True)
+    for rank, row in enumerate(rows, 1):
+        row["rank"] = rank
+    return rows
+
+def format_table(rows: list[dict], limit: int | None = None) -> str:
+    """
+    Formats ranked sweep rows as a plain-text table.
+
+    Args:
+        rows (list[dict]): Rows returned by `sweep`.
+        limit (int | None, optional): Print only the best `limit` rows. Defaults to all of them.
+
+    Returns:
+        str: The table, one combination per line.
+    """
+    rows = rows[:limit]
+    names = list(rows[0]["params"]) if rows else []
+    header = ["rank", *names, "score", "best window", "worst window"]
+    lines = []
+    for row in rows:
+        results = row["results"]
+        best = max(results, key=results.get)
+        worst = min(results, key=results.get)
+        lines.append([str(row["rank"]), *(str(row["params"][name]) for name in names), f"{row['score']:.2f}", f"{best}d {results[best]:+.2f}%", f"{worst}d {results[worst]:+.2f}%"])
+    widths = [max(len(cell) for cell in column) for column in zip(header, *lines)]
+    return "\n".join("  ".join(cell.ljust(width) for cell, width in zip(line, widths)) for line in [header, *lines])
+
+def parse_grid(entries: list[str]) -> dict[str, list]:
+    """
+    Parses `name=values` CLI entries, where values is a Python literal list or a single literal.
+
+    Example: `dip_threshold=[0.03, 0.05]`, `lookback_windows=[(20, 5), (50, 10)]`, `exposure_type=fixed_quantity`.
+    """
+    grid = {}
+    for entry in entries:
+        name, _, text = entry.partition("=")
+        try:
+            values = ast.literal_eval(text)
+        except (ValueError, SyntaxError):
+            values = text
+        grid[name.strip()] = values if isinstance(values, list) else [values]
+    return grid
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Rank every combination of strategy and exposure parameters.")
+    parser.add_argument("algorithm", help="name of a strategy in algorithms.py, e.g. buy_the_dip")
+    parser.add_argument("--grid", action="append", default=[], metavar="NAME=VALUES", help="parameter and its candidate values, e.g. dip_threshold=[0.03,0.05]; repeatable")
+    parser.add_argument("--stock", default="full_s&p500.csv", help="CSV file with historical prices")
+    parser.add_argument("--rank-by", default="mean", help='"mean", "min" or a window length in days')
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="worker processes")
+    parser.add_argument("--top", type=int, default=20, help="number of rows to print")
+    args = parser.parse_args()
+
+    rows = sweep(getattr(algorithms, args.algorithm), parse_grid(args.grid), args.stock, args.rank_by, args.workers)
+    print(format_table(rows, args.top))
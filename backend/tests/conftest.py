@@ -0,0 +1,16 @@
+import os
+import sys
+
+import pytest
+
+# the backend modules are imported by their flat names, as the server and scripts do
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import csv_data
+
+@pytest.fixture(autouse=True)
+def cache_dir(tmp_path, monkeypatch):
+    """Keeps the .npy price cache of every test out of backend/price_cache"""
+    directory = tmp_path / "price_cache"
+    monkeypatch.setattr(csv_data, "CACHE_DIR", str(directory))
+    return directory
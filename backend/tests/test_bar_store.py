@@ -0,0 +1,58 @@
+import pandas as pd
+import pytest
+
+from bar_store import COLUMNS, BarStore, interval_offset
+
+NOW = pd.Timestamp("2024-06-03 12:00")
+
+def fetch(symbol, interval, period=None, start=None):
+    timestamps = pd.date_range(end=NOW.normalize(), periods=5, freq="D")
+    return pd.DataFrame({"timestamp": timestamps, "open": 1.0, "high": 2.0, "low": 0.5, "close": 1.5, "volume": 10.0})[COLUMNS]
+
+def test_least_recently_used_series_are_evicted_and_reloaded_from_disk(tmp_path):
+    store = BarStore(fetch, directory=str(tmp_path), clock=lambda: NOW, max_series=2)
+    for symbol in ("A", "B", "A", "C"):
+        store.read(symbol, "1d", "1mo")
+    assert list(store._series) == [("A", "1d"), ("C", "1d")]
+    assert store.full_fetches == 3
+
+    bars = store.read("B", "1d", "1mo")
+    assert len(bars) == 5
+    # the evicted series came back from its file, not from a full fetch
+    assert store.full_fetches == 3
+    assert list(store._series) == [("C", "1d"), ("B", "1d")]
+
+class Clock:
+    def __init__(self, now: pd.Timestamp):
+        self.now = now
+
+    def __call__(self) -> pd.Timestamp:
+        return self.now
+
+def test_tail_is_fetched_only_once_the_last_bar_is_an_interval_old(tmp_path):
+    clock = Clock(NOW)
+    store = BarStore(fetch, directory=str(tmp_path), clock=clock)
+    store.read("A", "1d", "1mo")
+    assert (store.full_fetches, store.tail_fetches) == (1, 0)
+
+    # the last bar is from today, so no later daily bar can exist yet; a new store reads it from disk
+    assert len(store.read("A", "1d", "1mo")) == 5
+    assert len(BarStore(lambda *args, **kwargs: pytest.fail("fetched a fresh series"), directory=str(tmp_path), clock=clock).read("A", "1d")) == 5
+    assert store.tail_fetches == 0
+
+    clock.now = NOW.normalize() + pd.Timedelta(days=1)
+    store.read("A", "1d", "1mo")
+    assert store.tail_fetches == 1
+
+def test_zero_max_age_always_fetches_the_tail(tmp_path):
+    store = BarStore(fetch, directory=str(tmp_path), clock=lambda: NOW)
+    for _ in range(3):
+        store.read("A", "1d", "1mo", max_age=pd.Timedelta(0))
+    assert (store.full_fetches, store.tail_fetches) == (1, 2)
+
+def test_interval_offset():
+    assert interval_offset("5m") == pd.DateOffset(minutes=5)
+    assert interval_offset("1h") == pd.DateOffset(hours=1)
+    assert interval_offset("1wk") == pd.DateOffset(weeks=1)
+    assert interval_offset("3mo") == pd.DateOffset(months=3)
+    assert interval_offset("bogus") is None
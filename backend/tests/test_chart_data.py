@@ -0,0 +1,77 @@
+import json
+
+import numpy as np
+import pytest
+
+from benchmarks.synthetic import synthetic_ohlcv
+from chart_data import (chart_columns, columnar_response_json, downsample_columns, lttb_indices, ohlc_buckets,
+                        stock_response_json, stream_ndjson, stream_stock_response)
+
+@pytest.fixture(scope="module")
+def columns():
+    return chart_columns(synthetic_ohlcv(1000, seed=2), "all")
+
+@pytest.fixture(scope="module")
+def intraday_columns():
+    return chart_columns(synthetic_ohlcv(900, intraday=True, seed=3), "1d")
+
+@pytest.mark.parametrize("max_points", [3, 10, 137, 999])
+def test_lttb_keeps_the_ends_and_returns_max_points(columns, max_points):
+    kept = lttb_indices(columns["timestamp"], columns["close"], max_points)
+    assert len(kept) == max_points
+    assert kept[0] == 0 and kept[-1] == len(columns["close"]) - 1
+    assert (np.diff(kept) > 0).all()
+
+def test_lttb_keeps_a_spike():
+    y = np.ones(500)
+    y[321] = 50
+    assert 321 in lttb_indices(np.arange(500), y, 20)
+
+def test_line_downsampling_keeps_bars_unchanged(columns):
+    reduced = downsample_columns(columns, 100, "line")
+    kept = np.searchsorted(columns["timestamp"], reduced["timestamp"])
+    for name in ("open", "high", "low", "close", "volume"):
+        np.testing.assert_array_equal(reduced[name], columns[name][kept])
+
+@pytest.mark.parametrize("max_points", [7, 100, 333])
+def test_ohlc_buckets_keep_open_high_low_close_and_volume(columns, max_points):
+    merged = ohlc_buckets(columns, max_points)
+    assert len(merged["timestamp"]) == max_points
+    starts = np.searchsorted(columns["timestamp"], merged["timestamp"])
+    ends = np.append(starts[1:], len(columns["timestamp"]))
+    assert starts[0] == 0
+    for index, (start, end) in enumerate(zip(starts, ends)):
+        assert merged["open"][index] == columns["open"][start]
+        assert merged["high"][index] == columns["high"][start:end].max()
+        assert merged["low"][index] == columns["low"][start:end].min()
+        assert merged["close"][index] == columns["close"][end - 1]
+        assert merged["volume"][index] == columns["volume"][start:end].sum()
+    assert merged["volume"].sum() == columns["volume"].sum()
+
+def test_downsampling_returns_short_columns_as_they_are(columns):
+    assert downsample_columns(columns, 5000) is columns
+    assert downsample_columns(columns, 5000, "line") is columns
+
+@pytest.mark.parametrize("range, fixture", [("1y", "columns"), ("1d", "intraday_columns")])
+def test_streamed_bodies_parse_to_the_same_rows(request, range, fixture):
+    columns = request.getfixturevalue(fixture)
+    whole = json.loads(stock_response_json(columns, range, "^GSPC"))
+    assert whole["success"] and whole["range"] == range and whole["symbol"] == "^GSPC"
+    assert len(whole["data"]) == len(columns["timestamp"])
+
+    assert json.loads(b"".join(stream_stock_response(columns, range, "^GSPC", chunk_rows=7))) == whole
+    lines = b"".join(stream_ndjson(columns, range, chunk_rows=7)).decode().splitlines()
+    assert [json.loads(line) for line in lines] == whole["data"]
+
+    columnar = json.loads(columnar_response_json(columns, range, "^GSPC"))["columns"]
+    assert columnar["close"] == [row["price"] for row in whole["data"]]
+    assert columnar["open"] == [row["open"] for row in whole["data"]]
+    assert columnar["high"] == [row["high"] for row in whole["data"]]
+    assert columnar["low"] == [row["low"] for row in whole["data"]]
+    assert [str(volume) for volume in columnar["volume"]] == [row["volume"] for row in whole["data"]]
+    assert columnar["timestamp"] == (columns["timestamp"] // 10**9).tolist()
+
+def test_empty_columns_stream_an_empty_body():
+    columns = chart_columns(None)
+    assert json.loads(b"".join(stream_stock_response(columns, "1y", "X"))) == json.loads(stock_response_json(columns, "1y", "X"))
+    assert b"".join(stream_ndjson(columns, "1y")) == b""
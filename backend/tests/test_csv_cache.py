@@ -0,0 +1,75 @@
+import os
+import threading
+
+import numpy as np
+
+import csv_data
+from benchmarks.synthetic import write_price_csv
+
+def test_rebuild_keeps_this_versions_files_and_removes_others(tmp_path, cache_dir):
+    path = str(tmp_path / "prices.csv")
+    write_price_csv(path, 100)
+    prefix, dates_path, values_path = csv_data._cache_paths(path)
+    cache_dir.mkdir()
+    stale = cache_dir / f"{prefix}-1-2.dates.npy"
+    stale.write_bytes(b"old version")
+    # another process writing the same version
+    in_progress = cache_dir / f"{os.path.basename(dates_path)}.999-1.tmp"
+    in_progress.write_bytes(b"partial")
+
+    csv_data._build_cache(path, dates_path, values_path, prefix)
+    dates_inode = os.stat(dates_path).st_ino
+    csv_data._build_cache(path, dates_path, values_path, prefix)
+
+    assert not stale.exists()
+    assert in_progress.exists()
+    assert os.path.exists(dates_path) and os.path.exists(values_path)
+    assert os.stat(dates_path).st_ino != dates_inode
+
+def test_stale_file_removed_concurrently_is_not_an_error(tmp_path, cache_dir, monkeypatch):
+    path = str(tmp_path / "prices.csv")
+    write_price_csv(path, 100)
+    prefix, dates_path, values_path = csv_data._cache_paths(path)
+    cache_dir.mkdir()
+    (cache_dir / f"{prefix}-1-2.values.npy").write_bytes(b"old version")
+    remove = os.remove
+
+    def raced(name):
+        remove(name)
+        raise FileNotFoundError(name)
+
+    monkeypatch.setattr(csv_data.os, "remove", raced)
+    csv_data._build_cache(path, dates_path, values_path, prefix)
+    assert os.path.exists(values_path)
+
+def test_concurrent_first_loads(tmp_path, cache_dir):
+    path = str(tmp_path / "prices.csv")
+    write_price_csv(path, 2000)
+    expected = None
+    for round in range(5):
+        if round:
+            # a new version of the file, which every loader rebuilds at once
+            os.utime(path, ns=(round * 10**9, round * 10**9))
+        barrier = threading.Barrier(8)
+        results, errors = [], []
+
+        def load():
+            barrier.wait()
+            try:
+                dates, values = csv_data.get_csv_columns(path)
+                results.append((np.array(dates), np.array(values)))
+            except Exception as error:
+                errors.append(error)
+
+        threads = [threading.Thread(target=load) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert errors == []
+        expected = results[0] if expected is None else expected
+        for dates, values in results:
+            np.testing.assert_array_equal(dates, expected[0])
+            np.testing.assert_array_equal(values, expected[1])
+    prefix = csv_data._cache_paths(path)[0]
+    assert sorted(name.rsplit(".", 2)[-2] for name in os.listdir(cache_dir) if name.startswith(prefix)) == ["dates", "values"]
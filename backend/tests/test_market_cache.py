@@ -0,0 +1,100 @@
+import threading
+import time
+
+import pytest
+
+from market_cache import MarketDataCache
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+class FakeFetcher:
+    """Returns `value` and counts its calls; with `gate`, every call waits for it first"""
+
+    def __init__(self, value="bars", gate: threading.Event | None = None, error: Exception | None = None):
+        self.value = value
+        self.gate = gate
+        self.error = error
+        self.calls = 0
+
+    def __call__(self):
+        self.calls += 1
+        if self.gate is not None:
+            self.gate.wait(5)
+        if self.error is not None:
+            raise self.error
+        return self.value
+
+def wait_for(condition):
+    deadline = time.monotonic() + 5
+    while not condition():
+        assert time.monotonic() < deadline
+        time.sleep(0.001)
+
+def concurrent_gets(cache: MarketDataCache, fetch, count: int) -> tuple[list, list]:
+    results, errors = [], []
+
+    def get():
+        try:
+            results.append(cache.get("key", fetch))
+        except Exception as error:
+            errors.append(error)
+
+    threads = [threading.Thread(target=get) for _ in range(count)]
+    for thread in threads:
+        thread.start()
+    # every caller has missed and joined the fetch in flight before it finishes
+    wait_for(lambda: cache.misses == count)
+    fetch.gate.set()
+    for thread in threads:
+        thread.join()
+    return results, errors
+
+def test_entry_expires_after_its_ttl():
+    clock, fetch = FakeClock(), FakeFetcher()
+    cache = MarketDataCache(default_ttl=60, clock=clock)
+    assert cache.get("key", fetch) == "bars"
+    clock.now = 59.9
+    assert cache.get("key", fetch) == "bars"
+    assert fetch.calls == 1
+
+    clock.now = 60
+    assert cache.get("key", fetch) == "bars"
+    assert fetch.calls == 2
+    # a per-call ttl overrides the default
+    cache.get("short", fetch, ttl=1)
+    clock.now = 61
+    assert cache.peek("short") is None
+
+def test_least_recently_used_entry_is_evicted():
+    cache = MarketDataCache(max_entries=2, clock=FakeClock())
+    cache.get("a", lambda: 1)
+    cache.get("b", lambda: 2)
+    # reading "a" makes "b" the least recently used
+    assert cache.get("a", lambda: pytest.fail("fetched a fresh entry")) == 1
+    cache.get("c", lambda: 3)
+    assert cache.peek("b") is None
+    assert (cache.peek("a"), cache.peek("c")) == (1, 3)
+
+def test_concurrent_gets_of_one_key_fetch_once():
+    fetch = FakeFetcher(gate=threading.Event())
+    cache = MarketDataCache()
+    results, errors = concurrent_gets(cache, fetch, 8)
+    assert fetch.calls == 1
+    assert errors == [] and results == ["bars"] * 8
+    assert cache.get("key", fetch) == "bars" and fetch.calls == 1
+
+def test_fetch_error_reaches_every_waiter_and_is_not_stored():
+    error = ConnectionError("upstream down")
+    fetch = FakeFetcher(gate=threading.Event(), error=error)
+    cache = MarketDataCache()
+    results, errors = concurrent_gets(cache, fetch, 8)
+    assert fetch.calls == 1
+    assert results == [] and errors == [error] * 8
+
+    # the key is fetched again on the next get
+    assert cache.get("key", FakeFetcher("recovered")) == "recovered"
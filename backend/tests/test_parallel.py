@@ -0,0 +1,22 @@
+import pytest
+
+import algorithms
+from benchmarks.synthetic import write_price_csv
+from simulator import simulate
+
+@pytest.fixture(scope="module")
+def prices_csv(tmp_path_factory):
+    path = str(tmp_path_factory.mktemp("parallel") / "prices.csv")
+    write_price_csv(path, 600, seed=4)
+    return path
+
+@pytest.mark.parametrize("algorithm, settings", [
+    (algorithms.buy_the_dip, dict(monthly_cash=1000)),
+    (algorithms.moving_average_crossover, dict(exposure_type="fixed_quantity", exposure_value=20)),
+    # prefix sums off, so the windows are replayed by the workers
+    (algorithms.buy_everyday, dict(monthly_cash=1000, prefix_sums=False)),
+])
+def test_workers_match_serial(prices_csv, algorithm, settings):
+    serial = simulate(algorithm, stock=prices_csv, workers=1, cache=False, **settings)
+    parallel = simulate(algorithm, stock=prices_csv, workers=2, chunk_size=37, cache=False, **settings)
+    assert parallel == serial
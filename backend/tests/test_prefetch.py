@@ -0,0 +1,47 @@
+from prefetch import PrefetchScheduler
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+def scheduler(clock: FakeClock, refreshed: list) -> PrefetchScheduler:
+    # every entry is missing, so every tracked key is due whenever it is not backing off
+    return PrefetchScheduler(lambda request: refreshed.append(request) or request, lambda key: None, top=20, lead=10, half_life=600, clock=clock)
+
+def test_key_requested_once_is_forgotten_after_it_goes_cold():
+    clock, refreshed = FakeClock(), []
+    prefetcher = scheduler(clock, refreshed)
+    prefetcher.record("once", "once")
+
+    assert prefetcher.run_once() == 1
+    clock.now = 2 * 600 - 1
+    assert prefetcher.run_once() == 1
+
+    # two half-lives later the single request has decayed below min_score
+    clock.now = 2 * 600 + 1
+    assert prefetcher.hottest() == []
+    for day in range(1, 4):
+        clock.now = day * 24 * 60 * 60
+        assert prefetcher.run_once() == 0
+    assert refreshed == ["once", "once"]
+
+def test_requested_key_stays_warm_and_ranks_by_score():
+    clock, refreshed = FakeClock(), []
+    prefetcher = scheduler(clock, refreshed)
+    # a request every five minutes for two hours, twice as many for "warm"; "cold" only at the start
+    for step in range(24):
+        clock.now = step * 5 * 60
+        prefetcher.record("hot", "hot")
+        prefetcher.record("warm", "warm")
+        prefetcher.record("warm", "warm")
+        if step == 0:
+            prefetcher.record("cold", "cold")
+        prefetcher.run_once()
+
+    assert prefetcher.hottest() == ["warm", "hot"]
+    assert refreshed.count("hot") == 24
+    # refreshed until its score reaches min_score two half-lives (four steps) after its only request
+    assert refreshed.count("cold") == 5
@@ -0,0 +1,59 @@
+import itertools
+
+import numpy as np
+import pytest
+
+import algorithms
+import simulator
+from simulator import prefix_sum_pattern, prefix_sum_profits, window_lengths, window_profits
+
+# a random walk that falls well below its start and recovers, so windows meet both cheap and dear prices
+PRICES = 100 * np.exp(np.cumsum(np.random.default_rng(7).normal(0, 0.02, 900)))
+
+EXPOSURES = [("fixed_fraction", 0.1), ("fixed_fraction", 1), ("fixed_quantity", 1), ("fixed_quantity", 0.01), ("fixed_quantity", 3)]
+# plenty of cash, and too little for every order of the larger quantities, with and without contributions
+CASH = [(100000, 0), (100000, 1000), (1000, 0), (1000, 100)]
+
+CASES = [
+    (algorithm, exposure_type, exposure_value, start_cash, monthly_cash)
+    for algorithm, (exposure_type, exposure_value), (start_cash, monthly_cash) in itertools.product((algorithms.buy_and_hold, algorithms.buy_everyday), EXPOSURES, CASH)
+    if prefix_sum_pattern(algorithm, exposure_type) is not None
+]
+
+def test_patterns():
+    assert prefix_sum_pattern(algorithms.buy_and_hold) == "first_day"
+    assert prefix_sum_pattern(algorithms.buy_everyday, "fixed_quantity") == "every_day"
+    assert prefix_sum_pattern(algorithms.buy_everyday, "fixed_fraction") is None
+    assert prefix_sum_pattern(algorithms.buy_after_3_consecutive_down_days) is None
+
+@pytest.mark.parametrize("algorithm, exposure_type, exposure_value, start_cash, monthly_cash", CASES)
+def test_prefix_sums_match_the_engine(algorithm, exposure_type, exposure_value, start_cash, monthly_cash):
+    settings = dict(start_cash=start_cash, monthly_cash=monthly_cash, exposure_type=exposure_type, exposure_value=exposure_value)
+    pattern = prefix_sum_pattern(algorithm, exposure_type)
+    for length in window_lengths(len(PRICES)):
+        fast = prefix_sum_profits(PRICES, length, pattern, **settings)
+        engine = window_profits(PRICES, algorithm.batch(PRICES), length, algorithm=algorithm, **settings)
+        assert len(fast) == len(engine)
+        # summed in another order, a profit on a rounding boundary may round the other way
+        assert np.abs(np.subtract(fast, engine)).max() <= 0.011, length
+        assert round(sum(fast) / len(fast), 2) == round(sum(engine) / len(engine), 2), length
+
+@pytest.mark.parametrize("length", [30, 100])
+def test_only_windows_short_of_cash_are_replayed(monkeypatch, length):
+    # flat prices with isolated spikes: the cash covers `length` ordinary orders, so exactly the windows holding a
+    # spike run short, in runs of `length` neighbours (gathered into copies when short, replayed as views when long)
+    prices = np.full(900, 100.0)
+    prices[75::150] = 5000
+    settings = dict(start_cash=length * 100 + 1000, monthly_cash=0, exposure_type="fixed_quantity", exposure_value=1)
+    replayed = []
+    engine = simulator.vectorized_algorithm_wrapper
+    monkeypatch.setattr(simulator, "vectorized_algorithm_wrapper", lambda windows, *args: replayed.append(len(windows)) or engine(windows, *args))
+
+    fast = prefix_sum_profits(prices, length, "every_day", **settings)
+    monkeypatch.undo()
+    expected = window_profits(prices, algorithms.buy_everyday.batch(prices), length, algorithm=algorithms.buy_everyday, **settings)
+
+    starts = np.arange(len(prices) - length, 0, -1)
+    short = sum(bool((prices[start:start + length] > 100).any()) for start in starts)
+    assert sum(replayed) == short
+    assert np.abs(np.subtract(fast, expected)).max() <= 0.011
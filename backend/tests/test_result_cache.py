@@ -0,0 +1,57 @@
+import os
+import threading
+
+import result_cache
+from result_cache import ResultCache
+
+def test_counters_are_exact_under_concurrent_gets(tmp_path):
+    cache = ResultCache(str(tmp_path))
+    cache.put("present", [1, 2, 3])
+    barrier = threading.Barrier(8)
+
+    def get():
+        barrier.wait()
+        for _ in range(500):
+            cache.get("present")
+            cache.get("absent")
+
+    threads = [threading.Thread(target=get) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert (cache.hits, cache.misses) == (4000, 4000)
+
+def test_directory_is_scanned_only_past_the_limit(tmp_path, monkeypatch):
+    scans = []
+    scandir = os.scandir
+    monkeypatch.setattr(result_cache.os, "scandir", lambda path: scans.append(path) or scandir(path))
+    value = "x" * 98
+    # 100 bytes per file
+    cache = ResultCache(str(tmp_path), max_bytes=1000)
+    for i in range(10):
+        cache.put(str(i), value)
+        os.utime(tmp_path / f"{i}.json", ns=(i * 10**9, i * 10**9))
+    assert len(scans) == 1
+    cache.put("0", value)
+    assert len(scans) == 1
+
+    cache.put("10", value)
+    assert len(scans) == 2
+    names = sorted(os.listdir(tmp_path))
+    assert len(names) == 10 and "1.json" not in names
+    assert sum(os.path.getsize(tmp_path / name) for name in names) <= 1000
+
+def test_scan_counts_files_of_other_processes(tmp_path):
+    cache = ResultCache(str(tmp_path), max_bytes=1000)
+    other = ResultCache(str(tmp_path), max_bytes=1000)
+    cache.put("first", "x" * 98)
+    for i in range(10):
+        other.put(str(i), "x" * 98)
+    assert len(os.listdir(tmp_path)) == 10
+    # this instance's running total is only 200 bytes, so its put leaves the directory over the limit
+    cache.put("second", "x" * 98)
+    assert len(os.listdir(tmp_path)) == 11
+    for i in range(9):
+        cache.put(f"more{i}", "x" * 98)
+    assert sum(os.path.getsize(tmp_path / name) for name in os.listdir(tmp_path)) <= 1000
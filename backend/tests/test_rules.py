@@ -0,0 +1,56 @@
+import numpy as np
+import pytest
+
+import algorithms
+import rules
+
+PRICES = 100 * np.exp(np.cumsum(np.random.default_rng(5).normal(0, 0.02, (4, 300)), axis=-1))
+
+def test_program_leading_days_match_a_full_evaluation():
+    program = rules.Program({
+        "dip": (rules.day() >= 1) & rules.below_recent_high(0.05, 20),
+        "cross": rules.crosses_above(rules.moving_average(rules.price(), 5), rules.moving_average(rules.price(), 50)),
+        "always": rules.const(True),
+    })
+    full = program(PRICES)
+    days = {"dip": 30, "cross": 120, "always": 7}
+    leading = program(PRICES, days)
+    for name, span in days.items():
+        assert leading[name].shape == (4, span)
+        np.testing.assert_array_equal(leading[name], full[name][:, :span])
+
+STRATEGIES = [
+    (algorithms.buy_after_3_consecutive_down_days, {}),
+    (algorithms.buy_everyday, {}),
+    (algorithms.buy_and_hold, {}),
+    (algorithms.buy_the_dip, {}),
+    (algorithms.buy_the_dip, {"dip_threshold": 0.02, "lookback_window": 5}),
+    (algorithms.buy_the_dip, {"dip_threshold": 0.1, "lookback_window": 30}),
+    (algorithms.moving_average_crossover, {}),
+    (algorithms.moving_average_crossover, {"lookback_windows": (10, 3)}),
+    (algorithms.moving_average_crossover, {"lookback_windows": (50, 20)}),
+    (algorithms.reversal_after_a_decline, {}),
+    (algorithms.reversal_after_a_decline, {"downtrend_length": 3}),
+    (algorithms.reversal_after_a_decline, {"downtrend_length": 8}),
+]
+
+_walk = 100 * np.exp(np.cumsum(np.random.default_rng(11).normal(0, 0.02, 250)))
+SERIES = {
+    "random walk": _walk,
+    # prices on a coarse tick, so averages and neighbouring days are often equal
+    "ticks": np.round(_walk * 2) / 2,
+    "few levels": np.random.default_rng(12).integers(1, 4, 250).astype(float),
+    "constant": np.full(250, 10.0),
+    "rising": np.arange(1.0, 251.0),
+    "falling": np.arange(250.0, 0.0, -1.0),
+    "alternating": np.tile([1.0, 2.0], 125),
+    "short": np.array([5.0, 4.0, 3.0, 2.0, 3.0]),
+}
+
+@pytest.mark.parametrize("series", SERIES)
+@pytest.mark.parametrize("algorithm, params", STRATEGIES, ids=lambda value: getattr(value, "__name__", str(value)))
+def test_rules_match_the_per_day_strategies(algorithm, params, series):
+    prices = SERIES[series]
+    bound = algorithms.with_params(algorithm, **params)
+    expected = [algorithms.BUY if bound(i, list(prices))[0] == "buy" else algorithms.HOLD for i in range(len(prices))]
+    np.testing.assert_array_equal(bound.batch(prices[None]), [expected])
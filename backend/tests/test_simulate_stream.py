@@ -0,0 +1,46 @@
+import numpy as np
+import pytest
+
+import algorithms
+from benchmarks.synthetic import write_price_csv
+from csv_data import get_csv_columns, iter_csv_batches
+from simulator import simulate_stream, vectorized_algorithm_wrapper
+
+PERIOD = ("01/01/1990", "12/31/2030")
+SETTINGS = dict(start_cash=100000, monthly_cash=1000, exposure_type="fixed_fraction", exposure_value=0.1)
+
+def oldest_first_copy(path, copy_path):
+    with open(path) as file:
+        header, *rows = file.readlines()
+    with open(copy_path, "w") as file:
+        file.writelines([header] + rows[::-1])
+
+@pytest.fixture(scope="module")
+def newest_first(tmp_path_factory):
+    path = str(tmp_path_factory.mktemp("prices") / "newest_first.csv")
+    write_price_csv(path, 3000, seed=3)
+    return path
+
+def test_newest_first_file_is_rejected(newest_first):
+    with pytest.raises(ValueError):
+        simulate_stream(iter_csv_batches(newest_first, PERIOD, batch_rows=500), algorithms.buy_everyday, **SETTINGS)
+
+def test_batches_out_of_order_are_rejected():
+    values = np.arange(1.0, 11.0)[:, None]
+    times = np.arange(10)
+    with pytest.raises(ValueError):
+        simulate_stream([(times[5:], values[5:]), (times[:5], values[:5])], algorithms.buy_everyday, **SETTINGS)
+
+@pytest.mark.parametrize("algorithm", [algorithms.buy_and_hold, algorithms.buy_everyday, algorithms.buy_the_dip])
+def test_oldest_first_file_matches_one_run(newest_first, tmp_path, algorithm):
+    path = str(tmp_path / "oldest_first.csv")
+    oldest_first_copy(newest_first, path)
+    streamed = simulate_stream(iter_csv_batches(path, PERIOD, batch_rows=500), algorithm, **SETTINGS)
+
+    _, columns = get_csv_columns(newest_first)
+    prices = np.array(columns[::-1, 0])
+    cash, owned, invested = vectorized_algorithm_wrapper(prices, algorithm.batch(prices), **SETTINGS)
+    assert streamed["bars"] == len(prices) == 3000
+    assert streamed["cash"] == round(float(cash), 2)
+    assert streamed["shares_owned"] == round(float(owned), 4)
+    assert streamed["total_invested"] == round(invested, 2)
@@ -0,0 +1,11 @@
+import numpy as np
+
+import strategy_runner
+from simulator import average_profits
+
+PRICES = 100 * np.exp(np.cumsum(np.random.default_rng(8).normal(0, 0.01, 300)))
+
+def test_profits_run_in_the_limited_worker_match_average_profits():
+    algorithm, exposure_value, *_ = strategy_runner.STRATEGIES["buy_the_dip"]
+    expected = average_profits(PRICES, algorithm, 10000, 1000, "fixed_fraction", exposure_value)
+    assert strategy_runner.run_profits_limited(PRICES, "buy_the_dip", 10000, 1000) == expected
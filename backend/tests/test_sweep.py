@@ -0,0 +1,69 @@
+import os
+
+import pytest
+
+import algorithms
+import rules
+import sweep
+from benchmarks.synthetic import write_price_csv
+from simulator import simulate
+
+@pytest.fixture(scope="module")
+def prices_csv(tmp_path_factory):
+    path = str(tmp_path_factory.mktemp("sweep") / "prices.csv")
+    write_price_csv(path, 400, seed=11)
+    return path
+
+@pytest.fixture(autouse=True)
+def fresh_sweep():
+    sweep._finished.clear()
+
+def test_results_match_simulate(prices_csv):
+    grid = {"dip_threshold": [0.02, 0.05], "lookback_window": [10, 30], "exposure_value": [0.1, 0.5], "monthly_cash": [0, 1000]}
+    for row in sweep.sweep(algorithms.buy_the_dip, grid, prices_csv):
+        strategy_params, engine_params = sweep._split(row["params"])
+        expected = simulate(algorithms.with_params(algorithms.buy_the_dip, **strategy_params), stock=prices_csv, cache=False, **engine_params)
+        assert row["results"] == expected, row["params"]
+
+def test_indicators_are_shared_across_parameter_sets(prices_csv, monkeypatch):
+    windows = []
+    rolling_max = rules.OPERATIONS["rolling_max"]
+    monkeypatch.setitem(rules.OPERATIONS, "rolling_max", lambda values, window: windows.append(window) or rolling_max(values, window))
+    sweep.sweep(algorithms.buy_the_dip, {"dip_threshold": [0.02, 0.03, 0.05, 0.08], "lookback_window": [10, 30]}, prices_csv)
+
+    # one rolling high per lookback for the history and per window length, whatever the number of dip thresholds
+    lengths = len(sweep.window_lengths(400))
+    assert sorted(set(windows)) == [10, 30]
+    assert windows.count(10) == windows.count(30) == 1 + lengths
+
+def test_moving_averages_are_shared_across_pairs(prices_csv, monkeypatch):
+    lengths = []
+    moving_average = rules.OPERATIONS["moving_average"]
+    monkeypatch.setitem(rules.OPERATIONS, "moving_average", lambda values, length: lengths.append(length) or moving_average(values, length))
+    sweep.sweep(algorithms.moving_average_crossover, {"lookback_windows": [(20, 5), (50, 5), (50, 20)]}, prices_csv)
+
+    runs = 1 + len(sweep.window_lengths(400))
+    assert sorted(set(lengths)) == [5, 20, 50]
+    assert all(lengths.count(length) == runs for length in (5, 20, 50))
+
+def test_list_valued_parameters_from_parse_grid(prices_csv):
+    grid = sweep.parse_grid(["lookback_windows=[[20, 5], [50, 10]]", "exposure_value=[0.1, 0.5]"])
+    rows = sweep.sweep(algorithms.moving_average_crossover, grid, prices_csv)
+    assert len(rows) == 4
+    for row in rows:
+        strategy_params, engine_params = sweep._split(row["params"])
+        expected = simulate(algorithms.with_params(algorithms.moving_average_crossover, **strategy_params), stock=prices_csv, cache=False, **engine_params)
+        assert row["results"] == expected, row["params"]
+    # the same combinations, now finished
+    assert sweep.sweep(algorithms.moving_average_crossover, grid, prices_csv) == rows
+
+def test_file_rewritten_within_the_same_mtime_is_simulated_again(tmp_path):
+    path = str(tmp_path / "prices.csv")
+    write_price_csv(path, 300, seed=1)
+    stat = os.stat(path)
+    first = sweep.sweep(algorithms.buy_everyday, {}, path)
+    write_price_csv(path, 350, seed=2)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+    second = sweep.sweep(algorithms.buy_everyday, {}, path)
+    assert second[0]["results"] == simulate(algorithms.buy_everyday, stock=path, cache=False)
+    assert second[0]["results"] != first[0]["results"]
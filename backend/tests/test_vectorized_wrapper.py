@@ -0,0 +1,36 @@
+import numpy as np
+import pytest
+
+import algorithms
+from simulator import algorithm_wrapper, sliding_windows, strategy_signals, vectorized_algorithm_wrapper
+
+STRATEGIES = [
+    algorithms.buy_after_3_consecutive_down_days,
+    algorithms.buy_everyday,
+    algorithms.buy_and_hold,
+    algorithms.buy_the_dip,
+    algorithms.moving_average_crossover,
+    algorithms.reversal_after_a_decline,
+]
+# fixed_quantity 30 runs out of cash within the series when buying every day
+EXPOSURES = [("fixed_fraction", 0.1), ("fixed_fraction", 0.5), ("fixed_quantity", 30)]
+
+PRICES = 100 * np.exp(np.cumsum(np.random.default_rng(21).normal(0, 0.02, 400)))
+
+@pytest.mark.parametrize("monthly_cash", [0, 1000])
+@pytest.mark.parametrize("exposure_type, exposure_value", EXPOSURES)
+@pytest.mark.parametrize("algorithm", STRATEGIES, ids=lambda algorithm: algorithm.__name__)
+def test_same_results_as_algorithm_wrapper(algorithm, exposure_type, exposure_value, monthly_cash):
+    settings = dict(start_cash=100000, monthly_cash=monthly_cash, exposure_type=exposure_type, exposure_value=exposure_value)
+    expected = algorithm_wrapper(list(PRICES), algorithm=algorithm, **settings)
+    assert vectorized_algorithm_wrapper(PRICES, strategy_signals(PRICES, algorithm), **settings) == expected
+
+@pytest.mark.parametrize("monthly_cash", [0, 1000])
+@pytest.mark.parametrize("exposure_type, exposure_value", EXPOSURES)
+@pytest.mark.parametrize("algorithm", STRATEGIES, ids=lambda algorithm: algorithm.__name__)
+def test_every_window_matches_algorithm_wrapper(algorithm, exposure_type, exposure_value, monthly_cash):
+    settings = dict(start_cash=100000, monthly_cash=monthly_cash, exposure_type=exposure_type, exposure_value=exposure_value)
+    windows = np.array(sliding_windows(PRICES, 120))[::7]
+    cash, owned, invested = vectorized_algorithm_wrapper(windows, strategy_signals(windows, algorithm), **settings)
+    for window, window_cash, window_owned in zip(windows, cash, owned):
+        assert (window_cash, window_owned, invested) == algorithm_wrapper(list(window), algorithm=algorithm, **settings)
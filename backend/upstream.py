@@ -0,0 +1,167 @@
+import random
+import threading
+import time
+from typing import Any, Callable
+from urllib.parse import quote
+
+import pandas as pd
+
+# Plumbing shared by every call to the market data provider: one connection-pooled HTTP session, a token bucket that
+# bounds the request rate across threads, and retries with exponential backoff.
+
+# Intervals whose bars carry a time of day
+INTRADAY_INTERVALS = ("1m", "2m", "5m", "15m", "30m", "60m", "90m", "1h")
+
+class TokenBucket:
+    """
+    Rate limiter allowing `rate` acquisitions per second on average and bursts of up to `capacity`.
+
+    Callers reserve their token under the lock and sleep outside it, so waiting callers are served in arrival order
+    without holding each other up.
+    """
+
+    def __init__(self, rate: float, capacity: float = 1, clock: Callable[[], float] = time.monotonic, sleep: Callable[[float], None] = time.sleep):
+        """
+        Args:
+            rate (float): Tokens added per second.
+            capacity (float, optional): Most tokens kept, the largest burst. Defaults to 1.
+            clock (Callable[[], float], optional): Time source in seconds, replaceable in tests. Defaults to `time.monotonic`.
+            sleep (Callable[[float], None], optional): Waits a number of seconds, replaceable in tests. Defaults to `time.sleep`.
+        """
+        self.rate = rate
+        self.capacity = capacity
+        self.clock = clock
+        self.sleep = sleep
+        self._tokens = capacity
+        self._updated = clock()
+        self._lock = threading.Lock()
+        self.waited = 0.0
+
+    def acquire(self) -> float:
+        """
+        Takes one token, waiting for it when the bucket is empty.
+
+        Returns:
+            float: Seconds waited.
+        """
+        with self._lock:
+            now = self.clock()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            # a negative balance is the queue of callers already waiting for their token
+            self._tokens -= 1
+            wait = -self._tokens / self.rate if self._tokens < 0 else 0.0
+            self.waited += wait
+        if wait:
+            self.sleep(wait)
+        return wait
+
+def with_retries(call: Callable[[], Any], attempts: int = 3, base_delay: float = 0.5, max_delay: float = 8, retry_on: tuple = (Exception,), sleep: Callable[[float], None] = time.sleep) -> Any:
+    """
+    Calls `call`, retrying failures with exponential backoff and full jitter.
+
+    Args:
+        call (Callable[[], Any]): The operation.
+        attempts (int, optional): Calls made at most. Defaults to 3.
+        base_delay (float, optional): Upper bound of the first pause in seconds; it doubles after every failure.
+            Defaults to 0.5.
+        max_delay (float, optional): Longest pause in seconds. Defaults to 8.
+        retry_on (tuple, optional): Exception types that are retried; others are raised at once. Defaults to any Exception.
+        sleep (Callable[[float], None], optional): Waits a number of seconds, replaceable in tests. Defaults to `time.sleep`.
+
+    Returns:
+        Any: What the first successful call returned. The last failure is raised when every attempt fails.
+    """
+    for attempt in range(attempts):
+        try:
+            return call()
+        except retry_on as e:
+            if attempt == attempts - 1:
+                raise
+            delay = random.uniform(0, min(max_delay, base_delay * 2**attempt))
+            print(f"Upstream call failed ({e}), retrying in {delay:.2f}s")
+            sleep(delay)
+
+def pooled_session(pool_size: int = 16):
+    """A requests session that keeps up to `pool_size` connections per host open between requests"""
+    import requests
+    from requests.adapters import HTTPAdapter
+
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    session.headers["User-Agent"] = "Mozilla/5.0 (compatible; stock-dashboard)"
+    return session
+
+def limited(fetcher: Callable[..., Any], bucket: TokenBucket, attempts: int = 3, base_delay: float = 0.5) -> Callable[..., Any]:
+    """
+    Wraps a fetcher so every call, including each retry, takes a token from `bucket`, and failures are retried.
+    """
+    def fetch(*args, **kwargs):
+        def attempt():
+            bucket.acquire()
+            return fetcher(*args, **kwargs)
+        return with_retries(attempt, attempts=attempts, base_delay=base_delay)
+    fetch.__wrapped__ = fetcher
+    return fetch
+
+class ChartProvider:
+    """
+    Fetcher for a provider speaking the Yahoo Finance chart API (`/v8/finance/chart/{symbol}`), over a pooled session.
+
+    Called like `api_data.fetch_bars`, so it can stand in for yfinance, e.g. pointed at a local stub provider.
+    """
+
+    def __init__(self, base_url: str, session=None, timeout: float = 10):
+        """
+        Args:
+            base_url (str): Scheme and host of the provider, e.g. "https://query1.finance.yahoo.com".
+            session (requests.Session | None, optional): Session to send the requests on. Defaults to a `pooled_session`.
+            timeout (float, optional): Seconds to wait for a response. Defaults to 10.
+        """
+        self.base_url = base_url.rstrip("/")
+        self.session = session if session is not None else pooled_session()
+        self.timeout = timeout
+        self.requests = 0
+
+    def __call__(self, symbol: str, interval: str, period: str | None = None, start: pd.Timestamp | None = None) -> pd.DataFrame | None:
+        """
+        Download the look-back `period` or every bar from `start` on, as `api_data.fetch_bars` does.
+
+        Returns a DataFrame with timestamp (naive exchange-local datetime, date only for daily/weekly/monthly), open,
+        high, low, close and volume columns, or None when the provider has no data. Connection errors and error
+        statuses other than 404 are raised.
+        """
+        params = {"interval": interval}
+        if start is None:
+            params["range"] = period or "max"
+        else:
+            params["period1"] = int(start.timestamp())
+            params["period2"] = int(time.time())
+        self.requests += 1
+        response = self.session.get(f"{self.base_url}/v8/finance/chart/{quote(symbol, safe='')}", params=params, timeout=self.timeout)
+        if response.status_code == 404:
+            return None
+        response.raise_for_status()
+        return chart_frame(response.json(), interval)
+
+def chart_frame(payload: dict, interval: str) -> pd.DataFrame | None:
+    """Convert a chart API response into the frame `api_data.fetch_bars` returns, None when it holds no bars"""
+    results = (payload.get("chart") or {}).get("result") or []
+    if not results or not results[0].get("timestamp"):
+        return None
+    result = results[0]
+    quote_columns = result["indicators"]["quote"][0]
+    timezone = result.get("meta", {}).get("exchangeTimezoneName") or "UTC"
+    # wall-clock time of the exchange, without the timezone
+    timestamps = pd.to_datetime(result["timestamp"], unit="s", utc=True).tz_convert(timezone).tz_localize(None)
+    if interval not in INTRADAY_INTERVALS:
+        timestamps = timestamps.normalize()
+    frame = pd.DataFrame({
+        "timestamp": timestamps,
+        **{name: pd.to_numeric(pd.Series(quote_columns.get(name)), errors="coerce") for name in ("open", "high", "low", "close", "volume")},
+    })
+    # the provider sends null prices for bars that did not trade
+    frame = frame.dropna(subset=["close"]).reset_index(drop=True)
+    return frame if not frame.empty else None
@@ -7,9 +7,12 @@ export async function GET(request: NextRequest) {
     const { searchParams } = new URL(request.url);
     const range = searchParams.get('range') || '1d';
     const symbol = searchParams.get('symbol') || '^GSPC';
+    const maxPoints = searchParams.get('maxPoints');
+    const chart = searchParams.get('chart') || 'candlestick';
 
     // Call the Python FastAPI backend
-    const response = await fetch(`${PYTHON_API_URL}/api/stock-data?range=${range}&symbol=${symbol}`);
+    const downsampling = maxPoints ? `&max_points=${maxPoints}&chart=${chart}` : '';
+    const response = await fetch(`${PYTHON_API_URL}/api/stock-data?range=${range}&symbol=${symbol}${downsampling}`);
     
     if (!response.ok) {
       throw new Error(`Python API returned ${response.status}`);
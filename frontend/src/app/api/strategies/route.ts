@@ -1,5 +1,7 @@
 import { NextRequest, NextResponse } from 'next/server';
 
+const PYTHON_API_URL = process.env.PYTHON_API_URL || 'http://localhost:8000';
+
 export async function GET(request: NextRequest) {
   try {
     const searchParams = request.nextUrl.searchParams;
@@ -7,12 +9,12 @@ export async function GET(request: NextRequest) {
     const startCash = searchParams.get('startCash') || '10000';
     const monthlyCash = searchParams.get('monthlyCash') || '1000';
 
-    const backendUrl = `http://localhost:8000/api/strategies?symbol=${symbol}&start_cash=${startCash}&monthly_cash=${monthlyCash}`;
+    const backendUrl = `${PYTHON_API_URL}/api/strategies?symbol=${encodeURIComponent(symbol)}&start_cash=${startCash}&monthly_cash=${monthlyCash}`;
     
     const response = await fetch(backendUrl);
     const data = await response.json();
 
-    return NextResponse.json(data);
+    return NextResponse.json(data, { status: response.status });
   } catch (error) {
     console.error('Error fetching strategies:', error);
     return NextResponse.json(
@@ -37,6 +37,9 @@ interface StockData {
     file_name: string;
 }
 
+// The backend merges longer histories into this many candles; more would not fit the chart's width anyway
+const MAX_CHART_POINTS = 1000;
+
 const timeRanges = {
     '1d': { label: '1 Dzień' },
     '1w': { label: '1 Tydzień' },
@@ -81,7 +84,7 @@ export default function StockChart() {
             setFetchingData(true);
             setError(null);
             const symbolParam = symbol || symbolInput;
-            const response = await fetch(`/api/stock-data?range=${range}&symbol=${symbolParam}`);
+            const response = await fetch(`/api/stock-data?range=${range}&symbol=${symbolParam}&maxPoints=${MAX_CHART_POINTS}&chart=candlestick`);
             const result = await response.json();
 
             if (result.success) {
@@ -1,6 +1,5 @@
 "use client";
 import React, { useEffect, useState } from 'react';
-import { strategyAlgorithms } from '../utils/strategyAlgorithms';
 import {
     Chart as ChartJS,
     CategoryScale,
@@ -63,25 +62,6 @@ const strategyColors = [
     { border: '#ef4444', background: 'rgba(239, 68, 68, 0.1)' },
 ];
 
-const strategyMetadata: Record<string, { name: string; description: string }> = {
-    "buy_and_hold": {
-        name: "Kup i Trzymaj",
-        description: "Jednorazowy zakup na początku i długoterminowe trzymanie"
-    },
-    "buy_everyday": {
-        name: "DCA - Dollar Cost Averaging",
-        description: "Regularne zakupy w stałych odstępach czasu"
-    },
-    "buy_after_3_down": {
-        name: "3 Dni Spadków",
-        description: "Kupuj po trzech kolejnych dniach spadków"
-    },
-    "buy_the_dip": {
-        name: "Kup na Spadku",
-        description: "Kupuj gdy cena spadnie o 5% od ostatniego szczytu"
-    }
-};
-
 export default function StrategyComparison() {
     const [strategyData, setStrategyData] = useState<StrategyData | null>(null);
     const [loading, setLoading] = useState(true);
@@ -100,94 +80,18 @@ export default function StrategyComparison() {
             setLoading(true);
             setError(null);
             
-            // Fetch 1 year of daily stock data
-            const response = await fetch(`/api/stock-data?range=1y&symbol=${symbolInput}`);
-            const result = await response.json();
+            // Strategies are backtested (and cached) by the backend on the last year of daily data
+            const params = new URLSearchParams({ symbol: symbolInput, startCash, monthlyCash });
+            const response = await fetch(`/api/strategies?${params}`);
+            const result: StrategyData = await response.json();
 
-            if (!result.success || !result.data || result.data.length < 10) {
+            if (!result.success || !result.strategies) {
                 setError('Not enough data for simulation');
                 return;
             }
 
-            // Extract prices and dates (last 252 trading days)
-            const stockData = result.data.slice(-252);
-            const prices = stockData.map((d: any) => d.price);
-            const dates = stockData.map((d: any) => d.date);
-            
-            const startCashNum = parseFloat(startCash);
-            const monthlyCashNum = parseFloat(monthlyCash);
-
-            // Simulate each strategy
-            const strategies: Strategy[] = [];
-            
-            for (const [strategyId, algorithmFunc] of Object.entries(strategyAlgorithms)) {
-                const exposureValue = strategyId === "buy_and_hold" ? 1.0 : 0.1;
-                
-                const portfolioHistory = [];
-                let tempCash = startCashNum;
-                let tempQuantity = 0;
-                let tempInvested = startCashNum;
-                
-                for (let i = 0; i < prices.length; i++) {
-                    const price = prices[i];
-                    
-                    // Add monthly contribution every 21 days
-                    if (i % 21 === 0 && i > 0) {
-                        tempCash += monthlyCashNum;
-                        tempInvested += monthlyCashNum;
-                    }
-                    
-                    // Execute strategy
-                    const orderType = algorithmFunc(i, prices, startCashNum, monthlyCashNum, tempCash);
-                    
-                    // Calculate order quantity
-                    const orderQuantity = (tempCash * exposureValue) / price;
-                    
-                    if (orderType === "buy" && tempCash >= price * orderQuantity) {
-                        tempCash -= price * orderQuantity;
-                        tempQuantity += orderQuantity;
-                    }
-                    
-                    // Calculate current portfolio value
-                    const currentValue = tempCash + (tempQuantity * price);
-                    portfolioHistory.push({
-                        date: dates[i] || "",
-                        value: Math.round(currentValue * 100) / 100,
-                        invested: Math.round(tempInvested * 100) / 100,
-                        profit: Math.round((currentValue - tempInvested) * 100) / 100
-                    });
-                }
-                
-                // Final values
-                const finalPrice = prices[prices.length - 1];
-                const stockValue = tempQuantity * finalPrice;
-                const totalValue = tempCash + stockValue;
-                const profit = totalValue - tempInvested;
-                const profitPercentage = tempInvested > 0 ? (profit / tempInvested * 100) : 0;
-                
-                strategies.push({
-                    id: strategyId,
-                    name: strategyMetadata[strategyId]?.name || strategyId,
-                    description: strategyMetadata[strategyId]?.description || '',
-                    final_value: Math.round(totalValue * 100) / 100,
-                    total_invested: Math.round(tempInvested * 100) / 100,
-                    profit: Math.round(profit * 100) / 100,
-                    profit_percentage: Math.round(profitPercentage * 100) / 100,
-                    shares_owned: Math.round(tempQuantity * 10000) / 10000,
-                    cash_remaining: Math.round(tempCash * 100) / 100,
-                    portfolio_history: portfolioHistory
-                });
-            }
-
-            setStrategyData({
-                success: true,
-                strategies,
-                symbol: symbolInput,
-                start_cash: startCashNum,
-                monthly_cash: monthlyCashNum,
-                simulation_days: prices.length
-            });
-            setSelectedStrategies(strategies.map(s => s.id));
+            setStrategyData(result);
+            setSelectedStrategies(result.strategies.map(s => s.id));
         } catch (err) {
             setError('Network error');
             console.error(err);